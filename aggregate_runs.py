@@ -0,0 +1,107 @@
+import argparse
+import sys
+from contextlib import redirect_stdout
+
+import numpy as np
+
+from k6analysis.runs import RECOVERY_FIELDS, align_runs, load_runs, mean_interval, print_recovery_summary, recovery_summary
+from k6analysis.stats import write_json
+
+def parse_args():
+    parser = argparse.ArgumentParser(description='Combine repeated runs into a mean throughput curve with confidence bands')
+    parser.add_argument('run_dirs', nargs='+', help='Run directories holding k6_metrics.csv (or .cols) and crash_times.txt')
+    parser.add_argument('--output', help='Output image file path')
+    parser.add_argument('--align-crash', type=int, default=1, help='Crash number (1-based) the runs are aligned on')
+    parser.add_argument('--bucket', type=float, default=1.0, help='Time bucket width in seconds (0.01 to 10)')
+    parser.add_argument('--successful', action='store_true', help='Use successful requests instead of all http_reqs')
+    parser.add_argument('--jobs', type=int, default=None, help='Worker processes used to load runs (default: one per CPU)')
+    parser.add_argument('--no-cache', action='store_true', help='Always parse the CSV instead of using the columnar cache')
+    parser.add_argument('--stats-only', action='store_true', help='Skip the plot (matplotlib is never imported) and print the statistics as JSON')
+    parser.add_argument('--json', help="Write the statistics as JSON to this path ('-' for stdout)")
+    parser.add_argument('--dpi', type=int, default=300, help='Resolution of the saved image')
+    parser.add_argument('--max-points', type=int, default=2000, help='Downsample plotted series to about this many points (0 keeps all)')
+    args = parser.parse_args()
+    if not args.stats_only and not args.output:
+        parser.error('--output is required unless --stats-only is given')
+    if args.stats_only and not args.json:
+        args.json = '-'
+    return args
+
+def plot(args, aligned, seconds, matrix, mean, half, counts, summary):
+    from k6analysis.plots import downsample_index, plot_crash_markers, plt, save_figure
+
+    index = downsample_index(mean, args.max_points)
+    seconds, matrix, mean, half, counts = seconds[index], matrix[:, index], mean[index], half[index], counts[index]
+
+    plt.figure(figsize=(12, 8))
+
+    for row in matrix:
+        plt.plot(seconds, row, color='0.6', linewidth=0.8, alpha=0.6)
+    plt.plot(seconds, mean, 'b-', linewidth=2, label=f'Mean of {len(aligned)} runs')
+    plt.fill_between(seconds, mean - half, mean + half, where=counts > 1,
+                     color='b', alpha=0.2, label='95% confidence band')
+    plt.ylabel('Throughput (req/s)')
+    plt.xlabel(f'Time since crash {args.align_crash} (s)')
+    plt.title('Throughput with Server Failures across Runs')
+    plt.grid(True, linestyle='--', alpha=0.7)
+    plt.legend(loc='lower right')
+
+    plot_crash_markers([row['offset'] for row in summary], np.nanmax(matrix) * 0.9)
+    plt.ylim(0, max(np.nanmax(matrix) * 1.1, 250))
+    plt.xlim(seconds[0], seconds[-1] + args.bucket)
+
+    save_figure(args.output, args.dpi)
+    print(f"Graph saved to {args.output}")
+
+def analyze(args):
+    crash = args.align_crash - 1
+
+    print(f"Loading {len(args.run_dirs)} runs")
+    runs = load_runs(args.run_dirs, jobs=args.jobs, width=args.bucket,
+                     successful=args.successful, use_cache=not args.no_cache)
+
+    aligned = []
+    for run in runs:
+        if len(run.crash_times) > crash:
+            aligned.append(run)
+        else:
+            print(f"Skipping {run.name}: it has no crash {args.align_crash}")
+    if not aligned:
+        sys.exit(f"No runs to combine: no readable run has crash {args.align_crash}")
+
+    seconds, matrix = align_runs(aligned, crash)
+    mean, half, counts = mean_interval(matrix)
+    summary = recovery_summary(aligned, crash)
+
+    if not args.stats_only:
+        plot(args, aligned, seconds, matrix, mean, half, counts, summary)
+
+    print("\nPer-run statistics:")
+    for run in aligned:
+        recovered = ", ".join("-" if np.isnan(m['time_to_recover']) else f"{m['time_to_recover']:.2f}s"
+                              for m in run.recovery[crash:])
+        print(f"  {run.name}: Average throughput={np.mean(run.throughputs):.2f} req/s, "
+              f"time to recover: {recovered}")
+
+    print_recovery_summary(summary)
+
+    return {
+        'runs': [{'name': run.name, 'crash_times': run.crash_times, 'mean_throughput': np.mean(run.throughputs),
+                  'recovery': run.recovery} for run in aligned],
+        'align_crash': args.align_crash,
+        'bucket': args.bucket,
+        'recovery': [dict(row, **{field: dict(zip(['mean', 'ci95', 'n'], row[field]))
+                                  for field in RECOVERY_FIELDS}) for row in summary],
+    }
+
+def main():
+    args = parse_args()
+
+    with redirect_stdout(sys.stderr if args.json == '-' else sys.stdout):
+        stats = analyze(args)
+
+    if args.json and stats is not None:
+        write_json(stats, args.json)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,175 @@
+"""Wall time and peak memory of the analysis scripts on synthetic k6 data.
+
+For every ``--rows`` size a synthetic CSV is generated once (see
+``synthetic_k6.py``) and each entry point is run on it as a separate
+process, first straight from the CSV (``--no-cache``) and then from the
+columnar cache built by a priming run.  Peak RSS comes from the child's own
+resource usage.  Every measurement is appended to ``results.csv`` with the
+commit it was taken at, and compared against the previous measurement of the
+same entry point, mode and size.
+
+    python3 benchmarks/bench.py --rows 1000000 10000000 --data-dir bench_data
+"""
+import argparse
+import csv
+import datetime
+import os
+import platform
+import shutil
+import subprocess
+import sys
+
+import numpy as np
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+ROOT = os.path.join(HERE, '..')
+sys.path.insert(0, HERE)
+import synthetic_k6
+
+RESULTS = os.path.join(HERE, 'results.csv')
+FIELDS = ['date', 'commit', 'python', 'cpus', 'rows', 'file_mb', 'entry', 'mode', 'wall_s', 'peak_rss_mb',
+          'rows_per_s']
+STATS_ONLY = ['--stats-only', '--json', os.devnull]
+ENTRY_POINTS = {
+    'crash2': ['crash2.py', '--k6-output', '{csv}', '--crash-times', '{crash_times}'] + STATS_ONLY,
+    'crash2_latency': ['crash2.py', '--k6-output', '{csv}', '--crash-times', '{crash_times}', '--latency'] + STATS_ONLY,
+    'crash2_plot': ['crash2.py', '--k6-output', '{csv}', '--crash-times', '{crash_times}', '--latency',
+                    '--output', '{image}'],
+    'visualize_results': ['visualize_results.py', '--k6-output', '{csv}', '--crash-times', '{crash_times}'] + STATS_ONLY,
+    'compare_platforms': ['test_repair/compare_platforms.py', '--xdn-output', '{csv}', '--worker-output', '{csv}'] + STATS_ONLY,
+    'replica_breakdown': ['replica_breakdown.py', '--k6-output', '{csv}', '--crash-times', '{crash_times}'] + STATS_ONLY,
+    'latency_heatmap': ['latency_heatmap.py', '--k6-output', '{csv}', '--crash-times', '{crash_times}', '--output', '{image}'],
+    'coordinated_omission': ['coordinated_omission.py', '--k6-output', '{csv}', '--crash-times', '{crash_times}'] + STATS_ONLY,
+}
+MODES = ['csv', 'cached']
+REGRESSION_PCT = 10.0
+# Run by a fresh, small interpreter: a child forked from this process would
+# report this process's own peak RSS as a floor.
+PROBE = """\
+import resource, subprocess, sys, time
+start = time.perf_counter()
+code = subprocess.call(sys.argv[1:], stdout=subprocess.DEVNULL)
+print(time.perf_counter() - start, resource.getrusage(resource.RUSAGE_CHILDREN).ru_maxrss)
+sys.exit(code)
+"""
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description='Benchmark the analysis scripts on synthetic k6 CSVs')
+    parser.add_argument('--rows', type=int, nargs='+', default=[1_000_000], help='Synthetic run sizes in metric rows')
+    parser.add_argument('--entries', nargs='+', choices=list(ENTRY_POINTS), default=list(ENTRY_POINTS),
+                        help='Entry points to run')
+    parser.add_argument('--modes', nargs='+', choices=MODES, default=MODES,
+                        help='Read straight from the CSV, from the columnar cache, or both')
+    parser.add_argument('--repeat', type=int, default=1, help='Runs per measurement; the median time is kept')
+    parser.add_argument('--data-dir', default='bench_data', help='Where the synthetic CSVs are kept between runs')
+    parser.add_argument('--results', default=RESULTS, help='CSV the measurements are appended to')
+    parser.add_argument('--no-record', action='store_true', help='Print the measurements without appending them')
+    return parser.parse_args(argv)
+
+
+def size_label(rows):
+    return f"{rows // 1_000_000}M" if rows % 1_000_000 == 0 else str(rows)
+
+
+def dataset(args, rows):
+    directory = os.path.join(args.data_dir, f"k6_{size_label(rows)}")
+    path = os.path.join(directory, 'k6_metrics.csv')
+    crash_times = os.path.join(directory, 'crash_times.txt')
+    if not (os.path.exists(path) and os.path.exists(crash_times)):
+        os.makedirs(directory, exist_ok=True)
+        print(f"Generating {path}")
+        synthetic_k6.main(['--rows', str(rows), '--output', path, '--crash-times', crash_times])
+    return path, crash_times
+
+
+def measure(command, env):
+    result = subprocess.run([sys.executable, '-c', PROBE] + command, cwd=ROOT, env=env,
+                            capture_output=True, text=True)
+    if result.returncode != 0:
+        raise RuntimeError(f"{' '.join(command)} failed: {result.stderr[-2000:]}")
+    wall, rss_kb = result.stdout.split()
+    return float(wall), int(rss_kb) / 1024
+
+
+def commit():
+    try:
+        return subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], cwd=ROOT, capture_output=True,
+                              text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return ''
+
+
+def previous_results(path):
+    latest = {}
+    if os.path.exists(path):
+        with open(path, newline='') as f:
+            for row in csv.DictReader(f):
+                latest[(row['entry'], row['mode'], row['rows'])] = row
+    return latest
+
+
+def run_entry(args, entry, mode, path, crash_times, cache_dir):
+    values = {'csv': path, 'crash_times': crash_times, 'image': os.path.join(cache_dir, f'{entry}.png')}
+    command = [sys.executable] + [part.format(**values) for part in ENTRY_POINTS[entry]]
+    env = dict(os.environ, K6_CACHE_DIR=cache_dir, MPLBACKEND='Agg')
+    if mode == 'csv':
+        os.makedirs(cache_dir, exist_ok=True)
+        command.append('--no-cache')
+    else:
+        shutil.rmtree(cache_dir, ignore_errors=True)
+        os.makedirs(cache_dir)
+        # The priming run builds the cache; only the runs reading it are measured.
+        measure(command, env)
+    runs = [measure(command, env) for _ in range(args.repeat)]
+    return float(np.median([wall for wall, _ in runs])), max(rss for _, rss in runs)
+
+
+def main(argv=None):
+    args = parse_args(argv)
+    previous = previous_results(args.results)
+    common = {
+        'date': datetime.datetime.now(datetime.timezone.utc).isoformat(timespec='seconds'),
+        'commit': commit(),
+        'python': platform.python_version(),
+        'cpus': os.cpu_count(),
+    }
+
+    measured = []
+    for rows in args.rows:
+        path, crash_times = dataset(args, rows)
+        actual = sum(1 for _ in open(path, 'rb')) - 1
+        cache_dir = os.path.join(os.path.dirname(path), '.bench-cache')
+        print(f"\n{actual} rows, {os.path.getsize(path) / 1024 ** 2:.0f} MB")
+        print(f"{'Entry point':<22} {'Mode':<7} {'Wall (s)':>9} {'Peak RSS (MB)':>14} {'Rows/s':>12}  Previous")
+        for entry in args.entries:
+            for mode in args.modes:
+                wall, rss = run_entry(args, entry, mode, path, crash_times, cache_dir)
+                row = dict(common, rows=actual, file_mb=round(os.path.getsize(path) / 1024 ** 2, 1), entry=entry,
+                           mode=mode, wall_s=round(wall, 3), peak_rss_mb=round(rss, 1),
+                           rows_per_s=round(actual / wall))
+                measured.append(row)
+
+                before = previous.get((entry, mode, str(actual)))
+                note = ''
+                if before:
+                    change = (wall / float(before['wall_s']) - 1) * 100
+                    note = f"{float(before['wall_s']):.3f} s ({change:+.1f}%)"
+                    if change > REGRESSION_PCT:
+                        note += ' SLOWER'
+                print(f"{entry:<22} {mode:<7} {wall:>9.3f} {rss:>14.1f} {actual / wall:>12.0f}  {note}")
+        shutil.rmtree(cache_dir, ignore_errors=True)
+
+    if args.no_record:
+        return
+    new_file = not os.path.exists(args.results)
+    with open(args.results, 'a', newline='') as f:
+        writer = csv.DictWriter(f, fieldnames=FIELDS)
+        if new_file:
+            writer.writeheader()
+        writer.writerows(measured)
+    print(f"\nResults appended to {args.results}")
+
+
+if __name__ == "__main__":
+    main()
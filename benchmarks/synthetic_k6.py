@@ -0,0 +1,194 @@
+"""Synthetic k6 ``--out csv`` data for benchmarking the analysis scripts.
+
+Writes the rows a ``constant-arrival-rate`` run of ``load_crash_2.js``
+produces: ``http_reqs``, ``http_req_duration``, ``http_req_failed`` and
+``checks`` per request with k6's tag columns, a ``vus`` gauge every second
+and ``dropped_iterations`` rows.  Every crash opens a failover window in
+which requests to the dead replica fail slowly, VUs run out and part of the
+load is dropped; afterwards the replica is out of rotation.  The run length
+follows from ``--rows`` and ``--rate``, and the crash times (epoch seconds)
+are written next to the CSV.
+
+    python3 benchmarks/synthetic_k6.py --rows 10000000 --output bench_data/k6_10M.csv
+"""
+import argparse
+import os
+
+import numpy as np
+
+HEADER = ['metric_name', 'timestamp', 'metric_value', 'check', 'error', 'error_code',
+          'expected_response', 'group', 'method', 'name', 'proto', 'scenario', 'service',
+          'status', 'subproto', 'tls_version', 'url', 'extra_tags', 'metadata']
+REQUEST_METRICS = ['http_reqs', 'http_req_duration', 'http_req_failed', 'checks']
+START_EPOCH = 1_700_000_000
+# Requests generated and formatted at a time.
+CHUNK_REQUESTS = 250_000
+SCENARIO = 'constant_load'
+CHECK_NAME = 'status is 200'
+CONNECTION_ERROR = ('dial tcp: connect: connection refused', '1212')
+
+
+def parse_crash(text):
+    try:
+        offset, port = text.split(':')
+        return float(offset), int(port)
+    except ValueError:
+        raise argparse.ArgumentTypeError(f"expected SECONDS:PORT, got {text!r}")
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description='Generate a synthetic k6 CSV with crash dips')
+    parser.add_argument('--rows', type=int, default=1_000_000, help='Approximate number of metric rows')
+    parser.add_argument('--rate', type=float, default=1000, help='Arrivals per second')
+    parser.add_argument('--ports', type=int, nargs='+', default=[2302, 2308, 2309], help='Replica ports')
+    parser.add_argument('--crash', type=parse_crash, action='append',
+                        help='SECONDS:PORT crash (repeatable; default: the first two ports at 1/3 and 2/3 of the run)')
+    parser.add_argument('--failover', type=float, default=3.0, help='Seconds until a crashed replica leaves the rotation')
+    parser.add_argument('--dip', type=float, default=0.6, help='Fraction of the load dropped during failover')
+    parser.add_argument('--error-pct', type=float, default=0.5, help='Background error rate')
+    parser.add_argument('--latency', type=float, default=5.0, help='Median request duration in ms')
+    parser.add_argument('--vus', type=int, default=100, help='Value of the vus gauge')
+    parser.add_argument('--time-format', choices=['s', 'ms'], default='s',
+                        help="Timestamp unit (k6's default whole seconds, or K6_CSV_TIME_FORMAT=unix_milli)")
+    parser.add_argument('--seed', type=int, default=0, help='Random seed')
+    parser.add_argument('--output', required=True, help='CSV file to write')
+    parser.add_argument('--crash-times', help='Crash times file (default: crash_times.txt next to the CSV)')
+    return parser.parse_args(argv)
+
+
+def run_length(args):
+    # Four rows per request plus the per-second gauge.
+    return max(1, int(np.ceil(args.rows / (len(REQUEST_METRICS) * args.rate + 1))))
+
+
+def default_crashes(args, duration):
+    return [(duration * (i + 1) / 3, port) for i, port in enumerate(args.ports[:2])]
+
+
+def second_plan(args, duration, crashes):
+    """Per second: arrivals sent, arrivals dropped and the ports in rotation or failing."""
+    seconds = np.arange(duration)
+    sent = np.full(duration, args.rate)
+    in_rotation = np.ones((duration, len(args.ports)), dtype=bool)
+    failing = np.zeros((duration, len(args.ports)), dtype=bool)
+    for offset, port in crashes:
+        column = args.ports.index(port)
+        failover = (seconds >= np.floor(offset)) & (seconds < offset + args.failover)
+        failing[failover, column] = True
+        sent[failover] = args.rate * (1 - args.dip)
+        in_rotation[seconds >= offset + args.failover, column] = False
+    sent = np.floor(sent).astype(np.int64)
+    dropped = np.floor(args.rate).astype(np.int64) - sent
+    return sent, dropped, in_rotation, failing
+
+
+def request_frame(args, rng, first, sent, in_rotation, failing):
+    second = np.repeat(np.arange(first, first + len(sent)), sent)
+    local = second - first
+    start = second + rng.random(len(second))
+
+    # Each request picks a replica among those still in rotation.
+    weights = in_rotation[local].astype(np.float64)
+    cumulative = np.cumsum(weights, axis=1)
+    pick = (rng.random(len(second)) * cumulative[:, -1])[:, None] < cumulative
+    replica = pick.argmax(axis=1)
+
+    down = failing[local, replica]
+    failed = down | (rng.random(len(second)) < args.error_pct / 100)
+    duration = rng.lognormal(np.log(args.latency), 0.5, len(second))
+    # Requests to a dead replica hang until the connection is refused.
+    duration[down] = rng.uniform(500, 3000, down.sum())
+
+    done = start + duration / 1000
+    order = np.argsort(done, kind='stable')
+    return done[order], duration[order], replica[order], failed[order]
+
+
+def tag_suffix(check='', error='', error_code='', expected='', method='', url='', proto='', scenario='',
+               status=''):
+    # Everything after metric_value, in HEADER order.
+    return ',' + ','.join([check, error, error_code, expected, '', method, url, proto, scenario, '',
+                           status, '', '', url, '', ''])
+
+
+def request_suffixes(urls):
+    """Suffix per ``(replica, failed)`` for the http_* rows, then the one of ``checks`` rows."""
+    suffixes = []
+    for url in urls:
+        suffixes.append(tag_suffix(expected='true', method='GET', url=url, proto='HTTP/1.1',
+                                   scenario=SCENARIO, status='200'))
+        suffixes.append(tag_suffix(error=CONNECTION_ERROR[0], error_code=CONNECTION_ERROR[1], expected='false',
+                                   method='GET', url=url, scenario=SCENARIO, status='0'))
+    return suffixes + [tag_suffix(check=CHECK_NAME, scenario=SCENARIO)]
+
+
+def format_values(values):
+    # '%.6f' for non-negative values, built from integers: much faster than np.char.mod.
+    micros = np.rint(values * 1e6).astype(np.int64)
+    whole = (micros // 1_000_000).astype('U')
+    fraction = (micros % 1_000_000 + 1_000_000).astype('U7')
+    fraction = fraction.view('U1').reshape(-1, 7)[:, 1:].copy().view('U6').ravel()
+    return np.char.add(np.char.add(whole, '.'), fraction)
+
+
+def chunk_lines(args, done, duration, replica, failed, suffixes, vus_seconds, dropped):
+    scale = 1000 if args.time_format == 'ms' else 1
+    per_request = len(REQUEST_METRICS)
+    stamps = np.floor(done * scale).astype(np.int64) + START_EPOCH * scale
+
+    metric = np.tile(np.arange(per_request), len(done))
+    values = np.stack([np.ones(len(done)), duration, failed, ~failed], axis=1).astype(np.float64).ravel()
+    tags = np.repeat(replica * 2 + failed, per_request)
+    tags[metric == 3] = len(suffixes) - 1
+    names = np.array([name + ',' for name in REQUEST_METRICS])[metric]
+    timestamps = np.repeat(stamps, per_request)
+
+    gauge = tag_suffix()
+    names = np.concatenate((names, np.full(len(vus_seconds), 'vus,'), np.full(dropped.sum(), 'dropped_iterations,')))
+    timestamps = np.concatenate((timestamps, vus_seconds * scale, np.repeat(vus_seconds, dropped) * scale))
+    values = np.concatenate((values, np.full(len(vus_seconds), float(args.vus)), np.ones(dropped.sum())))
+    suffixes = np.array(suffixes + [gauge, tag_suffix(scenario=SCENARIO)])
+    tags = np.concatenate((tags, np.full(len(vus_seconds), len(suffixes) - 2), np.full(dropped.sum(), len(suffixes) - 1)))
+
+    lines = np.char.add(np.char.add(names, timestamps.astype('U')), ',')
+    lines = np.char.add(np.char.add(lines, format_values(values)), suffixes[tags])
+    return lines
+
+
+def generate(args):
+    duration = run_length(args)
+    crashes = sorted(args.crash) if args.crash else default_crashes(args, duration)
+    sent, dropped, in_rotation, failing = second_plan(args, duration, crashes)
+    suffixes = request_suffixes([f"http://localhost:{port}/api/books" for port in args.ports])
+    rng = np.random.default_rng(args.seed)
+
+    rows = 0
+    with open(args.output, 'w', newline='') as f:
+        f.write(','.join(HEADER) + '\n')
+        step = max(1, int(CHUNK_REQUESTS // args.rate))
+        for first in range(0, duration, step):
+            last = min(first + step, duration)
+            done, request_ms, replica, failed = request_frame(args, rng, first, sent[first:last],
+                                                              in_rotation[first:last], failing[first:last])
+            lines = chunk_lines(args, done, request_ms, replica, failed, suffixes,
+                                np.arange(first, last) + START_EPOCH, dropped[first:last])
+            f.write('\n'.join(lines.tolist()))
+            f.write('\n')
+            rows += len(lines)
+
+    crash_times = args.crash_times or os.path.join(os.path.dirname(os.path.abspath(args.output)), 'crash_times.txt')
+    with open(crash_times, 'w') as f:
+        for offset, port in crashes:
+            f.write(f"{START_EPOCH + offset:.3f}\n")
+    return rows, duration, crashes, crash_times
+
+
+def main(argv=None):
+    args = parse_args(argv)
+    rows, duration, crashes, crash_times = generate(args)
+    print(f"Wrote {rows} rows ({duration} s at {args.rate:g} req/s) to {args.output}")
+    print(f"Crashes: {', '.join(f'{offset:g}s on {port}' for offset, port in crashes)} -> {crash_times}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,134 @@
+import argparse
+import sys
+from contextlib import redirect_stdout
+
+import numpy as np
+
+from k6analysis import aggregate, format_percentiles, load_crash_times
+from k6analysis.capacity import phase_names
+from k6analysis.latency import PERCENTILES, percentile_label
+from k6analysis.omission import OmissionAggregator
+from k6analysis.stats import percentile_dict, write_json
+
+def parse_args():
+    parser = argparse.ArgumentParser(description='Intended vs. achieved arrival rate and latency corrected for coordinated omission')
+    parser.add_argument('--k6-output', required=True, help='Path to K6 output CSV file')
+    parser.add_argument('--crash-times', required=True, help='Path to crash times file')
+    parser.add_argument('--output', help='Output image file path')
+    parser.add_argument('--rate', type=float, help='Configured arrival rate (req/s), drawn as a reference line')
+    parser.add_argument('--vus', type=float, help='VU count (maxVUs, or --max-concurrency of the native load generator) for outputs without vus rows')
+    parser.add_argument('--percentile', type=float, default=99, help='Latency percentile to plot, measured vs. corrected')
+    parser.add_argument('--bucket', type=float, default=1.0, help='Time bucket width in seconds (0.01 to 10)')
+    parser.add_argument('--no-cache', action='store_true', help='Always parse the CSV instead of using the columnar cache')
+    parser.add_argument('--jobs', type=int, default=1, help='Processes parsing an uncached CSV in parallel (0 for one per CPU)')
+    parser.add_argument('--stats-only', action='store_true', help='Skip the plot (matplotlib is never imported) and print the statistics as JSON')
+    parser.add_argument('--json', help="Write the statistics as JSON to this path ('-' for stdout)")
+    parser.add_argument('--dpi', type=int, default=300, help='Resolution of the saved image')
+    parser.add_argument('--max-points', type=int, default=2000, help='Downsample plotted series to about this many points (0 keeps all)')
+    args = parser.parse_args()
+    if not args.stats_only and not args.output:
+        parser.error('--output is required unless --stats-only is given')
+    if args.stats_only and not args.json:
+        args.json = '-'
+    return args
+
+def plot(args, omission, crash_times):
+    from k6analysis.plots import downsample, plot_crash_markers, plt, save_figure
+
+    seconds = omission.seconds
+    arrivals = omission.arrivals
+    label = percentile_label(args.percentile)
+
+    plt.figure(figsize=(12, 10))
+    plt.subplot(2, 1, 1)
+    plt.plot(*downsample(seconds, arrivals['intended'].values, args.max_points), 'k--', linewidth=1.5, label='Intended')
+    plt.plot(*downsample(seconds, arrivals['achieved'].values, args.max_points), 'b-', linewidth=2, label='Achieved')
+    plt.fill_between(*downsample(seconds, arrivals['dropped'].values, args.max_points), color='r', alpha=0.3, label='Dropped iterations')
+    if args.rate:
+        plt.axhline(y=args.rate, color='0.5', linestyle=':', label=f'Configured rate ({args.rate:g} req/s)')
+    plt.ylabel('Arrivals (req/s)')
+    plt.title('Intended vs. Achieved Arrival Rate')
+    plt.grid(True, linestyle='--', alpha=0.7)
+    plt.legend(loc='lower left')
+    plot_crash_markers(crash_times)
+
+    plt.subplot(2, 1, 2, sharex=plt.gca())
+    for metric, style, name in (('measured', 'b-', 'Measured'), ('corrected', 'r-', 'Corrected for coordinated omission')):
+        table = omission.latency.percentiles(metric, [args.percentile])
+        plt.plot(*downsample(seconds, table[label].values, args.max_points), style, linewidth=1.5, label=f'{name} {label}')
+    plt.yscale('log')
+    plt.ylabel('http_req_duration (ms)')
+    plt.xlabel('Time since test start (s)')
+    plt.grid(True, which='both', linestyle='--', alpha=0.5)
+    plt.legend(loc='upper left')
+    plot_crash_markers(crash_times)
+
+    save_figure(args.output, args.dpi)
+    print(f"Graph saved to {args.output}")
+
+def analyze(args):
+    print(f"Reading K6 metrics from {args.k6_output}")
+    omission = aggregate(args.k6_output, [OmissionAggregator(width=args.bucket, vus=args.vus)], use_cache=not args.no_cache, jobs=args.jobs)[0]
+    if not omission.correctable:
+        sys.exit(f"Error : {args.k6_output} has no vus rows, so the expected interval between requests is unknown "
+                 f"and latency cannot be corrected for coordinated omission; give the run's VU count with --vus")
+    crash_times = sorted(load_crash_times(args.crash_times, default=[], origin=omission.origin))
+    names = phase_names(len(crash_times) + 1)
+
+    if not args.stats_only:
+        plot(args, omission, crash_times)
+
+    totals = omission.totals()
+    phases = omission.phase_arrivals(crash_times, names)
+    measured = omission.latency.phase_percentiles(crash_times, 'measured')
+    corrected = omission.latency.phase_percentiles(crash_times, 'corrected')
+    for phase, before, after in zip(phases, measured, corrected):
+        phase['measured'] = percentile_dict(before)
+        phase['corrected'] = percentile_dict(after)
+    stats = {
+        'source': args.k6_output,
+        'bucket': args.bucket,
+        'crash_times': crash_times,
+        'configured_rate': args.rate,
+        'arrivals': totals,
+        'latency': {
+            'measured': percentile_dict(omission.latency.overall('measured')),
+            'corrected': percentile_dict(omission.latency.overall('corrected')),
+        },
+        'phases': phases,
+    }
+
+    print("\nArrivals:")
+    print(f"Intended: {totals['intended']:.0f}, achieved: {totals['achieved']:.0f}, "
+          f"dropped: {totals['dropped']:.0f} ({totals['dropped_pct']:.2f}%)")
+    if args.rate:
+        print(f"Configured rate: {args.rate:g} req/s, intended on average: "
+              f"{np.mean(omission.arrivals['intended'].values):.2f} req/s")
+    for phase in phases:
+        if phase['buckets']:
+            print(f"{phase['phase']}: intended={phase['intended']:.2f} req/s, achieved={phase['achieved']:.2f} req/s, "
+                  f"dropped={phase['dropped']:.2f}/s ({phase['dropped_pct']:.2f}%)")
+
+    print("\nLatency (http_req_duration):")
+    print(f"Measured: {format_percentiles(omission.latency.overall('measured'))}")
+    print(f"Corrected: {format_percentiles(omission.latency.overall('corrected'))}")
+    for phase, before, after in zip(phases, measured, corrected):
+        if phase['buckets']:
+            print(f"{phase['phase']}:")
+            print(f"  Measured: {format_percentiles(before, PERCENTILES)}")
+            print(f"  Corrected: {format_percentiles(after, PERCENTILES)}")
+
+    return stats
+
+def main():
+    args = parse_args()
+
+    # With JSON on stdout the human-readable report goes to stderr.
+    with redirect_stdout(sys.stderr if args.json == '-' else sys.stdout):
+        stats = analyze(args)
+
+    if args.json:
+        write_json(stats, args.json)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,90 @@
+"""Client-side replica selection for the native load generator.
+
+``scheduled`` is what the k6 scripts do: a uniform pick among the replicas
+the crash schedule says are up, which only works because the client is
+told the crash times in advance.  The other policies know nothing about the
+schedule and find out about a crash the way a real client would:
+
+* ``random``: a uniform pick.
+* ``round-robin``: the replicas in turn.
+* ``least-outstanding``: the replica with the fewest requests in flight.
+* ``p2c``: the less loaded of two replicas picked at random (power of two
+  choices).
+
+With passive ejection, a replica whose requests fail to connect or time out
+``eject_after`` times in a row leaves the rotation.  The load generator then
+probes it in the background and puts it back once a probe succeeds.  When
+every candidate is ejected, all of them are used rather than none.
+"""
+import random
+
+POLICIES = ['scheduled', 'random', 'round-robin', 'least-outstanding', 'p2c']
+
+
+def available_ports(ports, schedule, elapsed):
+    down = set()
+    for offset, action, port in schedule:
+        if offset > elapsed:
+            break
+        if action == 'kill':
+            down.add(port)
+        else:
+            down.discard(port)
+    return [port for port in ports if port not in down] or ports
+
+
+class Balancer:
+    def __init__(self, ports, policy='scheduled', schedule=(), eject_after=0, rng=None):
+        if policy not in POLICIES:
+            raise ValueError(f"unknown balancing policy {policy!r}")
+        self.ports = list(ports)
+        self.policy = policy
+        self.schedule = list(schedule)
+        self.eject_after = eject_after
+        self.rng = rng or random.Random()
+        self.outstanding = {port: 0 for port in self.ports}
+        self.failures = {port: 0 for port in self.ports}
+        self.ejected = set()
+        # (elapsed seconds, 'eject' or 'reinstate', port)
+        self.events = []
+        self._turn = 0
+
+    def candidates(self, elapsed):
+        if self.policy == 'scheduled':
+            ports = available_ports(self.ports, self.schedule, elapsed)
+        else:
+            ports = self.ports
+        return [port for port in ports if port not in self.ejected] or ports
+
+    def choose(self, elapsed):
+        ports = self.candidates(elapsed)
+        if self.policy == 'round-robin':
+            port = ports[self._turn % len(ports)]
+            self._turn += 1
+        elif self.policy == 'least-outstanding':
+            fewest = min(self.outstanding[port] for port in ports)
+            port = self.rng.choice([port for port in ports if self.outstanding[port] == fewest])
+        elif self.policy == 'p2c' and len(ports) > 1:
+            first, second = self.rng.sample(ports, 2)
+            port = first if self.outstanding[first] <= self.outstanding[second] else second
+        else:
+            port = self.rng.choice(ports)
+        self.outstanding[port] += 1
+        return port
+
+    def finished(self, port, response, elapsed):
+        self.outstanding[port] -= 1
+        if response.status != 0:
+            self.failures[port] = 0
+            return
+        # Status 0: no response at all (refused, reset or timed out).
+        self.failures[port] += 1
+        if self.eject_after and self.failures[port] >= self.eject_after and port not in self.ejected:
+            self.ejected.add(port)
+            self.events.append((elapsed, 'eject', port))
+
+    def reinstate(self, port, elapsed):
+        if port in self.ejected:
+            self.ejected.discard(port)
+            self.failures[port] = 0
+            self.events.append((elapsed, 'reinstate', port))
@@ -0,0 +1,129 @@
+"""Minimal keep-alive HTTP/1.1 GET client on top of asyncio streams.
+
+Only what the load tools need: one request at a time per connection,
+Content-Length or chunked bodies, and per-port pools of idle connections so
+steady-state requests never pay for a new TCP handshake.
+"""
+import asyncio
+import time
+
+
+class Response:
+    def __init__(self, status, waiting, duration, error=None):
+        self.status = status
+        self.waiting = waiting
+        self.duration = duration
+        self.error = error
+
+    @property
+    def ok(self):
+        return self.status == 200
+
+
+def build_request(host, port, path, headers):
+    lines = [f"GET {path} HTTP/1.1", f"Host: {host}:{port}", "Connection: keep-alive"]
+    lines += [f"{name}: {value}" for name, value in headers.items()]
+    return ("\r\n".join(lines) + "\r\n\r\n").encode('ascii')
+
+
+async def read_response(reader):
+    status_line = await reader.readline()
+    if not status_line:
+        raise ConnectionResetError("connection closed before response")
+    first_byte = time.perf_counter()
+    version, status = status_line.split(b' ', 2)[:2]
+
+    headers = {}
+    while True:
+        line = await reader.readline()
+        if line in (b'\r\n', b'\n', b''):
+            break
+        name, _, value = line.partition(b':')
+        headers[name.strip().lower()] = value.strip().lower()
+
+    keep_alive = version == b'HTTP/1.1' and headers.get(b'connection') != b'close'
+    if b'chunked' in headers.get(b'transfer-encoding', b''):
+        while True:
+            size = int((await reader.readline()).split(b';')[0], 16)
+            if size == 0:
+                while (await reader.readline()) not in (b'\r\n', b'\n', b''):
+                    pass
+                break
+            await reader.readexactly(size + 2)
+    elif b'content-length' in headers:
+        await reader.readexactly(int(headers[b'content-length']))
+    else:
+        await reader.read()
+        keep_alive = False
+    return int(status), first_byte, keep_alive
+
+
+class Connection:
+    def __init__(self, reader, writer):
+        self.reader = reader
+        self.writer = writer
+
+    def close(self):
+        self.writer.close()
+
+
+class ConnectionPool:
+    def __init__(self, host, port, connect_timeout=5.0):
+        self.host = host
+        self.port = port
+        self.connect_timeout = connect_timeout
+        self.idle = []
+        self.opened = 0
+
+    async def connect(self):
+        reader, writer = await asyncio.wait_for(
+            asyncio.open_connection(self.host, self.port), self.connect_timeout)
+        self.opened += 1
+        return Connection(reader, writer)
+
+    async def prefill(self, count):
+        for _ in range(count):
+            try:
+                self.idle.append(await self.connect())
+            except (OSError, asyncio.TimeoutError):
+                break
+
+    async def acquire(self):
+        while self.idle:
+            conn = self.idle.pop()
+            if not conn.reader.at_eof():
+                return conn
+            conn.close()
+        return await self.connect()
+
+    def release(self, conn, reusable):
+        if reusable:
+            self.idle.append(conn)
+        else:
+            conn.close()
+
+    def discard_idle(self):
+        for conn in self.idle:
+            conn.close()
+        self.idle = []
+
+    def close(self):
+        self.discard_idle()
+
+
+async def get(pool, request, timeout):
+    start = time.perf_counter()
+    conn = None
+    try:
+        conn = await pool.acquire()
+        conn.writer.write(request)
+        await conn.writer.drain()
+        status, first_byte, keep_alive = await asyncio.wait_for(read_response(conn.reader), timeout)
+    except (OSError, asyncio.TimeoutError, asyncio.IncompleteReadError, ValueError) as e:
+        if conn is not None:
+            conn.close()
+        elapsed = (time.perf_counter() - start) * 1000
+        return Response(0, elapsed, elapsed, error=type(e).__name__)
+    end = time.perf_counter()
+    pool.release(conn, keep_alive)
+    return Response(status, (first_byte - start) * 1000, (end - start) * 1000)
@@ -0,0 +1,8 @@
+"""Replica defaults shared by the harness tools.
+
+Kept free of third-party imports so the replica, sampler and warmup tools
+start without loading numpy, pandas or ``k6analysis``.
+"""
+
+DEFAULT_PORTS = [2302, 2308, 2309]
+DEFAULT_HEADERS = {'XDN': 'bookcatalog'}
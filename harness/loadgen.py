@@ -0,0 +1,247 @@
+"""Native open-model load generator.
+
+Runs the same constant-arrival-rate scenario as the k6 scripts (rate,
+duration, pre-allocated and maximum concurrency) against the replica ports
+with the ``XDN: bookcatalog`` header, over keep-alive connection pools.
+Every request is written as k6-style metric rows straight into a column
+store, so the visualizers can read the run with ``--k6-output`` pointing at
+the store directory and no CSV is ever produced.  ``--trace`` also (or
+instead) writes one 16-byte record per request (see ``k6analysis/trace.py``).
+``--balance`` picks how requests are spread over the replicas and
+``--eject-after`` turns on passive ejection (see ``balancer.py``).
+Like k6, it writes a ``vus`` gauge every flush: the concurrency it has
+needed so far, at least ``--pre-allocated``, which ``coordinated_omission.py``
+uses for the expected interval between a slot's requests.
+
+    python3 -m harness.loadgen --rate 500 --duration 60 --output Crash2_test_5/requests.cols
+    python3 -m harness.loadgen --rate 5000 --duration 600 --trace soak_1/requests.k6trace
+    python3 -m harness.loadgen --balance p2c --eject-after 3 --output Crash2_test_6/k6_metrics.cols
+"""
+import argparse
+import asyncio
+import os
+import sys
+import time
+
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+from harness import client
+from harness.balancer import POLICIES, Balancer
+from harness.config import DEFAULT_HEADERS, DEFAULT_PORTS
+from harness.orchestrator import parse_event
+from k6analysis.columns import ColumnWriter
+from k6analysis.trace import TraceWriter
+
+FLUSH_INTERVAL = 1.0
+# Overdue iterations between yields to the event loop.
+OVERDUE_YIELD = 32
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description='Constant-arrival-rate load generator')
+    parser.add_argument('--host', default='localhost', help='Replica host')
+    parser.add_argument('--ports', type=int, nargs='+', default=DEFAULT_PORTS, help='Replica ports')
+    parser.add_argument('--path', default='/api/books', help='Request path')
+    parser.add_argument('--rate', type=float, default=500, help='Arrivals per second')
+    parser.add_argument('--duration', type=float, default=60, help='Test duration in seconds')
+    parser.add_argument('--pre-allocated', type=int, default=100, help='Connections opened before the test (preAllocatedVUs)')
+    parser.add_argument('--max-concurrency', type=int, default=200, help='Maximum in-flight requests (maxVUs)')
+    parser.add_argument('--timeout', type=float, default=60, help='Per-request timeout in seconds')
+    parser.add_argument('--balance', choices=POLICIES, default='scheduled',
+                        help="Replica selection; 'scheduled' avoids replicas the crash schedule has killed")
+    parser.add_argument('--eject-after', type=int, default=0,
+                        help='Eject a replica after this many connection errors in a row (0 disables)')
+    parser.add_argument('--probe-interval', type=float, default=1.0, help='Seconds between probes of ejected replicas')
+    parser.add_argument('--output', help='Column store directory to write')
+    parser.add_argument('--trace', help='Per-request trace file to write')
+    args = parser.parse_args(argv)
+    if not args.output and not args.trace:
+        parser.error('at least one of --output and --trace is required')
+    return args
+
+
+class RecordBuffer:
+    def __init__(self, writer, trace=None):
+        self.writer = writer
+        self.trace = trace
+        self.clear()
+
+    def clear(self):
+        self.requests = []
+        self.timestamps = []
+        self.metrics = []
+        self.values = []
+        self.urls = []
+        self.statuses = []
+
+    def add(self, timestamp, metric, value, url=None, status=None):
+        if self.writer is None:
+            return
+        self.timestamps.append(timestamp)
+        self.metrics.append(metric)
+        self.values.append(value)
+        self.urls.append(url)
+        self.statuses.append(status)
+
+    def add_response(self, timestamp, url, response):
+        if self.trace is not None:
+            self.requests.append((timestamp, self.trace.replica(url), response.status, response.duration))
+        if self.writer is None:
+            return
+        status = str(response.status)
+        failed = 0.0 if response.ok else 1.0
+        self.add(timestamp, 'http_reqs', 1.0, url, status)
+        self.add(timestamp, 'http_req_duration', response.duration, url, status)
+        self.add(timestamp, 'http_req_waiting', response.waiting, url, status)
+        self.add(timestamp, 'http_req_failed', failed, url, status)
+        self.add(timestamp, 'checks', 1.0 - failed)
+
+    def flush(self):
+        if self.requests:
+            timestamps, replicas, statuses, durations = zip(*self.requests)
+            self.trace.append(np.rint(np.array(timestamps) * 1e9).astype(np.int64), replicas, statuses,
+                              np.array(durations) * 1000)
+            self.trace.flush()
+        if not self.timestamps:
+            self.clear()
+            return
+        self.writer.append(pd.DataFrame({
+            'metric_name': pd.Categorical(self.metrics),
+            'timestamp': np.array(self.timestamps, dtype=np.float64),
+            'metric_value': np.array(self.values, dtype=np.float32),
+            'url': pd.Categorical(self.urls),
+            'status': pd.Categorical(self.statuses),
+        }))
+        self.clear()
+
+
+def crash_schedule(text):
+    # The "seconds:action:port,..." schedule harness/orchestrator.py exports
+    # as CRASH_SCHEDULE, which the k6 scripts use to avoid killed replicas.
+    return sorted(parse_event(entry) for entry in text.split(',') if entry)
+
+
+class LoadGenerator:
+    def __init__(self, args, buffer):
+        self.args = args
+        self.buffer = buffer
+        self.pools = {port: client.ConnectionPool(args.host, port) for port in args.ports}
+        self.urls = {port: f"http://{args.host}:{port}{args.path}" for port in args.ports}
+        self.requests = {port: client.build_request(args.host, port, args.path, DEFAULT_HEADERS)
+                         for port in args.ports}
+        self.balancer = Balancer(args.ports, args.balance, crash_schedule(os.environ.get('CRASH_SCHEDULE', '')),
+                                 args.eject_after)
+        self.in_flight = set()
+        # Slots in use, the counterpart of k6's initialized VUs: they grow
+        # from the pre-allocated count as concurrency requires.
+        self.vus = min(args.pre_allocated, args.max_concurrency)
+        self.sent = 0
+        self.failed = 0
+        self.dropped = 0
+
+    def now(self):
+        # Epoch seconds derived from the monotonic clock, comparable with k6 timestamps.
+        return self.wall_start + (time.perf_counter() - self.perf_start)
+
+    def elapsed(self):
+        return time.perf_counter() - self.perf_start
+
+    async def request(self, port):
+        response = await client.get(self.pools[port], self.requests[port], self.args.timeout)
+        self.balancer.finished(port, response, self.elapsed())
+        if not response.ok:
+            self.failed += 1
+        self.buffer.add_response(self.now(), self.urls[port], response)
+
+    async def probe(self, port):
+        # Probes go through the same pool but are not recorded as requests.
+        response = await client.get(self.pools[port], self.requests[port], self.args.probe_interval)
+        if response.ok:
+            self.balancer.reinstate(port, self.elapsed())
+
+    async def prober(self):
+        while True:
+            await asyncio.sleep(self.args.probe_interval)
+            await asyncio.gather(*(self.probe(port) for port in sorted(self.balancer.ejected)))
+
+    async def flusher(self):
+        while True:
+            await asyncio.sleep(FLUSH_INTERVAL)
+            self.buffer.add(self.now(), 'vus', float(self.vus))
+            self.buffer.flush()
+
+    async def run(self):
+        per_port = max(1, self.args.pre_allocated // len(self.args.ports))
+        await asyncio.gather(*(pool.prefill(per_port) for pool in self.pools.values()))
+
+        self.wall_start = time.time()
+        self.perf_start = time.perf_counter()
+        if os.environ.get('CRASH_SCHEDULE_START'):
+            # Offsets count from the orchestrator's start, before ours.
+            lag = self.wall_start - float(os.environ['CRASH_SCHEDULE_START'])
+            self.balancer.schedule = [(offset - lag, action, port) for offset, action, port in self.balancer.schedule]
+        flusher = asyncio.create_task(self.flusher())
+        prober = asyncio.create_task(self.prober())
+        total = int(self.args.rate * self.args.duration)
+        for i in range(total):
+            delay = i / self.args.rate - (time.perf_counter() - self.perf_start)
+            if delay > 0:
+                await asyncio.sleep(delay)
+            elif i % OVERDUE_YIELD == 0:
+                # Behind schedule: still let responses complete now and then,
+                # or a full pool would drop every overdue iteration.
+                await asyncio.sleep(0)
+            if len(self.in_flight) >= self.args.max_concurrency:
+                self.dropped += 1
+                self.buffer.add(self.now(), 'dropped_iterations', 1.0)
+                continue
+            task = asyncio.create_task(self.request(self.balancer.choose(self.elapsed())))
+            self.in_flight.add(task)
+            task.add_done_callback(self.in_flight.discard)
+            self.vus = max(self.vus, len(self.in_flight))
+            self.sent += 1
+
+        if self.in_flight:
+            await asyncio.wait(self.in_flight)
+        flusher.cancel()
+        prober.cancel()
+        self.buffer.add(self.now(), 'vus', float(self.vus))
+        self.buffer.flush()
+        for pool in self.pools.values():
+            pool.close()
+        return time.perf_counter() - self.perf_start
+
+
+def main(argv=None):
+    args = parse_args(argv)
+    settings = dict(rate=args.rate, duration=args.duration, pre_allocated=args.pre_allocated,
+                    max_concurrency=args.max_concurrency, ports=args.ports, balance=args.balance,
+                    eject_after=args.eject_after)
+    writer = ColumnWriter(args.output) if args.output else None
+    trace = TraceWriter(args.trace, source='harness.loadgen', **settings) if args.trace else None
+    generator = LoadGenerator(args, RecordBuffer(writer, trace))
+    try:
+        elapsed = asyncio.run(generator.run())
+    except BaseException:
+        if writer is not None:
+            writer.close(source='harness.loadgen', complete=False)
+        raise
+    finally:
+        if trace is not None:
+            trace.close()
+    # Ejections as epoch seconds, on the same clock as the crash times.
+    ejections = [[generator.wall_start + elapsed, action, port] for elapsed, action, port in generator.balancer.events]
+    if writer is not None:
+        writer.close(source='harness.loadgen', ejections=ejections, **settings)
+
+    print(f"Sent {generator.sent} requests in {elapsed:.2f} s ({generator.sent / elapsed:.2f} req/s)")
+    print(f"Failed: {generator.failed}, dropped iterations: {generator.dropped}")
+    for elapsed, action, port in generator.balancer.events:
+        print(f"{elapsed:8.3f} s: {'ejected' if action == 'eject' else 'reinstated'} replica {port}")
+    print(f"Results written to {', '.join(path for path in (args.output, args.trace) if path)}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,196 @@
+"""Crash orchestrator with a millisecond-precision shared clock.
+
+Launches the load command, then fires an arbitrary schedule of replica kills
+and restarts on the monotonic clock.  Each action is stamped with the actual
+epoch time at which it happened (the same epoch as k6's ``timestamp``
+column), and those timestamps are written to ``crash_times.txt`` so the
+visualizers place crash markers exactly instead of at the planned second.
+
+    python3 harness/orchestrator.py --event 20:kill:2302 --event 40:kill:2308 \\
+        --crash-times Crash2_test_5/crash_times.txt -- k6 run load_crash_2.js
+
+The schedule is also exported to the load command as ``CRASH_SCHEDULE``
+(empty when there are no events), with the epoch its offsets count from as
+``CRASH_SCHEDULE_START``, so the load generator times it on this clock
+rather than from its own, later start.
+"""
+import argparse
+import csv
+import os
+import signal
+import subprocess
+import sys
+import time
+
+ACTIONS = ('kill', 'restart')
+SPIN_SECONDS = 0.002
+
+
+def parse_event(text):
+    try:
+        offset, action, port = text.split(':')
+        event = (float(offset), action, int(port))
+    except ValueError:
+        raise argparse.ArgumentTypeError(f"expected SECONDS:ACTION:PORT, got {text!r}")
+    if event[1] not in ACTIONS:
+        raise argparse.ArgumentTypeError(f"action must be one of {', '.join(ACTIONS)}")
+    return event
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description='Run a load command and inject crashes on schedule')
+    parser.add_argument('--event', type=parse_event, action='append', default=[],
+                        help='SECONDS:ACTION:PORT, e.g. 20:kill:2302 or 50:restart:2302 (repeatable)')
+    parser.add_argument('--signal', default='SIGKILL', help='Signal used to kill a replica')
+    parser.add_argument('--restart-command', help='Shell command used to restart a replica; {port} is substituted')
+    parser.add_argument('--crash-times', required=True, help='Where to write the actual kill timestamps')
+    parser.add_argument('--events-log', help='CSV log of every planned and actual action')
+    parser.add_argument('command', nargs=argparse.REMAINDER, help='Load command to run (after --)')
+    args = parser.parse_args(argv)
+    if args.command and args.command[0] == '--':
+        args.command = args.command[1:]
+    return args
+
+
+def socket_inodes(port):
+    inodes = set()
+    for table in ('/proc/net/tcp', '/proc/net/tcp6'):
+        try:
+            with open(table) as f:
+                next(f)
+                for line in f:
+                    fields = line.split()
+                    # state 0A is LISTEN
+                    if fields[3] == '0A' and int(fields[1].rsplit(':', 1)[1], 16) == port:
+                        inodes.add(fields[9])
+        except OSError:
+            continue
+    return inodes
+
+
+def listening_pids(port):
+    targets = {f"socket:[{inode}]" for inode in socket_inodes(port)}
+    pids = set()
+    if not targets:
+        return pids
+    for pid in os.listdir('/proc'):
+        if not pid.isdigit():
+            continue
+        fd_dir = f"/proc/{pid}/fd"
+        try:
+            for fd in os.listdir(fd_dir):
+                if os.readlink(os.path.join(fd_dir, fd)) in targets:
+                    pids.add(int(pid))
+                    break
+        except OSError:
+            continue
+    return pids
+
+
+class Clock:
+    def __init__(self):
+        self.wall_start = time.time()
+        self.perf_start = time.perf_counter()
+
+    def elapsed(self):
+        return time.perf_counter() - self.perf_start
+
+    def epoch(self):
+        return self.wall_start + self.elapsed()
+
+    def sleep_until(self, offset):
+        remaining = offset - self.elapsed()
+        if remaining > SPIN_SECONDS:
+            time.sleep(remaining - SPIN_SECONDS)
+        while self.elapsed() < offset:
+            pass
+
+
+def kill_replica(port, sig):
+    pids = listening_pids(port) - {os.getpid()}
+    stamp = time.time()
+    for pid in pids:
+        try:
+            os.kill(pid, sig)
+        except ProcessLookupError:
+            pass
+    if pids:
+        return stamp, sorted(pids), 'ok'
+    # Fall back to fuser when /proc is not readable for the replica's owner.
+    result = subprocess.run(['fuser', '-k', f'-{signal.Signals(sig).name[3:]}', f'{port}/tcp'],
+                            stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+    return stamp, [], 'ok' if result.returncode == 0 else 'no process'
+
+
+def restart_replica(port, command):
+    stamp = time.time()
+    if not command:
+        return stamp, [], 'no restart command'
+    process = subprocess.Popen(command.format(port=port), shell=True, start_new_session=True)
+    return stamp, [process.pid], 'started'
+
+
+def schedule_env(events):
+    return ','.join(f"{offset:g}:{action}:{port}" for offset, action, port in events)
+
+
+def main(argv=None):
+    args = parse_args(argv)
+    events = sorted(args.event)
+    sig = getattr(signal, args.signal)
+
+    clock = Clock()
+    env = dict(os.environ, CRASH_SCHEDULE=schedule_env(events), CRASH_SCHEDULE_START=f"{clock.wall_start:.3f}")
+    load = subprocess.Popen(args.command, env=env) if args.command else None
+    print(f"Load started at {clock.wall_start:.3f}, {len(events)} scheduled actions")
+    if load is not None:
+        # A live monitor aborts the run by terminating the orchestrator.
+        signal.signal(signal.SIGTERM, lambda signum, frame: load.terminate())
+
+    # Kill timestamps are written as they happen so a live monitor can mark them.
+    crash_times = open(args.crash_times, 'w')
+    log = []
+    for offset, action, port in events:
+        if load is not None:
+            try:
+                load.wait(timeout=max(0.0, offset - clock.elapsed() - SPIN_SECONDS))
+            except subprocess.TimeoutExpired:
+                pass
+        if load is not None and load.poll() is not None:
+            print("Load command exited before the schedule finished")
+            break
+        clock.sleep_until(offset)
+        if action == 'kill':
+            stamp, pids, status = kill_replica(port, sig)
+        else:
+            stamp, pids, status = restart_replica(port, args.restart_command)
+        actual = stamp - clock.wall_start
+        print(f"{time.strftime('%H:%M:%S')} {action} port {port}: planned {offset:.3f}s, "
+              f"actual {actual:.3f}s ({status})")
+        log.append({
+            'action': action,
+            'port': port,
+            'planned_offset': f"{offset:.3f}",
+            'actual_offset': f"{actual:.3f}",
+            'epoch': f"{stamp:.3f}",
+            'pids': ' '.join(str(pid) for pid in pids),
+            'status': status,
+        })
+        if action == 'kill':
+            crash_times.write(f"{stamp:.3f}\n")
+            crash_times.flush()
+    crash_times.close()
+
+    if args.events_log:
+        with open(args.events_log, 'w', newline='') as f:
+            writer = csv.DictWriter(f, fieldnames=['action', 'port', 'planned_offset', 'actual_offset',
+                                                   'epoch', 'pids', 'status'])
+            writer.writeheader()
+            writer.writerows(log)
+
+    if load is not None:
+        sys.exit(load.wait())
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,318 @@
+"""Stand-in replica servers for running the harness without XDN.
+
+Serves ``GET /api/books`` on each port to requests carrying the
+``XDN: bookcatalog`` header, like the real replicas, so the run scripts,
+load generators, orchestrator and visualizers work end to end on a laptop
+or in CI.  Every replica runs ``--workers`` processes sharing the port
+through ``SO_REUSEPORT``; the orchestrator's kill finds and kills them all,
+exactly as with a real replica.
+
+Requests wait for one of the replica's ``--concurrency`` slots and then take
+a service time drawn from ``--service-time``.  Writes (POST, PUT, DELETE)
+also wait ``--replication-lag`` for the followers' acknowledgement, and a
+restarted replica answers 503 for ``--recovery-time`` seconds while it
+catches up.  Distributions are ``fixed:MS``, ``uniform:LO:HI``,
+``exponential:MEAN`` or ``lognormal:MEDIAN:SIGMA``, all in milliseconds.
+
+The supervisor restarts crashed replicas on SIGHUP and on its control
+endpoint, which also crashes them:
+
+    python3 -m harness.replica --ports 2302 2308 2309 --service-time lognormal:5:0.5 --control-port 2399
+    curl -X POST localhost:2399/crash/2302
+    curl -X POST localhost:2399/restart/2302
+    curl localhost:2399/status
+
+so ``--restart-command 'curl -s -X POST localhost:2399/restart/{port}'`` lets
+the orchestrator restart them.
+"""
+import argparse
+import asyncio
+import json
+import math
+import multiprocessing
+import os
+import random
+import signal
+import socket
+import sys
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+from harness.config import DEFAULT_PORTS
+
+SERVICE = 'bookcatalog'
+WRITE_METHODS = (b'POST', b'PUT', b'DELETE')
+REASONS = {200: 'OK', 400: 'Bad Request', 404: 'Not Found', 503: 'Service Unavailable'}
+STOP_TIMEOUT = 5.0
+
+
+def parse_distribution(text):
+    name, *params = text.split(':')
+    try:
+        params = [float(p) for p in params]
+    except ValueError:
+        raise argparse.ArgumentTypeError(f"invalid distribution parameters in {text!r}")
+    arity = {'fixed': 1, 'uniform': 2, 'exponential': 1, 'lognormal': 2}
+    if name not in arity or len(params) != arity[name]:
+        raise argparse.ArgumentTypeError(
+            "expected fixed:MS, uniform:LO:HI, exponential:MEAN or lognormal:MEDIAN:SIGMA, "
+            f"got {text!r}")
+    return (name, *params)
+
+
+def sampler(distribution, rng):
+    # Returns a function drawing one value in seconds.
+    name, *params = distribution
+    if name == 'fixed':
+        return lambda: params[0] / 1000
+    if name == 'uniform':
+        return lambda: rng.uniform(*params) / 1000
+    if name == 'exponential':
+        return lambda: rng.expovariate(1 / params[0]) / 1000 if params[0] > 0 else 0.0
+    return lambda: rng.lognormvariate(math.log(params[0]), params[1]) / 1000
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description='Run crashable stand-in replicas')
+    parser.add_argument('--host', default='127.0.0.1', help='Address to listen on')
+    parser.add_argument('--ports', type=int, nargs='+', default=DEFAULT_PORTS, help='Replica ports')
+    parser.add_argument('--workers', type=int, default=1, help='Processes per replica, sharing its port')
+    parser.add_argument('--service-time', type=parse_distribution, default=parse_distribution('lognormal:5:0.5'),
+                        help='Service time distribution in ms (fixed:MS, uniform:LO:HI, exponential:MEAN, lognormal:MEDIAN:SIGMA)')
+    parser.add_argument('--concurrency', type=int, default=64, help='Requests served at once per replica; the rest queue')
+    parser.add_argument('--queue-limit', type=int, help='Queued requests per replica beyond which 503 is returned (default: unbounded)')
+    parser.add_argument('--payload', type=int, default=1024, help='Response body size in bytes')
+    parser.add_argument('--replication-lag', type=parse_distribution, default=parse_distribution('fixed:0'),
+                        help='Extra delay of writes while followers acknowledge, in ms (same forms as --service-time)')
+    parser.add_argument('--recovery-time', type=float, default=0.0, help='Seconds a restarted replica answers 503 while it catches up')
+    parser.add_argument('--service', default=SERVICE, help="Required value of the XDN header ('' accepts any)")
+    parser.add_argument('--control-port', type=int, help='Port of the HTTP control endpoint (crash, restart, status)')
+    parser.add_argument('--seed', type=int, default=0, help='Random seed of the service-time draws')
+    return parser.parse_args(argv)
+
+
+def books_payload(size):
+    books = []
+    body = b'[]'
+    while len(body) < size:
+        i = len(books) + 1
+        books.append({'id': i, 'title': f'Book {i}', 'author': f'Author {i}', 'year': 1900 + i % 120})
+        body = json.dumps(books).encode()
+    return body
+
+
+def response(status, body=b'', keep_alive=True):
+    head = (f"HTTP/1.1 {status} {REASONS[status]}\r\n"
+            f"Content-Type: application/json\r\n"
+            f"Content-Length: {len(body)}\r\n"
+            f"Connection: {'keep-alive' if keep_alive else 'close'}\r\n\r\n")
+    return head.encode('ascii') + body
+
+
+class Replica:
+    """One worker process of a replica: an asyncio keep-alive HTTP/1.1 server."""
+
+    def __init__(self, args, port, worker, recovering):
+        self.args = args
+        self.port = port
+        rng = random.Random(f"{args.seed}:{port}:{worker}:{os.getpid()}")
+        self.service_time = sampler(args.service_time, rng)
+        self.replication_lag = sampler(args.replication_lag, rng)
+        self.body = books_payload(args.payload)
+        self.slots = asyncio.Semaphore(max(1, -(-args.concurrency // args.workers)))
+        self.queue_limit = None if args.queue_limit is None else -(-args.queue_limit // args.workers)
+        self.waiting = 0
+        self.ready_at = time.monotonic() + (args.recovery_time if recovering else 0.0)
+        self.service = args.service.encode()
+
+    async def handle(self, method, path, headers, body):
+        if time.monotonic() < self.ready_at:
+            return 503, b'{"error": "recovering"}'
+        if self.service and headers.get(b'xdn') != self.service:
+            return 404, b'{"error": "unknown service"}'
+        if path.split(b'?', 1)[0] != b'/api/books':
+            return 404, b'{"error": "not found"}'
+        if self.queue_limit is not None and self.waiting >= self.queue_limit:
+            return 503, b'{"error": "overloaded"}'
+
+        self.waiting += 1
+        try:
+            await self.slots.acquire()
+        finally:
+            self.waiting -= 1
+        try:
+            await asyncio.sleep(self.service_time())
+            if method in WRITE_METHODS:
+                await asyncio.sleep(self.replication_lag())
+                return 200, body or b'{}'
+            return 200, self.body
+        finally:
+            self.slots.release()
+
+    async def serve_connection(self, reader, writer):
+        try:
+            while True:
+                request_line = await reader.readline()
+                if not request_line:
+                    break
+                headers = {}
+                while True:
+                    line = await reader.readline()
+                    if line in (b'\r\n', b'\n', b''):
+                        break
+                    name, _, value = line.partition(b':')
+                    headers[name.strip().lower()] = value.strip()
+                parts = request_line.split()
+                if len(parts) < 2:
+                    writer.write(response(400, keep_alive=False))
+                    break
+                length = int(headers.get(b'content-length', 0))
+                body = await reader.readexactly(length) if length else b''
+                status, payload = await self.handle(parts[0], parts[1], headers, body)
+                keep_alive = headers.get(b'connection', b'').lower() != b'close'
+                writer.write(response(status, payload, keep_alive))
+                await writer.drain()
+                if not keep_alive:
+                    break
+        except (ConnectionError, asyncio.IncompleteReadError, ValueError):
+            pass
+        finally:
+            writer.close()
+
+    async def run(self):
+        sock = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+        sock.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+        sock.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEPORT, 1)
+        sock.bind((self.args.host, self.port))
+        server = await asyncio.start_server(self.serve_connection, sock=sock, backlog=4096)
+        async with server:
+            await server.serve_forever()
+
+
+def serve(args, port, worker, recovering):
+    signal.signal(signal.SIGINT, signal.SIG_DFL)
+    signal.signal(signal.SIGHUP, signal.SIG_DFL)
+    asyncio.run(Replica(args, port, worker, recovering).run())
+
+
+class Supervisor:
+    def __init__(self, args):
+        self.args = args
+        self.processes = {port: [] for port in args.ports}
+        self.lock = threading.Lock()
+
+    def alive(self, port):
+        return any(process.is_alive() for process in self.processes[port])
+
+    def start(self, port, recovering=False):
+        with self.lock:
+            if self.alive(port):
+                return False
+            self.processes[port] = []
+            for worker in range(self.args.workers):
+                process = multiprocessing.Process(target=serve, args=(self.args, port, worker, recovering),
+                                                  daemon=True)
+                process.start()
+                self.processes[port].append(process)
+        print(f"{time.strftime('%H:%M:%S')} replica {port} started "
+              f"(pids {' '.join(str(p.pid) for p in self.processes[port])})")
+        return True
+
+    def crash(self, port, sig=signal.SIGKILL):
+        with self.lock:
+            if not self.alive(port):
+                return False
+            for process in self.processes[port]:
+                if process.is_alive():
+                    os.kill(process.pid, sig)
+        print(f"{time.strftime('%H:%M:%S')} replica {port} crashed ({signal.Signals(sig).name})")
+        return True
+
+    def restart_crashed(self):
+        for port in self.args.ports:
+            if not self.alive(port):
+                self.start(port, recovering=True)
+
+    def status(self):
+        return {str(port): {'alive': self.alive(port),
+                            'pids': [p.pid for p in self.processes[port] if p.is_alive()]}
+                for port in self.args.ports}
+
+    def stop(self):
+        for port in self.args.ports:
+            for process in self.processes[port]:
+                if process.is_alive():
+                    process.terminate()
+        deadline = time.monotonic() + STOP_TIMEOUT
+        for port in self.args.ports:
+            for process in self.processes[port]:
+                process.join(max(0.0, deadline - time.monotonic()))
+
+
+def control_handler(supervisor):
+    class ControlHandler(BaseHTTPRequestHandler):
+        def reply(self, status, payload):
+            body = json.dumps(payload).encode()
+            self.send_response(status)
+            self.send_header('Content-Type', 'application/json')
+            self.send_header('Content-Length', str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def do_GET(self):
+            if self.path.rstrip('/') == '/status':
+                self.reply(200, supervisor.status())
+            else:
+                self.reply(404, {'error': 'not found'})
+
+        def do_POST(self):
+            parts = self.path.strip('/').split('/')
+            if len(parts) != 2 or parts[0] not in ('crash', 'restart') or not parts[1].isdigit():
+                self.reply(404, {'error': 'expected /crash/PORT or /restart/PORT'})
+                return
+            port = int(parts[1])
+            if port not in supervisor.processes:
+                self.reply(404, {'error': f'no replica on port {port}'})
+                return
+            if parts[0] == 'crash':
+                changed = supervisor.crash(port)
+            else:
+                changed = supervisor.start(port, recovering=True)
+            self.reply(200, {'port': port, 'action': parts[0], 'changed': changed})
+
+        def log_message(self, format, *args):
+            pass
+
+    return ControlHandler
+
+
+def main(argv=None):
+    args = parse_args(argv)
+    supervisor = Supervisor(args)
+    for port in args.ports:
+        supervisor.start(port)
+
+    signal.signal(signal.SIGHUP, lambda signum, frame: supervisor.restart_crashed())
+    signal.signal(signal.SIGTERM, lambda signum, frame: sys.exit(0))
+
+    control = None
+    if args.control_port:
+        control = ThreadingHTTPServer((args.host, args.control_port), control_handler(supervisor))
+        threading.Thread(target=control.serve_forever, daemon=True).start()
+        print(f"Control endpoint on http://{args.host}:{args.control_port}")
+
+    try:
+        while True:
+            time.sleep(1)
+    except (KeyboardInterrupt, SystemExit):
+        pass
+    finally:
+        if control is not None:
+            control.shutdown()
+        supervisor.stop()
+
+
+if __name__ == "__main__":
+    main()
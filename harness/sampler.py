@@ -0,0 +1,172 @@
+"""Low-overhead resource sampler for the replica processes.
+
+Finds the processes listening on each replica port (all of them when a
+replica runs several workers) and reads their CPU time, RSS, thread count,
+context switches and open sockets from ``/proc`` every ``--interval``
+seconds.  Each sample writes one CSV row per port, summed over the port's
+processes, with an epoch timestamp on the same clock as the k6 timestamps
+and ``crash_times.txt``, so the visualizers can overlay it (``--resources``).
+CPU is a percentage of one core; context switches are per second.  A port
+with no listening process (a crashed replica) gets a row with ``pids`` 0 and
+empty values.
+
+The listening processes are looked up again every ``--rescan`` seconds, as
+soon as one of them disappears and every second while a replica is down, so
+a restarted replica is picked up quickly.
+
+    python3 harness/sampler.py --ports 2302 2308 2309 --interval 0.5 --output Crash2_test_4/resources.csv --pid <orchestrator pid>
+"""
+import argparse
+import csv
+import os
+import signal
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+from harness.config import DEFAULT_PORTS
+from harness.orchestrator import listening_pids
+
+FIELDS = ['timestamp', 'port', 'pids', 'cpu_pct', 'rss_mb', 'threads', 'voluntary_ctxt', 'involuntary_ctxt',
+          'sockets']
+CLOCK_TICKS = os.sysconf('SC_CLK_TCK')
+PAGE_SIZE = os.sysconf('SC_PAGE_SIZE')
+DOWN_RESCAN = 1.0
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description='Sample CPU, memory, context switches and sockets of the replicas')
+    parser.add_argument('--ports', type=int, nargs='+', default=DEFAULT_PORTS, help='Replica ports')
+    parser.add_argument('--interval', type=float, default=1.0, help='Seconds between samples')
+    parser.add_argument('--rescan', type=float, default=5.0, help='Seconds between lookups of the listening processes')
+    parser.add_argument('--duration', type=float, help='Stop after this many seconds')
+    parser.add_argument('--pid', type=int, help='Stop when this process (e.g. the orchestrator) exits')
+    parser.add_argument('--output', required=True, help='CSV file to write')
+    return parser.parse_args(argv)
+
+
+def read_counters(pid):
+    """CPU seconds, RSS bytes, threads, voluntary and involuntary switches, sockets."""
+    with open(f"/proc/{pid}/stat") as f:
+        stat = f.read()
+    # Fields after the parenthesised command name, which may contain spaces.
+    fields = stat[stat.rindex(')') + 2:].split()
+    if fields[0] == 'Z':
+        raise ProcessLookupError(pid)
+    cpu = (int(fields[11]) + int(fields[12])) / CLOCK_TICKS
+    threads = int(fields[17])
+    rss = int(fields[21]) * PAGE_SIZE
+
+    # /proc/PID/status only counts the main thread's switches; sum the tasks.
+    voluntary = involuntary = 0
+    for task in os.listdir(f"/proc/{pid}/task"):
+        try:
+            with open(f"/proc/{pid}/task/{task}/status") as f:
+                for line in f:
+                    if line.startswith('voluntary_ctxt_switches'):
+                        voluntary += int(line.split()[1])
+                    elif line.startswith('nonvoluntary_ctxt_switches'):
+                        involuntary += int(line.split()[1])
+        except OSError:
+            continue
+
+    sockets = 0
+    fd_dir = f"/proc/{pid}/fd"
+    for fd in os.listdir(fd_dir):
+        try:
+            if os.readlink(os.path.join(fd_dir, fd)).startswith('socket:'):
+                sockets += 1
+        except OSError:
+            continue
+    return cpu, rss, threads, voluntary, involuntary, sockets
+
+
+class Sampler:
+    def __init__(self, ports, rescan):
+        self.ports = ports
+        self.rescan = rescan
+        self.pids = {}
+        self.scanned = 0.0
+        self.previous = {}
+
+    def lookup(self, now):
+        self.pids = {port: listening_pids(port) - {os.getpid()} for port in self.ports}
+        self.scanned = now
+
+    def sample(self, now):
+        # While a replica is down, look for its restart about once a second.
+        due = self.rescan if all(self.pids.values()) else min(self.rescan, DOWN_RESCAN)
+        if now - self.scanned >= due:
+            self.lookup(now)
+        counters = {}
+        for port in self.ports:
+            for pid in self.pids[port]:
+                try:
+                    counters[pid] = read_counters(pid)
+                except (OSError, ValueError, IndexError):
+                    # Gone since the last lookup: look again on the next sample.
+                    self.scanned = 0.0
+
+        rows = []
+        for port in self.ports:
+            alive = [pid for pid in self.pids[port] if pid in counters]
+            if not alive:
+                rows.append({'timestamp': f"{now:.3f}", 'port': port, 'pids': 0})
+                continue
+            row = {
+                'timestamp': f"{now:.3f}",
+                'port': port,
+                'pids': len(alive),
+                'rss_mb': f"{sum(counters[pid][1] for pid in alive) / 1024 ** 2:.1f}",
+                'threads': sum(counters[pid][2] for pid in alive),
+                'sockets': sum(counters[pid][5] for pid in alive),
+            }
+            # Rates need a previous sample; a new process starts with blanks.
+            known = [pid for pid in alive if pid in self.previous]
+            if known:
+                cpu = voluntary = involuntary = 0.0
+                for pid in known:
+                    then, before = self.previous[pid]
+                    elapsed = now - then
+                    cpu += (counters[pid][0] - before[0]) / elapsed * 100
+                    voluntary += (counters[pid][3] - before[3]) / elapsed
+                    involuntary += (counters[pid][4] - before[4]) / elapsed
+                row.update(cpu_pct=f"{cpu:.1f}", voluntary_ctxt=f"{voluntary:.0f}",
+                           involuntary_ctxt=f"{involuntary:.0f}")
+            rows.append(row)
+        self.previous = {pid: (now, values) for pid, values in counters.items()}
+        return rows
+
+
+def running(pid):
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        pass
+    return True
+
+
+def main(argv=None):
+    args = parse_args(argv)
+    signal.signal(signal.SIGTERM, lambda signum, frame: sys.exit(0))
+    sampler = Sampler(args.ports, args.rescan)
+    start = time.monotonic()
+    with open(args.output, 'w', newline='') as f:
+        writer = csv.DictWriter(f, fieldnames=FIELDS)
+        writer.writeheader()
+        try:
+            while args.duration is None or time.monotonic() - start < args.duration:
+                if args.pid is not None and not running(args.pid):
+                    break
+                writer.writerows(sampler.sample(time.time()))
+                f.flush()
+                time.sleep(max(0.0, args.interval - (time.monotonic() - start) % args.interval))
+        except (KeyboardInterrupt, SystemExit):
+            pass
+    print(f"Resource samples written to {args.output}")
+
+
+if __name__ == "__main__":
+    main()
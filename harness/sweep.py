@@ -0,0 +1,220 @@
+"""Constant-arrival-rate sweep to find the saturation knee.
+
+Runs the usual warm-up, crash-orchestrated load run and (optionally) a
+visualizer once per arrival rate, each in its own step directory with a
+``parameter.txt`` like the hand-made runs.  The rate is either stepped
+through a list or binary-searched.  Every step is split into phases at the
+crashes and scored on offered vs. achieved throughput, dropped iterations,
+errors and tail latency.  The result is the maximum sustainable rate for
+each phase, i.e. for each replica count before and after a crash.
+
+    python3 harness/sweep.py --rates 200 300 400 500 600 --event 30:kill:2302 \\
+        --restart-command 'systemctl restart xdn-replica@{port}' --output-dir sweep_1
+"""
+import argparse
+import os
+import socket
+import subprocess
+import sys
+import time
+
+import numpy as np
+import pandas as pd
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.join(HERE, '..'))
+from harness.config import DEFAULT_PORTS
+from harness.orchestrator import parse_event, restart_replica
+from k6analysis.capacity import (
+    MAX_ERROR_PCT,
+    SETTLE_TIME,
+    SUSTAIN_TOLERANCE,
+    max_sustainable,
+    phase_capacity,
+    sustainable,
+)
+from k6analysis.latency import percentile_label
+
+RESTART_TIMEOUT = 60.0
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description='Sweep the arrival rate and report the maximum sustainable rate')
+    parser.add_argument('--rates', type=float, nargs='+', help='Arrival rates to step through')
+    parser.add_argument('--min-rate', type=float, default=100, help='Lowest rate of a stepped or binary-searched sweep')
+    parser.add_argument('--max-rate', type=float, default=1000, help='Highest rate of a stepped or binary-searched sweep')
+    parser.add_argument('--step', type=float, default=100, help='Rate increment when --rates is not given')
+    parser.add_argument('--binary-search', action='store_true', help='Binary-search the knee between --min-rate and --max-rate')
+    parser.add_argument('--resolution', type=float, default=10, help='Stop the binary search once the bracket is this narrow (req/s)')
+    parser.add_argument('--search-phase', type=int, default=-1, help='Phase whose capacity drives the binary search (0 = before the first crash, -1 = last)')
+    parser.add_argument('--duration', type=float, default=60, help='Seconds per step')
+    parser.add_argument('--pre-allocated-vus', type=int, help='preAllocatedVUs (default: rate / 5, at least 50)')
+    parser.add_argument('--max-vus', type=int, help='maxVUs (default: twice the pre-allocated VUs)')
+    parser.add_argument('--ports', type=int, nargs='+', default=DEFAULT_PORTS, help='Replica ports under test')
+    parser.add_argument('--event', type=parse_event, action='append', default=[],
+                        help='SECONDS:ACTION:PORT crash schedule applied to every step (repeatable)')
+    parser.add_argument('--restart-command', help='Shell command that restarts a replica; {port} is substituted. '
+                                                  'Used by the schedule and to restore killed replicas between steps')
+    parser.add_argument('--engine', choices=['k6', 'native'], default='k6', help='Load generator for each step')
+    parser.add_argument('--script', default='load_crash_2.js', help='k6 script (constant-arrival-rate, reads RATE etc. from the environment)')
+    parser.add_argument('--warmup-requests', type=int, default=200, help='Warm-up requests per replica before each step (0 disables)')
+    parser.add_argument('--visualizer', help='Result script run on every step, e.g. crash2.py')
+    parser.add_argument('--settle', type=float, default=SETTLE_TIME, help='Seconds skipped after the start and after each crash')
+    parser.add_argument('--tolerance', type=float, default=SUSTAIN_TOLERANCE, help='Allowed shortfall of successful vs. offered rate, and of dropped iterations, as a fraction')
+    parser.add_argument('--max-error-pct', type=float, default=MAX_ERROR_PCT, help='Highest error rate a sustainable phase may have')
+    parser.add_argument('--max-latency', type=float, help='Highest tail latency (ms) a sustainable phase may have')
+    parser.add_argument('--percentile', type=float, default=99, help='Tail latency percentile')
+    parser.add_argument('--output-dir', required=True, help='Directory for the step directories and sweep.csv')
+    return parser.parse_args(argv)
+
+
+def vus_for(args, rate):
+    pre = args.pre_allocated_vus or max(50, int(np.ceil(rate / 5)))
+    return pre, args.max_vus or 2 * pre
+
+
+def replica_counts(ports, events):
+    # Active replicas in each phase; phases start at the kills.
+    alive = len(ports)
+    counts = [alive]
+    for offset, action, port in sorted(events):
+        if action == 'kill':
+            alive -= 1
+            counts.append(alive)
+        else:
+            alive += 1
+    return counts
+
+
+def port_open(port, timeout=1.0):
+    try:
+        with socket.create_connection(('localhost', port), timeout=timeout):
+            return True
+    except OSError:
+        return False
+
+
+def restore_replicas(args):
+    down = [port for port in args.ports if not port_open(port)]
+    for port in down:
+        if not args.restart_command:
+            return down
+        restart_replica(port, args.restart_command)
+    deadline = time.monotonic() + RESTART_TIMEOUT
+    while down and time.monotonic() < deadline:
+        time.sleep(0.5)
+        down = [port for port in down if not port_open(port)]
+    return down
+
+
+def write_parameters(path, rate, pre, max_vus, duration):
+    with open(path, 'w') as f:
+        f.write("executor: 'constant-arrival-rate',\n"
+                f"rate: {rate:g},\n"
+                "timeUnit: '1s',\n"
+                f"duration: '{duration:g}s',\n"
+                f"preAllocatedVUs: {pre},\n"
+                f"maxVUs: {max_vus},")
+
+
+def load_command(args, rate, pre, max_vus, output):
+    if args.engine == 'native':
+        return [sys.executable, os.path.join(HERE, 'loadgen.py'), '--ports', *map(str, args.ports),
+                '--rate', f"{rate:g}", '--duration', f"{args.duration:g}",
+                '--pre-allocated', str(pre), '--max-concurrency', str(max_vus), '--output', output]
+    return ['k6', 'run', '--out', f"csv={output}", args.script]
+
+
+def run_step(args, rate):
+    step_dir = os.path.join(args.output_dir, f"rate_{rate:g}")
+    os.makedirs(step_dir, exist_ok=True)
+    pre, max_vus = vus_for(args, rate)
+    write_parameters(os.path.join(step_dir, 'parameter.txt'), rate, pre, max_vus, args.duration)
+    output = os.path.join(step_dir, 'k6_metrics.cols' if args.engine == 'native' else 'k6_metrics.csv')
+    crash_times = os.path.join(step_dir, 'crash_times.txt')
+    print(f"\n=== Step: {rate:g} req/s (preAllocatedVUs={pre}, maxVUs={max_vus}) ===")
+
+    down = restore_replicas(args)
+    if down:
+        raise RuntimeError(f"replicas on ports {down} are down; pass --restart-command to restore them")
+
+    if args.warmup_requests > 0:
+        subprocess.run([sys.executable, os.path.join(HERE, 'warmup.py'), '--ports', *map(str, args.ports),
+                        '--min-requests', str(args.warmup_requests),
+                        '--report', os.path.join(step_dir, 'warmup.json')], check=True)
+
+    env = dict(os.environ, RATE=f"{rate:g}", DURATION=f"{args.duration:g}s",
+               PRE_ALLOCATED_VUS=str(pre), MAX_VUS=str(max_vus),
+               ACTIVE_REPLICAS=f"[{' '.join(map(str, args.ports))}]")
+    command = [sys.executable, os.path.join(HERE, 'orchestrator.py')]
+    for offset, action, port in args.event:
+        command += ['--event', f"{offset:g}:{action}:{port}"]
+    if args.restart_command:
+        command += ['--restart-command', args.restart_command]
+    command += ['--crash-times', crash_times, '--events-log', os.path.join(step_dir, 'crash_events.csv'),
+                '--', *load_command(args, rate, pre, max_vus, output)]
+    result = subprocess.run(command, env=env)
+    if result.returncode != 0:
+        # k6 exits non-zero when thresholds fail; the data is still usable.
+        print(f"Load command exited with status {result.returncode}")
+
+    if args.visualizer:
+        subprocess.run([sys.executable, args.visualizer, '--k6-output', output, '--crash-times', crash_times,
+                        '--output', os.path.join(step_dir, 'throughput.png')])
+
+    rows = phase_capacity(output, crash_times, rate, replica_counts(args.ports, args.event),
+                          settle=args.settle, percentile=args.percentile)
+    for row in rows:
+        row['sustainable'] = sustainable(row, args.tolerance, args.max_error_pct, args.max_latency,
+                                         args.percentile)
+        print_row(row, args.percentile)
+    return rows
+
+
+def print_row(row, percentile):
+    state = "sustained" if row['sustainable'] else "NOT sustained"
+    print(f"  {row['phase']} ({row['replicas']} replicas): offered={row['offered']:.0f} req/s, "
+          f"achieved={row['achieved']:.2f} req/s, successful={row['successful']:.2f} req/s, "
+          f"dropped={row['dropped_rate']:.2f}/s, errors={row['error_pct']:.2f}%, "
+          f"{percentile_label(percentile)}={row[percentile_label(percentile)]:.2f} ms -> {state}")
+
+
+def stepped_rates(args):
+    if args.rates:
+        return sorted(args.rates)
+    return list(np.arange(args.min_rate, args.max_rate + args.step / 2, args.step))
+
+
+def main(argv=None):
+    args = parse_args(argv)
+    os.makedirs(args.output_dir, exist_ok=True)
+    rows = []
+
+    if args.binary_search:
+        lo, hi = args.min_rate, args.max_rate
+        while hi - lo > args.resolution:
+            rate = float(np.round((lo + hi) / 2))
+            step = run_step(args, rate)
+            rows += step
+            if step[args.search_phase]['sustainable']:
+                lo = rate
+            else:
+                hi = rate
+    else:
+        for rate in stepped_rates(args):
+            rows += run_step(args, float(rate))
+
+    table = pd.DataFrame(rows)
+    table.to_csv(os.path.join(args.output_dir, 'sweep.csv'), index=False)
+    print(f"\nSweep results saved to {os.path.join(args.output_dir, 'sweep.csv')}")
+
+    print("\nMaximum sustainable rate:")
+    for phase, (replicas, rate) in max_sustainable(rows).items():
+        if np.isnan(rate):
+            print(f"  {phase} ({replicas} replicas): none of the tested rates")
+        else:
+            print(f"  {phase} ({replicas} replicas): {rate:.0f} req/s")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,135 @@
+"""Concurrent, steady-state-aware replica warm-up.
+
+All replicas are warmed at the same time over pooled keep-alive
+connections.  Each replica keeps receiving requests until the p95 latency of
+its last few request windows agrees within a tolerance (or a request/time
+cap is hit), and a per-replica report is printed and optionally saved.
+
+    python3 harness/warmup.py --ports 2302 2308 2309 --report Crash2_test_5/warmup.json
+"""
+import argparse
+import asyncio
+import json
+import os
+import sys
+import time
+
+import numpy as np
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+from harness import client
+from harness.config import DEFAULT_HEADERS, DEFAULT_PORTS
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description='Warm up replicas until their latency is stable')
+    parser.add_argument('--host', default='localhost', help='Replica host')
+    parser.add_argument('--ports', type=int, nargs='+', default=DEFAULT_PORTS, help='Replica ports')
+    parser.add_argument('--path', default='/api/books', help='Request path')
+    parser.add_argument('--concurrency', type=int, default=8, help='Concurrent connections per replica')
+    parser.add_argument('--window', type=int, default=100, help='Requests per latency window')
+    parser.add_argument('--stable-windows', type=int, default=3, help='Consecutive windows whose p95 must agree')
+    parser.add_argument('--tolerance', type=float, default=0.1, help='Allowed relative spread of the window p95s')
+    parser.add_argument('--min-requests', type=int, default=200, help='Minimum requests per replica')
+    parser.add_argument('--max-requests', type=int, default=5000, help='Give up on stability after this many requests')
+    parser.add_argument('--max-time', type=float, default=60, help='Give up on stability after this many seconds')
+    parser.add_argument('--timeout', type=float, default=10, help='Per-request timeout in seconds')
+    parser.add_argument('--report', help='Write the warm-up report as JSON to this path')
+    parser.add_argument('--strict', action='store_true', help='Exit with status 1 if any replica did not stabilize')
+    return parser.parse_args(argv)
+
+
+class ReplicaWarmup:
+    def __init__(self, args, port):
+        self.args = args
+        self.port = port
+        self.pool = client.ConnectionPool(args.host, port)
+        self.request = client.build_request(args.host, port, args.path, DEFAULT_HEADERS)
+        self.latencies = []
+        self.errors = 0
+        self.window_p95 = []
+        self.stable = False
+        self.done = False
+
+    def record(self, response):
+        if not response.ok:
+            self.errors += 1
+            # Failures count towards --max-requests, so a failing replica stops too.
+            if len(self.latencies) + self.errors >= self.args.max_requests:
+                self.done = True
+            return
+        self.latencies.append(response.duration)
+        if len(self.latencies) % self.args.window == 0:
+            window = np.asarray(self.latencies[-self.args.window:])
+            self.window_p95.append(float(np.percentile(window, 95)))
+            self.check()
+
+    def check(self):
+        total = len(self.latencies) + self.errors
+        recent = self.window_p95[-self.args.stable_windows:]
+        if (total >= self.args.min_requests and len(recent) == self.args.stable_windows
+                and max(recent) <= min(recent) * (1 + self.args.tolerance)):
+            self.stable = True
+            self.done = True
+        elif total >= self.args.max_requests:
+            self.done = True
+
+    async def worker(self, deadline):
+        while not self.done and time.perf_counter() < deadline:
+            self.record(await client.get(self.pool, self.request, self.args.timeout))
+
+    async def run(self):
+        start = time.perf_counter()
+        deadline = start + self.args.max_time
+        await asyncio.gather(*(self.worker(deadline) for _ in range(self.args.concurrency)))
+        self.elapsed = time.perf_counter() - start
+        self.pool.close()
+
+    def report(self):
+        total = len(self.latencies) + self.errors
+        # None (null in warmup.json) when no request succeeded.
+        p50, p95 = np.percentile(self.latencies, [50, 95]).tolist() if self.latencies else (None, None)
+        return {
+            'port': self.port,
+            'stable': self.stable,
+            'requests': total,
+            'errors': self.errors,
+            'seconds': round(self.elapsed, 3),
+            'rps': round(total / self.elapsed, 2) if self.elapsed > 0 else 0.0,
+            'p50_ms': p50,
+            'p95_ms': p95,
+            'window_p95_ms': [round(p, 3) for p in self.window_p95],
+        }
+
+
+async def warm_up(args):
+    replicas = [ReplicaWarmup(args, port) for port in args.ports]
+    await asyncio.gather(*(replica.run() for replica in replicas))
+    return [replica.report() for replica in replicas]
+
+
+def main(argv=None):
+    args = parse_args(argv)
+    reports = asyncio.run(warm_up(args))
+
+    for report in reports:
+        state = "stable" if report['stable'] else "NOT stable"
+        if report['p50_ms'] is None:
+            latency = "no successful requests"
+        else:
+            latency = f"p50={report['p50_ms']:.2f} ms, p95={report['p95_ms']:.2f} ms"
+        print(f" Replica {report['port']}: {state} after {report['requests']} requests "
+              f"in {report['seconds']:.2f} seconds ({report['rps']:.2f} req/sec, "
+              f"{report['errors']} errors, {latency})")
+
+    if args.report:
+        with open(args.report, 'w') as f:
+            json.dump(reports, f, indent=2)
+        print(f"Warm-up report saved to {args.report}")
+
+    if args.strict and not all(report['stable'] for report in reports):
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,18 @@
+import argparse
+import os
+
+from k6analysis.trace import convert_k6
+
+def parse_args():
+    parser = argparse.ArgumentParser(description='Convert a k6 CSV into a compact per-request trace')
+    parser.add_argument('k6_output', help='k6 CSV (or column store) to convert')
+    parser.add_argument('trace', help='Trace file to write (read back by every visualizer as --k6-output)')
+    return parser.parse_args()
+
+def main():
+    args = parse_args()
+    rows = convert_k6(args.k6_output, args.trace)
+    print(f"Wrote {rows} requests to {args.trace} ({os.path.getsize(args.trace) / 1024 ** 2:.1f} MB)")
+
+if __name__ == "__main__":
+    main()
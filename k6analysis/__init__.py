@@ -0,0 +1,54 @@
+from .cache import CacheWriter, lookup as lookup_cache
+from .capacity import max_sustainable, phase_capacity, sustainable
+from .columns import ColumnStore, ColumnWriter, is_column_store
+from .comparison import PlatformRun, load_platform, load_platforms, print_comparison, rank_platforms
+from .core import (
+    bucket_sums,
+    load_crash_times,
+    metric_rows,
+    phase_bounds,
+    phase_means,
+    second_index,
+    successful_series,
+    successful_throughput,
+    whole_buckets,
+)
+from .latency import (
+    LATENCY_METRICS,
+    PERCENTILES,
+    LatencyAggregates,
+    LatencyAggregator,
+    format_percentiles,
+)
+from .live import CsvTail, recent_summary
+from .omission import OmissionAggregates, OmissionAggregator
+from .reader import (
+    BucketAggregator,
+    SecondAggregates,
+    SecondAggregator,
+    aggregate,
+    iter_k6_chunks,
+    read_k6_aggregates,
+)
+from .recovery import (
+    BASELINE_WINDOW,
+    TOLERANCE,
+    detect_degradation,
+    print_recovery_report,
+    recovery_metrics,
+)
+from .replicas import ReplicaAggregates, ReplicaAggregator, replica_label
+from .resources import RESOURCE_METRICS, ResourceSeries, load_resources, print_resource_report
+from .runs import (
+    RunSeries,
+    align_runs,
+    load_run,
+    load_runs,
+    mean_interval,
+    print_recovery_summary,
+    recovery_summary,
+)
+from .sketch import LogBuckets, SparseHistograms
+from .stats import latency_summary, phase_summary, throughput_summary, to_json, write_json
+from .summary import build_summary, compare_metrics, load_metric_rows, run_summary, summary_aggregators, write_summary
+from .trace import RECORD_DTYPE, Trace, TraceWriter, convert_k6, is_trace
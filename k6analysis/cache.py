@@ -0,0 +1,141 @@
+"""Columnar on-disk cache for parsed k6 CSV files.
+
+The first time a CSV is streamed its columns are also written out as a
+column store (see ``columns.py``) under ``.k6cache/`` next to the CSV.
+Later reads memory-map the store instead of parsing the text again.  Entries are keyed on the CSV's size, mtime and a hash of its
+first and last megabyte, and the cache directory is kept under a size cap by
+evicting the least recently used entries.  Partial entries left behind by
+a process that died while writing one are removed at the same time.
+
+``K6_CACHE_DIR`` moves the cache to a shared location and
+``K6_CACHE_MAX_BYTES`` changes the cap.
+"""
+import hashlib
+import os
+import shutil
+import time
+
+from . import columns
+
+CACHE_DIR_NAME = '.k6cache'
+DEFAULT_MAX_BYTES = 2 * 1024 ** 3
+FINGERPRINT_BYTES = 1024 ** 2
+# Seconds without a write after which a partial entry is abandoned.
+STALE_TMP_AGE = 3600.0
+TMP_PREFIX = 'tmp-'
+
+CACHED_TAGS = columns.TAG_COLUMNS
+
+
+def cache_root(csv_path):
+    return os.environ.get('K6_CACHE_DIR') or os.path.join(
+        os.path.dirname(os.path.abspath(csv_path)), CACHE_DIR_NAME)
+
+
+def max_cache_bytes():
+    return int(os.environ.get('K6_CACHE_MAX_BYTES', DEFAULT_MAX_BYTES))
+
+
+def cache_key(csv_path):
+    st = os.stat(csv_path)
+    digest = hashlib.blake2b(digest_size=16)
+    digest.update(f"v{columns.FORMAT_VERSION}:{st.st_size}:{st.st_mtime_ns}".encode())
+    with open(csv_path, 'rb') as f:
+        digest.update(f.read(FINGERPRINT_BYTES))
+        if st.st_size > 2 * FINGERPRINT_BYTES:
+            f.seek(st.st_size - FINGERPRINT_BYTES)
+            digest.update(f.read())
+    return digest.hexdigest()
+
+
+class CacheWriter:
+    def __init__(self, csv_path):
+        self.root = cache_root(csv_path)
+        self.key = cache_key(csv_path)
+        self.source = os.path.abspath(csv_path)
+        self.tmp = os.path.join(self.root, f"{TMP_PREFIX}{self.key}-{os.getpid()}")
+        self.writer = columns.ColumnWriter(self.tmp)
+
+    def append(self, chunk):
+        self.writer.append(chunk)
+
+    def commit(self):
+        self.writer.close(source=self.source)
+        final = os.path.join(self.root, self.key)
+        try:
+            os.rename(self.tmp, final)
+        except OSError:
+            # Another process cached the same file first.
+            shutil.rmtree(self.tmp, ignore_errors=True)
+        evict(self.root, max_cache_bytes(), keep=self.key)
+
+    def abort(self):
+        self.writer.abort()
+
+
+def lookup(csv_path):
+    path = os.path.join(cache_root(csv_path), cache_key(csv_path))
+    if not os.path.exists(os.path.join(path, columns.META_FILE)):
+        return None
+    try:
+        entry = columns.ColumnStore(path)
+    except (OSError, ValueError, KeyError) as e:
+        print(f"Ignoring unreadable cache entry {path}: {e}")
+        return None
+    now = time.time()
+    os.utime(os.path.join(path, columns.META_FILE), (now, now))
+    return entry
+
+
+def entry_size(path):
+    return sum(os.path.getsize(os.path.join(path, name)) for name in os.listdir(path))
+
+
+def pid_alive(pid):
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        return True
+    return True
+
+
+def last_write(path):
+    return max([os.path.getmtime(path)] +
+               [os.path.getmtime(os.path.join(path, name)) for name in os.listdir(path)])
+
+
+def stale_tmp(path, now):
+    # A partial entry whose writer is gone, or (with a shared K6_CACHE_DIR,
+    # where the pid may belong to another host) that has not grown for a while.
+    try:
+        pid = int(os.path.basename(path).rsplit('-', 1)[1])
+    except (IndexError, ValueError):
+        pid = None
+    try:
+        return pid is None or not pid_alive(pid) or now - last_write(path) > STALE_TMP_AGE
+    except OSError:
+        # Renamed or removed while we looked.
+        return False
+
+
+def evict(root, max_bytes, keep=None):
+    now = time.time()
+    entries = []
+    for name in os.listdir(root):
+        if name.startswith(TMP_PREFIX):
+            if stale_tmp(os.path.join(root, name), now):
+                shutil.rmtree(os.path.join(root, name), ignore_errors=True)
+            continue
+        meta = os.path.join(root, name, columns.META_FILE)
+        if os.path.exists(meta):
+            entries.append((os.path.getmtime(meta), name, entry_size(os.path.join(root, name))))
+    total = sum(size for _, _, size in entries)
+    for _, name, size in sorted(entries):
+        if total <= max_bytes:
+            break
+        if name == keep:
+            continue
+        shutil.rmtree(os.path.join(root, name), ignore_errors=True)
+        total -= size
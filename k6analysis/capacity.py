@@ -0,0 +1,107 @@
+"""Offered vs. achieved load of one run, phase by phase.
+
+A run is split at its crashes.  Only the steady part of each phase is
+judged: the first ``settle`` seconds after the start and after every crash
+are skipped so the failover transient is not counted against capacity, and
+the last, partial bucket is dropped.  A phase sustains its offered rate when
+successful throughput stays within ``tolerance`` of it, k6 hardly drops any
+iterations, and errors and tail latency stay under their limits.
+"""
+import numpy as np
+
+from . import core
+from .latency import LatencyAggregator, percentile_label
+from .reader import SecondAggregator, aggregate
+
+CAPACITY_METRICS = ['http_reqs', 'http_req_failed', 'checks', 'dropped_iterations']
+SETTLE_TIME = 5.0
+SUSTAIN_TOLERANCE = 0.05
+MAX_ERROR_PCT = 1.0
+
+
+def phase_names(count):
+    return ['Before first crash'] + [f'After crash {i + 1}' for i in range(count - 1)]
+
+
+def steady_windows(end, crash_times, settle=SETTLE_TIME):
+    starts = [0.0] + sorted(crash_times)
+    ends = sorted(crash_times) + [end]
+    return [(min(start + settle, stop), stop) for start, stop in zip(starts, ends)]
+
+
+def phase_capacity(path, crash_times_path, offered, replica_counts=None, settle=SETTLE_TIME,
+                   percentile=99, use_cache=True):
+    """One row per phase: offered and achieved rates, drops, errors and tail latency."""
+    aggregates, latency = aggregate(path, [SecondAggregator(CAPACITY_METRICS),
+                                           LatencyAggregator(['http_req_duration'])],
+                                    use_cache=use_cache)
+    crash_times = core.load_crash_times(crash_times_path, default=[], origin=aggregates.origin)
+    seconds = aggregates.seconds
+    rates = aggregates.rates
+    successful = core.successful_series(aggregates)
+    label = percentile_label(percentile)
+
+    rows = []
+    windows = steady_windows(seconds[-1], crash_times, settle)
+    names = phase_names(len(windows))
+    for phase, (start, stop) in enumerate(windows):
+        # Whole buckets only: a bucket straddling a crash is left out.
+        lo = np.searchsorted(seconds, start, side='left')
+        hi = np.searchsorted(seconds, stop - aggregates.width, side='right')
+        row = {
+            'phase': names[phase],
+            'replicas': replica_counts[phase] if replica_counts else np.nan,
+            'offered': offered,
+            'start': start,
+            'stop': stop,
+            'achieved': np.nan,
+            'successful': np.nan,
+            'error_pct': np.nan,
+            'dropped_rate': np.nan,
+            label: np.nan,
+        }
+        rows.append(row)
+        if hi <= lo:
+            continue
+        requests = rates['http_reqs'].values[lo:hi].mean()
+        row['achieved'] = requests
+        row['successful'] = successful[lo:hi].mean()
+        row['error_pct'] = (rates['http_req_failed'].values[lo:hi].mean() / requests * 100
+                            if requests > 0 else 0.0)
+        row['dropped_rate'] = rates['dropped_iterations'].values[lo:hi].mean()
+        row[label] = latency.phase_percentiles([seconds[lo], seconds[hi - 1] + aggregates.width],
+                                               percentiles=[percentile])[1][0]
+    return rows
+
+
+def sustainable(row, tolerance=SUSTAIN_TOLERANCE, max_error_pct=MAX_ERROR_PCT, max_latency=None,
+                percentile=99):
+    if np.isnan(row['successful']):
+        return False
+    if row['successful'] < (1 - tolerance) * row['offered']:
+        return False
+    if row['dropped_rate'] > tolerance * row['offered']:
+        return False
+    if row['error_pct'] > max_error_pct:
+        return False
+    tail = row[percentile_label(percentile)]
+    return max_latency is None or (not np.isnan(tail) and tail <= max_latency)
+
+
+def max_sustainable(rows):
+    """Highest offered rate sustained below the lowest rate that was not, per phase.
+
+    ``rows`` need a boolean ``sustainable`` entry; returns ``{phase: (replicas, rate)}``
+    with ``rate`` NaN when no tested rate held.
+    """
+    knees = {}
+    for phase in dict.fromkeys(row['phase'] for row in rows):
+        tested = sorted((row['offered'], row['sustainable'], row['replicas'])
+                        for row in rows if row['phase'] == phase)
+        best = np.nan
+        for offered, held, replicas in tested:
+            if not held:
+                break
+            best = offered
+        knees[phase] = (tested[0][2], best)
+    return knees
@@ -0,0 +1,111 @@
+"""On-disk column store holding k6 metric rows.
+
+A store is a directory with one raw binary file per column and a
+``meta.json`` describing the row count and the dictionaries used to encode
+the string columns.  The files are memory-mapped on read, so analysing a
+store never parses text and never copies more than one chunk at a time.
+The CSV cache and the native load generator both produce this layout.
+"""
+import json
+import os
+import shutil
+
+import numpy as np
+import pandas as pd
+
+FORMAT_VERSION = 1
+META_FILE = 'meta.json'
+
+TAG_COLUMNS = ['url', 'status']
+VALUE_COLUMNS = {'timestamp': np.float64, 'metric_value': np.float32}
+CODE_DTYPE = np.int16
+
+
+def encoded_columns():
+    return ['metric_name'] + TAG_COLUMNS
+
+
+def is_column_store(path):
+    return os.path.isdir(path) and os.path.exists(os.path.join(path, META_FILE))
+
+
+class ColumnStore:
+    def __init__(self, path):
+        self.path = path
+        with open(os.path.join(path, META_FILE)) as f:
+            self.meta = json.load(f)
+        self.rows = self.meta['rows']
+        self.columns = {}
+        for name, dtype in VALUE_COLUMNS.items():
+            self.columns[name] = self._map(name, dtype)
+        for name in encoded_columns():
+            self.columns[name] = self._map(name, CODE_DTYPE)
+
+    def _map(self, name, dtype):
+        if self.rows == 0:
+            return np.zeros(0, dtype=dtype)
+        return np.memmap(os.path.join(self.path, f"{name}.bin"), dtype=dtype,
+                         mode='r', shape=(self.rows,))
+
+    def codebook(self, name):
+        return self.meta['codebooks'][name]
+
+    def iter_chunks(self, tags=(), chunksize=500_000):
+        for start in range(0, self.rows, chunksize):
+            stop = min(start + chunksize, self.rows)
+            chunk = {
+                'metric_name': pd.Categorical.from_codes(
+                    self.columns['metric_name'][start:stop], categories=self.codebook('metric_name')),
+                'timestamp': self.columns['timestamp'][start:stop],
+                'metric_value': self.columns['metric_value'][start:stop],
+            }
+            for tag in tags:
+                chunk[tag] = pd.Categorical.from_codes(
+                    self.columns[tag][start:stop], categories=self.codebook(tag))
+            yield pd.DataFrame(chunk)
+
+
+class ColumnWriter:
+    def __init__(self, path):
+        self.path = path
+        os.makedirs(path, exist_ok=True)
+        self.rows = 0
+        self.codebooks = {name: {} for name in encoded_columns()}
+        self.files = {name: open(os.path.join(path, f"{name}.bin"), 'wb')
+                      for name in list(VALUE_COLUMNS) + encoded_columns()}
+
+    def _encode(self, name, values):
+        if not isinstance(values.dtype, pd.CategoricalDtype):
+            values = values.astype('category')
+        book = self.codebooks[name]
+        lookup = [book.setdefault(str(c), len(book)) for c in values.cat.categories]
+        lookup = np.array(lookup + [-1], dtype=CODE_DTYPE)
+        return lookup[values.cat.codes.values]
+
+    def append(self, chunk):
+        for name, dtype in VALUE_COLUMNS.items():
+            self.files[name].write(np.asarray(chunk[name], dtype=dtype).tobytes())
+        for name in encoded_columns():
+            if name in chunk:
+                codes = self._encode(name, chunk[name])
+            else:
+                codes = np.full(len(chunk), -1, dtype=CODE_DTYPE)
+            self.files[name].write(codes.tobytes())
+        self.rows += len(chunk)
+
+    def close(self, **extra):
+        for f in self.files.values():
+            f.close()
+        meta = {
+            'version': FORMAT_VERSION,
+            'rows': self.rows,
+            'codebooks': {name: list(book) for name, book in self.codebooks.items()},
+        }
+        meta.update(extra)
+        with open(os.path.join(self.path, META_FILE), 'w') as f:
+            json.dump(meta, f)
+
+    def abort(self):
+        for f in self.files.values():
+            f.close()
+        shutil.rmtree(self.path, ignore_errors=True)
@@ -0,0 +1,130 @@
+"""Comparing platforms or configurations, each run with its own crash schedule.
+
+Every run is loaded in its own worker process and reduced there to its
+per-bucket successful throughput, per-bucket tail latency and a few scalar
+metrics, so only a few kilobytes per run reach the parent however large its
+k6 output is.  Runs are then ranked on each metric and on their mean rank.
+"""
+import os
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+import pandas as pd
+
+from . import core, recovery
+from .latency import LatencyAggregator
+from .reader import SecondAggregator, aggregate
+
+# Metric: (label, unit, whether higher is better).
+RANK_METRICS = {
+    'steady': ('Steady-state throughput', 'req/s', True),
+    'post_crash': ('Post-crash throughput', 'req/s', True),
+    'recovery': ('Time to recover', 's', False),
+    'tail_latency': ('Tail latency', 'ms', False),
+}
+TAIL_PERCENTILE = 99
+
+
+def parse_crash_schedule(value):
+    """Comma-separated seconds since the test start, e.g. ``20`` or ``20,45``."""
+    return sorted(float(part) for part in value.split(',') if part.strip())
+
+
+def crash_schedule(value, origin):
+    # A crash_times.txt written by the orchestrator, or literal seconds.
+    if os.path.exists(value):
+        return sorted(core.load_crash_times(value, default=[], origin=origin))
+    return parse_crash_schedule(value)
+
+
+class PlatformRun:
+    def __init__(self, label, source, seconds, throughputs, tail, crash_times, recovery, metrics, width):
+        self.label = label
+        self.source = source
+        self.seconds = seconds
+        self.throughputs = throughputs
+        self.tail = tail
+        self.crash_times = crash_times
+        self.recovery = recovery
+        self.metrics = metrics
+        self.width = width
+
+
+def load_platform(label, path, crashes, width=1.0, use_cache=True, percentile=TAIL_PERCENTILE):
+    throughput, latency = aggregate(path, [SecondAggregator(width=width),
+                                           LatencyAggregator(['http_req_duration'], width=width)],
+                                    use_cache=use_cache)
+    seconds = throughput.seconds
+    throughputs = core.successful_series(throughput)
+    crash_times = crash_schedule(crashes, throughput.origin)
+
+    # The latency window starts at its own first row; put it on the throughput axis.
+    shift = latency.origin - throughput.origin
+    table = latency.percentiles(percentiles=[percentile])
+    tail = np.full(len(seconds), np.nan)
+    index = np.searchsorted(seconds, table.index.values + shift)
+    keep = index < len(seconds)
+    tail[index[keep]] = table.iloc[:, 0].values[keep]
+
+    boundaries = crash_times[:1]
+    whole_seconds, whole = core.whole_buckets(seconds, throughputs)
+    means, counts = core.phase_means(whole_seconds, whole, boundaries)
+    phases = latency.phase_percentiles([b - shift for b in boundaries], percentiles=[percentile])[:, 0]
+    recoveries = recovery.recovery_metrics(seconds, throughputs, crash_times, width=width)
+    # Crashes without a baseline say nothing either way and are left out; a
+    # crash the run never recovered from ranks it last.
+    times = [np.inf if np.isnan(m['time_to_recover']) else m['time_to_recover']
+             for m in recoveries if not np.isnan(m['baseline'])]
+    metrics = {
+        'steady': means[0] if counts[0] else np.nan,
+        'post_crash': means[1] if len(counts) > 1 and counts[1] else np.nan,
+        'recovery': float(np.mean(times)) if times else np.nan,
+        'tail_latency': latency.overall(percentiles=[percentile])[0],
+        'post_crash_tail_latency': phases[1] if len(phases) > 1 else np.nan,
+        'mean': float(np.mean(whole)) if len(whole) else np.nan,
+    }
+    return PlatformRun(label, path, seconds, throughputs, tail, crash_times, recoveries, metrics, width)
+
+
+def load_platforms(runs, jobs=None, **kwargs):
+    """Load ``(label, path, crashes)`` runs concurrently, skipping unreadable ones."""
+    platforms = []
+    with ProcessPoolExecutor(max_workers=jobs) as pool:
+        futures = [pool.submit(load_platform, label, path, crashes, **kwargs) for label, path, crashes in runs]
+        for (label, path, _), future in zip(runs, futures):
+            try:
+                platforms.append(future.result())
+            except Exception as e:
+                print(f"Skipping {label} ({path}): {e}")
+    return platforms
+
+
+def rank_platforms(platforms, by='overall'):
+    """Per-metric ranks (1 is best, missing values last) and the platforms in ranked order."""
+    ranks = pd.DataFrame(index=[p.label for p in platforms])
+    for metric, (_, _, higher) in RANK_METRICS.items():
+        values = pd.Series([p.metrics[metric] for p in platforms], index=ranks.index, dtype=np.float64)
+        ranks[metric] = values.rank(method='min', ascending=not higher, na_option='bottom').astype(int)
+    ranks['overall'] = ranks[list(RANK_METRICS)].mean(axis=1)
+    order = ranks.sort_values([by, 'overall'], kind='stable').index
+    by_label = {p.label: p for p in platforms}
+    return [by_label[label] for label in order], ranks.loc[order]
+
+
+def format_metric(metric, value):
+    if metric == 'recovery' and np.isinf(value):
+        return 'not recovered'
+    if np.isnan(value):
+        return 'n/a'
+    return f"{value:.2f} {RANK_METRICS[metric][1]}"
+
+
+def print_comparison(ranked, ranks, percentile=TAIL_PERCENTILE):
+    labels = {metric: label for metric, (label, _, _) in RANK_METRICS.items()}
+    labels['tail_latency'] = f"p{percentile:g} latency"
+    width = max(len(p.label) for p in ranked)
+    print("\nRanked comparison (rank in brackets, 1 is best):")
+    print(f"{'#':>2}  {'Run':<{width}}  " + "  ".join(f"{labels[m]:>24}" for m in RANK_METRICS))
+    for position, platform in enumerate(ranked, 1):
+        cells = [f"{format_metric(m, platform.metrics[m])} [{ranks.loc[platform.label, m]}]" for m in RANK_METRICS]
+        print(f"{position:>2}  {platform.label:<{width}}  " + "  ".join(f"{cell:>24}" for cell in cells))
@@ -0,0 +1,125 @@
+"""Vectorized building blocks shared by the result scripts.
+
+Everything here works on whole NumPy arrays: timestamps are turned into
+integer bucket numbers in one pass, per-bucket series are built with
+``np.bincount`` and run phases are located with ``np.searchsorted``.
+"""
+import numpy as np
+import pandas as pd
+
+EPOCH_THRESHOLD = 1e9
+MIN_BUCKET_WIDTH = 0.01
+MAX_BUCKET_WIDTH = 10.0
+# k6 can write timestamps in s, ms, us or ns (``K6_CSV_TIME_FORMAT``);
+# epoch values above these magnitudes are scaled back to seconds.
+TIMESTAMP_SCALES = [(1e17, 1e-9), (1e14, 1e-6), (1e11, 1e-3)]
+
+
+def second_index(timestamps, origin):
+    timestamps = np.asarray(timestamps, dtype=np.float64)
+    return np.floor(timestamps - origin).astype(np.int64)
+
+
+def bucket_width_us(width):
+    if not MIN_BUCKET_WIDTH <= width <= MAX_BUCKET_WIDTH:
+        raise ValueError(f"bucket width must be between {MIN_BUCKET_WIDTH} and "
+                         f"{MAX_BUCKET_WIDTH} seconds, got {width}")
+    return int(round(width * 1e6))
+
+
+def bucket_index(timestamps, width_us):
+    # Absolute bucket numbers on a grid anchored at the epoch.  Timestamps
+    # are rounded to whole microseconds first so that bucket edges are
+    # exact integers instead of float divisions.
+    micros = np.rint(np.asarray(timestamps, dtype=np.float64) * 1e6).astype(np.int64)
+    return micros // width_us
+
+
+def epoch_seconds(timestamps):
+    timestamps = np.asarray(timestamps, dtype=np.float64)
+    if len(timestamps) == 0:
+        return timestamps
+    peak = timestamps.max()
+    for threshold, scale in TIMESTAMP_SCALES:
+        if peak >= threshold:
+            return timestamps * scale
+    return timestamps
+
+
+def metric_rows(names, metrics):
+    if not isinstance(names.dtype, pd.CategoricalDtype):
+        names = names.astype('category')
+    lookup = [metrics.index(c) if c in metrics else -1 for c in names.cat.categories]
+    lookup = np.array(lookup + [-1], dtype=np.int64)
+    return lookup[names.cat.codes.values]
+
+
+def bucket_sums(seconds, weights=None, length=0):
+    if len(seconds) == 0:
+        return np.zeros(length, dtype=np.float64)
+    return np.bincount(seconds, weights=weights, minlength=length).astype(np.float64)
+
+
+def align(*series):
+    length = max(len(s) for s in series)
+    return [np.pad(np.asarray(s, dtype=np.float64), (0, length - len(s))) for s in series]
+
+
+def successful_throughput(total, failed):
+    total, failed = align(total, failed)
+    return np.maximum(total - failed, 0.0)
+
+
+def successful_series(aggregates):
+    rates = aggregates.rates
+    if aggregates.has_rows('checks'):
+        return rates['checks'].values
+    return successful_throughput(rates['http_reqs'].values, rates['http_req_failed'].values)
+
+
+def whole_buckets(*series):
+    # The first and last buckets cover only part of their width (the origin
+    # is floored to the bucket grid and the run stops mid-bucket), so they
+    # read as dips; statistics and recovery metrics leave them out.
+    if len(series[0]) <= 2:
+        return series if len(series) > 1 else series[0]
+    trimmed = tuple(np.asarray(s)[1:-1] for s in series)
+    return trimmed if len(series) > 1 else trimmed[0]
+
+
+def phase_bounds(seconds, boundaries):
+    cuts = np.searchsorted(seconds, np.asarray(boundaries, dtype=np.float64), side='left')
+    return np.concatenate(([0], cuts, [len(seconds)]))
+
+
+def phase_means(seconds, values, boundaries):
+    values = np.asarray(values, dtype=np.float64)
+    edges = phase_bounds(np.asarray(seconds), boundaries)
+    cumulative = np.concatenate(([0.0], np.cumsum(values)))
+    counts = np.diff(edges)
+    sums = cumulative[edges[1:]] - cumulative[edges[:-1]]
+    means = np.divide(sums, counts, out=np.full(len(counts), np.nan), where=counts > 0)
+    return means, counts
+
+
+def load_crash_times(path, default, origin=None):
+    # Values that look like epoch seconds (written by harness/orchestrator.py)
+    # are moved onto the run's time axis when its origin is known.
+    crash_times = []
+    try:
+        with open(path, 'r') as f:
+            for line in f:
+                for part in line.split():
+                    part = part.split(',')[0]
+                    try:
+                        crash_time = float(part)
+                    except ValueError:
+                        print(f"Invalid crash time value: {part}")
+                        continue
+                    if origin is not None and crash_time >= EPOCH_THRESHOLD:
+                        crash_time -= origin
+                    crash_times.append(crash_time)
+    except Exception as e:
+        print(f"Error reading crash times: {e}")
+        crash_times = list(default)
+    return crash_times
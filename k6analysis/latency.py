@@ -0,0 +1,112 @@
+"""Per-bucket latency percentiles from k6's ``http_req_*`` timing rows.
+
+Each time bucket keeps one log-bucketed histogram per metric (see
+``sketch.py``), so the whole run is processed in a single streaming pass.
+Histograms are stored sparsely, which keeps fine (10 ms) buckets on long
+runs within the memory of their non-empty cells.
+"""
+import numpy as np
+import pandas as pd
+
+from . import core
+from .reader import BucketAggregator
+from .sketch import LogBuckets, SparseHistograms
+
+LATENCY_METRICS = ['http_req_duration', 'http_req_waiting']
+PERCENTILES = [50, 95, 99, 99.9]
+
+
+def percentile_label(p):
+    return f"p{p:g}"
+
+
+def format_percentiles(values, percentiles=PERCENTILES):
+    return ", ".join(f"{percentile_label(p)}={v:.2f} ms" for p, v in zip(percentiles, values))
+
+
+class LatencyAggregates:
+    def __init__(self, origin, metrics, histograms, buckets, start, length, width=1.0):
+        self.origin = origin
+        self.metrics = metrics
+        self.histograms = histograms
+        self.buckets = buckets
+        self.start = start
+        self.length = length
+        self.width = width
+
+    @property
+    def seconds(self):
+        return np.arange(self.length) * self.width
+
+    def histogram(self, metric):
+        return self.histograms[self.metrics.index(metric)]
+
+    def percentiles(self, metric='http_req_duration', percentiles=PERCENTILES):
+        rows, bins, counts = self.histogram(metric).cells(self.start)
+        table = self.buckets.sparse_quantiles(rows, bins, counts, self.length,
+                                              [p / 100.0 for p in percentiles])
+        return pd.DataFrame(table, index=pd.Index(self.seconds, name='second'),
+                            columns=[percentile_label(p) for p in percentiles])
+
+    def overall(self, metric='http_req_duration', percentiles=PERCENTILES):
+        merged = self.histogram(metric).merged(np.zeros(self.length, dtype=np.int64), 1, self.start)
+        return self.buckets.quantiles(merged, [p / 100.0 for p in percentiles])[0]
+
+    def heatmap(self, metric='http_req_duration', time_bins=1000, latency_bins=200):
+        """Request counts on a ``latency_bins`` x ``time_bins`` grid.
+
+        Whole groups of time buckets are summed into at most ``time_bins``
+        columns and whole groups of log bins into at most ``latency_bins``
+        rows covering the observed range (equal groups keep the grid free of
+        aliasing stripes), in one ``bincount`` over the non-empty histogram cells, so the
+        cost depends on the cells rather than the number of requests.
+        Returns ``(time_edges, latency_edges, counts)``.
+        """
+        rows, bins, counts = self.histogram(metric).cells(self.start)
+        span = -(-self.length // max(1, time_bins))
+        columns = -(-self.length // span)
+        time_edges = np.arange(columns + 1) * span * self.width
+        if len(counts) == 0:
+            return time_edges, np.array([self.buckets.min_value, self.buckets.max_value]), np.zeros((1, columns))
+        low, high = int(bins.min()), int(bins.max())
+        group = -(-(high - low + 1) // latency_bins)
+        row = (bins - low) // group
+        heights = int(row.max()) + 1
+        lower = self.buckets.min_value * self.buckets.gamma ** (low + np.arange(heights + 1) * group - 1.0)
+        latency_edges = np.maximum(lower, self.buckets.min_value / self.buckets.gamma)
+        column = rows // span
+        grid = np.bincount(row * columns + column, weights=counts, minlength=heights * columns)
+        return time_edges, latency_edges, grid.reshape(heights, columns)
+
+    def phase_percentiles(self, boundaries, metric='http_req_duration', percentiles=PERCENTILES):
+        edges = core.phase_bounds(self.seconds, boundaries)
+        phases = np.repeat(np.arange(len(edges) - 1), np.diff(edges))
+        merged = self.histogram(metric).merged(phases, len(edges) - 1, self.start)
+        return self.buckets.quantiles(merged, [p / 100.0 for p in percentiles])
+
+
+class LatencyAggregator(BucketAggregator):
+    def __init__(self, metrics=LATENCY_METRICS, buckets=None, width=1.0):
+        super().__init__(metrics, width)
+        self.buckets = buckets or LogBuckets()
+        self.histograms = [SparseHistograms(self.buckets.size) for _ in self.metrics]
+
+    def update(self, chunk):
+        selected = self._select(chunk)
+        if selected is None:
+            return
+        rows, offsets, values = selected
+        bins = self.buckets.index(values)
+        for i in np.unique(rows):
+            mask = rows == i
+            self.histograms[i].add(offsets[mask] + self._base, bins[mask])
+
+    def merge(self, other):
+        super().merge(other)
+        for histograms, partial in zip(self.histograms, other.histograms):
+            histograms.merge(partial)
+
+    def result(self):
+        start, length = self._window()
+        return LatencyAggregates(self._origin(start), self.metrics, self.histograms,
+                                 self.buckets, start, length, self.width)
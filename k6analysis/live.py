@@ -0,0 +1,103 @@
+"""Incremental view of a k6 CSV that is still being written.
+
+``CsvTail`` remembers how far into the file it has read and parses only the
+complete lines appended since, reusing the header from the first read, so a
+refresh costs the new rows and the file is never read twice.  The rows go
+to the usual bucket aggregators, which already take chunks in any order.
+``recent_summary`` reports the last few whole buckets per replica; the
+newest bucket is still filling up and is left out.
+"""
+import io
+import os
+
+import numpy as np
+import pandas as pd
+
+from . import core
+from .latency import percentile_label
+from .reader import BASE_COLUMNS, csv_dtypes
+
+MAX_READ_BYTES = 64 * 1024 ** 2
+
+
+class CsvTail:
+    def __init__(self, path, tags=('url',)):
+        self.path = path
+        self.tags = list(tags)
+        self.offset = 0
+        self.rows = 0
+        self._header = None
+        self._inode = None
+
+    def read(self, max_bytes=MAX_READ_BYTES):
+        """Rows appended since the last call as a chunk, or None if there are none yet."""
+        try:
+            st = os.stat(self.path)
+        except FileNotFoundError:
+            return None
+        if self._inode is not None and (st.st_ino != self._inode or st.st_size < self.offset):
+            raise RuntimeError(f"{self.path} was truncated or replaced")
+        if st.st_size <= self.offset:
+            return None
+        with open(self.path, 'rb') as f:
+            f.seek(self.offset)
+            data = f.read(min(st.st_size - self.offset, max_bytes))
+        # Only whole lines; k6 may be in the middle of writing the last one.
+        end = data.rfind(b'\n')
+        if end < 0:
+            return None
+        data = data[:end + 1]
+        self.offset += len(data)
+        self._inode = st.st_ino
+        if self._header is None:
+            split = data.index(b'\n') + 1
+            self._header, data = data[:split], data[split:]
+        if not data:
+            return None
+
+        wanted = set(BASE_COLUMNS) | set(self.tags)
+        chunk = pd.read_csv(io.BytesIO(self._header + data), usecols=lambda c: c in wanted,
+                            dtype=csv_dtypes(self.tags))
+        if len(chunk) == 0:
+            return None
+        chunk['timestamp'] = core.epoch_seconds(chunk['timestamp'].values)
+        self.rows += len(chunk)
+        return chunk
+
+    def drain(self, aggregators, max_bytes=MAX_READ_BYTES):
+        """Feed everything appended so far to ``aggregators``; returns the number of new rows."""
+        before = self.rows
+        while True:
+            chunk = self.read(max_bytes)
+            if chunk is None:
+                return self.rows - before
+            for aggregator in aggregators:
+                aggregator.update(chunk)
+
+
+def recent_summary(replicas, window, percentile=99):
+    """Per-replica and total throughput, error rate and tail latency over the last ``window`` seconds."""
+    length = len(replicas.seconds)
+    hi = length - 1
+    lo = max(0, hi - max(1, int(round(window / replicas.width))))
+    label = percentile_label(percentile)
+    if hi <= lo or not replicas.replicas:
+        return pd.DataFrame(columns=['replica', 'throughput', 'error_pct', label])
+
+    groups = np.full(length, -1, dtype=np.int64)
+    groups[lo:hi] = 0
+    merged = [h.merged(groups, 1, replicas.start) for h in replicas.histograms]
+    series = [(replica, replicas.requests[replica].values, replicas.failures[replica].values, merged[i])
+              for i, replica in enumerate(replicas.replicas)]
+    series.append(('total', replicas.requests.values.sum(axis=1), replicas.failures.values.sum(axis=1),
+                   sum(merged)))
+    rows = []
+    for name, requests, failures, histogram in series:
+        sent = requests[lo:hi].mean()
+        rows.append({
+            'replica': name,
+            'throughput': sent,
+            'error_pct': failures[lo:hi].mean() / sent * 100 if sent else 0.0,
+            label: replicas.buckets.quantiles(histogram, [percentile / 100.0])[0, 0],
+        })
+    return pd.DataFrame(rows)
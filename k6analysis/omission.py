@@ -0,0 +1,178 @@
+"""Intended vs. achieved arrivals and latency corrected for coordinated omission.
+
+Under ``constant-arrival-rate`` k6 starts a scheduled iteration only when a
+VU is free; otherwise it drops it and writes a ``dropped_iterations`` row,
+so after a crash the requests that would have been slowest are the ones
+never sent.  Requests are bucketed by start time (their completion
+bucket moved back by ``http_req_duration``), and the intended arrivals of a
+bucket are the requests started in it plus the iterations dropped.
+
+The corrected latency follows HdrHistogram's ``recordValueWithExpectedInterval``:
+with ``vus`` VUs serving the intended rate, each VU is due to start a request
+every ``I = vus / rate`` seconds, so a request that took ``L > I`` also stands
+for the requests its VU missed meanwhile, recorded as ``L - I``, ``L - 2I``
+and so on down to ``I`` in the buckets those requests were due in.  The
+``vus`` gauge counts allocated VUs, so that estimate alone would also
+backfill runs with VUs to spare, where nothing was omitted: each second gets
+at most as many synthetic samples as ``dropped_iterations`` recorded in it,
+the longest-waiting first.
+Without ``vus`` rows (a trace, or a run from an older load generator) the
+interval is unknown unless ``vus`` is given, and ``correctable`` is false:
+the "corrected" histogram then equals the measured one and must not be
+reported as corrected.
+"""
+import numpy as np
+import pandas as pd
+
+from . import core
+from .latency import LatencyAggregates
+from .reader import BucketAggregator
+from .sketch import LogBuckets, SparseHistograms
+
+OMISSION_METRICS = ['http_req_duration', 'dropped_iterations', 'vus']
+# Synthetic samples added per measured histogram cell at most.
+MAX_BACKFILL = 10_000
+
+
+class OmissionAggregates:
+    def __init__(self, origin, arrivals, latency, width=1.0, correctable=True):
+        self.origin = origin
+        self.arrivals = arrivals
+        self.latency = latency
+        self.width = width
+        self.correctable = correctable
+
+    @property
+    def seconds(self):
+        return self.arrivals.index.values
+
+    def totals(self):
+        intended = self.arrivals['intended'].sum() * self.width
+        dropped = self.arrivals['dropped'].sum() * self.width
+        return {
+            'intended': intended,
+            'achieved': self.arrivals['achieved'].sum() * self.width,
+            'dropped': dropped,
+            'dropped_pct': dropped / intended * 100 if intended else 0.0,
+        }
+
+    def phase_arrivals(self, boundaries, names):
+        rows = []
+        edges = core.phase_bounds(self.seconds, boundaries)
+        for name, a, b in zip(names, edges[:-1], edges[1:]):
+            phase = self.arrivals.iloc[a:b]
+            intended = phase['intended'].sum()
+            rows.append({
+                'phase': name,
+                'intended': phase['intended'].mean() if b > a else None,
+                'achieved': phase['achieved'].mean() if b > a else None,
+                'dropped': phase['dropped'].mean() if b > a else None,
+                'dropped_pct': phase['dropped'].sum() / intended * 100 if intended else 0.0,
+                'buckets': b - a,
+            })
+        return rows
+
+
+class OmissionAggregator(BucketAggregator):
+    def __init__(self, buckets=None, width=1.0, vus=None):
+        super().__init__(OMISSION_METRICS, width)
+        self.buckets = buckets or LogBuckets()
+        # VU count used where the input has no vus rows.
+        self.vus = vus
+        self._allocate('sums', np.float64)
+        self._allocate('counts', np.int64)
+        self.measured = SparseHistograms(self.buckets.size)
+
+    def update(self, chunk):
+        selected = self._select(chunk)
+        if selected is None:
+            return
+        rows, offsets, values = selected
+        buckets = offsets + self._base
+
+        duration = rows == 0
+        if duration.any():
+            # Whole buckets only: k6 timestamps are often truncated to the
+            # second, so subtracting a short duration would shift every
+            # request into the previous bucket.
+            elapsed = np.rint(values[duration] * 1000).astype(np.int64) // self._width_us
+            start_buckets = buckets[duration] - elapsed
+            self.first = min(self.first, int(start_buckets.min()) * self._width_us / 1e6)
+            self._grow(int(start_buckets.min()), int(start_buckets.max()))
+            self._arrays['counts'][0] += np.bincount(start_buckets - self._base, minlength=self._length)
+            self.measured.add(start_buckets, self.buckets.index(values[duration]))
+
+        sums, counts = self._arrays['sums'], self._arrays['counts']
+        for i in (1, 2):
+            mask = rows == i
+            if mask.any():
+                sums[i] += core.bucket_sums(buckets[mask] - self._base, values[mask], self._length)
+                counts[i] += np.bincount(buckets[mask] - self._base, minlength=self._length)
+
+    def merge(self, other):
+        super().merge(other)
+        self.measured.merge(other.measured)
+
+    def _corrected(self, start, interval, dropped):
+        corrected = SparseHistograms(self.buckets.size)
+        rows, bins, counts = self.measured.cells(start)
+        corrected.add(rows + start, bins, counts)
+
+        latency = self.buckets.values()[bins]
+        expected = interval[rows]
+        extra = np.floor(np.divide(latency, expected, out=np.zeros(len(rows)), where=expected > 0)) - 1
+        extra = np.clip(extra, 0, MAX_BACKFILL).astype(np.int64)
+        cells = np.repeat(np.arange(len(rows)), extra)
+        steps = np.arange(len(cells)) - np.repeat(np.cumsum(extra) - extra, extra) + 1
+        delay = steps * expected[cells]
+        # The k-th missed request was due k intervals after the measured one started.
+        later = rows[cells] + (delay / (self.width * 1000)).astype(np.int64)
+        later = np.minimum(later, len(interval) - 1)
+        if len(cells) == 0:
+            return corrected
+
+        # Keep only as many as were dropped, longest waits first.  Drops are
+        # counted per second: k6 timestamps are often whole seconds, so with
+        # finer buckets they all land in a second's first bucket.
+        block = max(1, int(round(1 / self.width)))
+        budget = np.bincount(np.arange(len(dropped)) // block, weights=dropped)
+        values = latency[cells] - delay
+        blocks = later // block
+        order = np.lexsort((-values, blocks))
+        later, blocks, values, weights = later[order], blocks[order], values[order], counts[cells][order]
+        preceding = np.cumsum(weights) - weights
+        first = np.concatenate(([True], blocks[1:] != blocks[:-1]))
+        preceding -= np.maximum.accumulate(np.where(first, preceding, 0))
+        keep = np.clip(np.rint(budget[blocks]).astype(np.int64) - preceding, 0, weights)
+        kept = keep > 0
+        corrected.add(later[kept] + start, self.buckets.index(values[kept]), keep[kept])
+        return corrected
+
+    def result(self):
+        start, length = self._window()
+        sums = self._aligned('sums', start, length)
+        counts = self._aligned('counts', start, length)
+        achieved = counts[0] / self.width
+        dropped = sums[1] / self.width
+        intended = achieved + dropped
+        # vus is a gauge sampled about once a second; carry it across empty buckets.
+        vus = pd.Series(np.divide(sums[2], counts[2], out=np.full(length, np.nan), where=counts[2] > 0))
+        vus = vus.ffill().bfill().values
+        if self.vus is not None:
+            vus = np.where(np.isnan(vus), float(self.vus), vus)
+        correctable = bool(np.isfinite(vus).any())
+
+        # Milliseconds between the starts each VU is due for; 0 where unknown.
+        interval = np.divide(vus, intended, out=np.zeros(length), where=(intended > 0) & ~np.isnan(vus)) * 1000
+        arrivals = pd.DataFrame({
+            'intended': intended,
+            'achieved': achieved,
+            'dropped': dropped,
+            'vus': vus,
+            'expected_interval': interval,
+        }, index=self._index(length))
+
+        latency = LatencyAggregates(self._origin(start), ['measured', 'corrected'],
+                                    [self.measured, self._corrected(start, interval, sums[1])],
+                                    self.buckets, start, length, self.width)
+        return OmissionAggregates(self._origin(start), arrivals, latency, self.width, correctable)
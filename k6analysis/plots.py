@@ -0,0 +1,96 @@
+"""Shared plotting helpers.
+
+Importing this module loads matplotlib with the non-interactive Agg
+backend, so scripts import it only when a figure is actually drawn.  Long
+series are decimated to ``MAX_PLOT_POINTS`` before drawing, keeping the
+minimum and maximum of every block so short failover dips stay visible.
+"""
+import matplotlib
+
+matplotlib.use('Agg')
+import matplotlib.pyplot as plt
+import numpy as np
+
+PERCENTILE_STYLES = ['g-', 'b-', 'm-', 'r-']
+DEFAULT_DPI = 300
+MAX_PLOT_POINTS = 2000
+
+
+def downsample_index(values, max_points=MAX_PLOT_POINTS):
+    values = np.asarray(values, dtype=np.float64)
+    if max_points <= 0 or len(values) <= max_points:
+        return np.arange(len(values))
+    block = int(np.ceil(len(values) / max(max_points // 2, 1)))
+    padded = np.full(-(-len(values) // block) * block, np.nan)
+    padded[:len(values)] = values
+    blocks = padded.reshape(-1, block)
+    missing = np.isnan(blocks)
+    starts = np.arange(blocks.shape[0]) * block
+    low = np.where(missing, np.inf, blocks).argmin(axis=1) + starts
+    high = np.where(missing, -np.inf, blocks).argmax(axis=1) + starts
+    index = np.unique(np.concatenate((low, high)))
+    return index[index < len(values)]
+
+
+def downsample(x, y, max_points=MAX_PLOT_POINTS):
+    index = downsample_index(y, max_points)
+    return np.asarray(x)[index], np.asarray(y)[index]
+
+
+def save_figure(path, dpi=DEFAULT_DPI):
+    plt.tight_layout()
+    plt.savefig(path, dpi=dpi)
+    plt.close()
+
+
+def plot_crash_markers(crash_times, text_y=None):
+    for crash_time in crash_times:
+        plt.axvline(x=crash_time, color='r', linestyle='--', linewidth=2)
+        if text_y is not None:
+            plt.text(crash_time + 1, text_y,
+                    "Server\ncrashed",
+                    verticalalignment='top')
+
+
+def plot_latency_percentiles(latency, crash_times, metric='http_req_duration', max_points=MAX_PLOT_POINTS):
+    table = latency.percentiles(metric)
+    for column, style in zip(table.columns, PERCENTILE_STYLES):
+        plt.plot(*downsample(table.index, table[column], max_points), style, linewidth=1.5, label=column)
+    plt.yscale('log')
+    plt.ylabel(f'{metric} (ms)')
+    plt.xlabel('Time since test start (s)')
+    plt.title('Latency Percentiles')
+    plt.grid(True, which='both', linestyle='--', alpha=0.5)
+    plt.legend(loc='upper left')
+    plot_crash_markers(crash_times)
+
+
+def plot_resource(resources, metric, ylabel, crash_times, max_points=MAX_PLOT_POINTS, order=()):
+    # Replicas listed in ``order`` come first, so they get the same colours
+    # as in the panels drawn from the k6 data.
+    table = resources.table(metric)
+    replicas = [r for r in order if r in table.columns] + [r for r in table.columns if r not in order]
+    for replica in replicas:
+        plt.plot(*downsample(table.index, table[replica], max_points), linewidth=1.5, label=f'Replica {replica}')
+    plt.ylabel(ylabel)
+    plt.xlabel('Time since test start (s)')
+    plt.grid(True, linestyle='--', alpha=0.5)
+    plt.legend(loc='upper left')
+    plot_crash_markers(crash_times)
+
+
+def plot_latency_heatmap(latency, crash_times, metric='http_req_duration', time_bins=1000, latency_bins=200):
+    # A single mesh of at most time_bins x latency_bins cells, however many
+    # requests went into it; empty cells are left transparent.
+    from matplotlib.colors import LogNorm
+
+    time_edges, latency_edges, counts = latency.heatmap(metric, time_bins, latency_bins)
+    counts = np.ma.masked_equal(counts, 0)
+    mesh = plt.pcolormesh(time_edges, latency_edges, counts, cmap='viridis', rasterized=True,
+                          norm=LogNorm(vmin=1, vmax=max(counts.max(), 1)) if counts.count() else None)
+    plt.colorbar(mesh, label=f'Requests per cell ({time_edges[1] - time_edges[0]:.3g} s)')
+    plt.yscale('log')
+    plt.ylabel(f'{metric} (ms)')
+    plt.xlabel('Time since test start (s)')
+    plt.title('Latency Heatmap')
+    plot_crash_markers(crash_times)
@@ -0,0 +1,334 @@
+"""Streaming reader for k6 ``--out csv`` files.
+
+The CSV is read in fixed-size chunks with only the columns we need and
+compact dtypes, and every chunk is folded into per-second aggregates before
+the next one is read, so peak memory does not depend on the request count.
+Buckets are ``width`` seconds wide (1 s by default, 10 ms to 10 s) and laid
+out on an absolute grid, so gaps in the data simply stay zero.
+Parsed columns are kept in the columnar cache (see ``cache.py``) so the
+next analysis of the same file skips the CSV entirely.
+
+With ``jobs`` above one, an uncached CSV is split into line-aligned byte
+ranges that worker processes parse and aggregate on their own; the partial
+aggregates are then merged, which gives the same result as one pass.
+"""
+import os
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+import pandas as pd
+
+from . import cache, columns, core, trace
+
+BASE_COLUMNS = ['metric_name', 'timestamp', 'metric_value']
+THROUGHPUT_METRICS = ['http_reqs', 'http_req_failed', 'checks']
+CHUNK_ROWS = 500_000
+# Smaller ranges are not worth a worker process.
+MIN_RANGE_BYTES = 32 * 1024 ** 2
+
+
+def csv_dtypes(tags=()):
+    dtypes = {
+        'metric_name': 'category',
+        'timestamp': 'float64',
+        'metric_value': 'float32',
+    }
+    for tag in tags:
+        dtypes[tag] = 'category'
+    return dtypes
+
+
+def iter_k6_chunks(path, tags=(), chunksize=CHUNK_ROWS, use_cache=True):
+    tags = list(tags)
+    if columns.is_column_store(path):
+        yield from columns.ColumnStore(path).iter_chunks(tags, chunksize)
+        return
+    if trace.is_trace(path):
+        yield from trace.Trace(path).iter_chunks(tags, chunksize)
+        return
+    if use_cache and set(tags) <= set(cache.CACHED_TAGS):
+        entry = cache.lookup(path)
+        if entry is not None:
+            yield from entry.iter_chunks(tags, chunksize)
+            return
+        try:
+            writer = cache.CacheWriter(path)
+            parsed_tags = cache.CACHED_TAGS
+        except OSError as e:
+            print(f"Not caching {path}: {e}")
+            writer = None
+            parsed_tags = tags
+    else:
+        writer = None
+        parsed_tags = tags
+
+    try:
+        for chunk in _csv_chunks(path, parsed_tags, chunksize):
+            if writer is not None:
+                writer.append(chunk)
+            yield chunk[[c for c in BASE_COLUMNS + tags if c in chunk]]
+    except BaseException:
+        if writer is not None:
+            writer.abort()
+        raise
+    if writer is not None:
+        writer.commit()
+
+
+def _csv_chunks(source, tags, chunksize):
+    wanted = set(BASE_COLUMNS) | set(tags)
+    reader = pd.read_csv(source, usecols=lambda c: c in wanted, dtype=csv_dtypes(tags),
+                         chunksize=chunksize)
+    with reader:
+        for chunk in reader:
+            if len(chunk) == 0:
+                continue
+            chunk['timestamp'] = core.epoch_seconds(chunk['timestamp'].values)
+            yield chunk
+
+
+def byte_ranges(path, parts):
+    """Return the header line and up to ``parts`` ``(start, end)`` ranges covering the rows.
+
+    Every range starts at the beginning of a line and ends after a newline
+    (or at the end of the file), so no row is split between two ranges.
+    """
+    with open(path, 'rb') as f:
+        header = f.readline()
+        size = os.fstat(f.fileno()).st_size
+        cuts = [f.tell()]
+        for i in range(1, parts):
+            target = cuts[0] + (size - cuts[0]) * i // parts
+            if target <= cuts[-1]:
+                continue
+            f.seek(target - 1)
+            f.readline()
+            if cuts[-1] < f.tell() < size:
+                cuts.append(f.tell())
+        cuts.append(size)
+    return header, [(start, end) for start, end in zip(cuts[:-1], cuts[1:]) if end > start]
+
+
+class ByteRange:
+    """Read-only file object over ``[start, end)`` of a CSV, preceded by its header."""
+
+    def __init__(self, path, header, start, end):
+        self._file = open(path, 'rb')
+        self._file.seek(start)
+        self._head = header
+        self._left = end - start
+
+    def read(self, size=-1):
+        if size is None or size < 0:
+            size = len(self._head) + self._left
+        data = self._head[:size]
+        self._head = self._head[size:]
+        if len(data) < size and self._left > 0:
+            more = self._file.read(min(size - len(data), self._left))
+            self._left -= len(more)
+            data += more
+        return data
+
+    def close(self):
+        self._file.close()
+
+
+def iter_csv_range(path, header, start, end, tags=(), chunksize=CHUNK_ROWS):
+    source = ByteRange(path, header, start, end)
+    try:
+        for chunk in _csv_chunks(source, list(tags), chunksize):
+            yield chunk
+    finally:
+        source.close()
+
+
+class SecondAggregates:
+    def __init__(self, origin, sums, counts, width=1.0):
+        self.origin = origin
+        self.sums = sums
+        self.counts = counts
+        self.width = width
+
+    @property
+    def seconds(self):
+        return self.sums.index.values
+
+    @property
+    def rates(self):
+        return self.sums / self.width
+
+    def has_rows(self, metric):
+        return metric in self.counts and self.counts[metric].sum() > 0
+
+
+class BucketAggregator:
+    """Base for aggregators that keep per-bucket arrays for a set of metrics.
+
+    Arrays are indexed ``[metric, bucket, ...]`` on absolute bucket numbers
+    and grow as chunks arrive, so chunks do not have to be in timestamp order.
+    Subclasses that need tag columns list them in ``tags``.
+    """
+
+    tags = ()
+
+    def __init__(self, metrics, width=1.0):
+        self.metrics = list(metrics)
+        self.width = width
+        self._width_us = core.bucket_width_us(width)
+        self.first = None
+        self.last = None
+        self._base = None
+        self._arrays = {}
+
+    def _allocate(self, name, dtype, suffix=()):
+        self._arrays[name] = np.zeros((len(self.metrics), 0) + tuple(suffix), dtype=dtype)
+
+    @property
+    def _length(self):
+        if not self._arrays:
+            return 0
+        return next(iter(self._arrays.values())).shape[1]
+
+    def _grow(self, lo, hi):
+        if self._base is None:
+            self._base = lo
+        before = max(0, self._base - lo)
+        after = max(0, hi + 1 - (self._base + self._length))
+        if before or after:
+            for name, array in self._arrays.items():
+                widths = [(0, 0)] * array.ndim
+                widths[1] = (before, after)
+                self._arrays[name] = np.pad(array, widths)
+            self._base -= before
+
+    def _select(self, chunk, *columns):
+        ts = chunk['timestamp'].values
+        lo, hi = ts.min(), ts.max()
+        self.first = lo if self.first is None else min(self.first, lo)
+        self.last = hi if self.last is None else max(self.last, hi)
+
+        rows = core.metric_rows(chunk['metric_name'], self.metrics)
+        keep = rows >= 0
+        if not keep.any():
+            return None
+
+        buckets = core.bucket_index(ts[keep], self._width_us)
+        self._grow(int(buckets.min()), int(buckets.max()))
+        values = chunk['metric_value'].values[keep].astype(np.float64)
+        return (rows[keep], buckets - self._base, values) + tuple(c[keep] for c in columns)
+
+    def merge(self, other):
+        """Add the partial aggregates of ``other``, built with the same settings.
+
+        ``other`` must not be used afterwards.
+        """
+        if other.first is None:
+            return
+        self.first = other.first if self.first is None else min(self.first, other.first)
+        self.last = other.last if self.last is None else max(self.last, other.last)
+        if other._base is None:
+            return
+        self._grow(other._base, other._base + other._length - 1)
+        offset = other._base - self._base
+        for name, array in self._arrays.items():
+            array[:, offset:offset + other._length] += other._arrays[name]
+
+    def _window(self):
+        # First bucket (absolute) and bucket count, spanning all rows read.
+        if self.first is None:
+            raise ValueError("no metric rows found")
+        first, last = core.bucket_index([self.first, self.last], self._width_us)
+        return int(first), int(last - first) + 1
+
+    def _origin(self, start):
+        return start * self._width_us / 1e6
+
+    def _index(self, length):
+        return pd.Index(np.arange(length) * self.width, name='second')
+
+    def _aligned(self, name, start, length):
+        array = self._arrays[name]
+        out = np.zeros((array.shape[0], length) + array.shape[2:], dtype=array.dtype)
+        if self._base is not None:
+            offset = self._base - start
+            out[:, offset:offset + array.shape[1]] = array
+        return out
+
+
+class SecondAggregator(BucketAggregator):
+    def __init__(self, metrics=THROUGHPUT_METRICS, width=1.0):
+        super().__init__(metrics, width)
+        self._allocate('sums', np.float64)
+        self._allocate('counts', np.int64)
+
+    def update(self, chunk):
+        selected = self._select(chunk)
+        if selected is None:
+            return
+        rows, offsets, values = selected
+        sums, counts = self._arrays['sums'], self._arrays['counts']
+        for i in np.unique(rows):
+            mask = rows == i
+            sums[i] += core.bucket_sums(offsets[mask], values[mask], self._length)
+            counts[i] += np.bincount(offsets[mask], minlength=self._length)
+
+    def result(self):
+        start, length = self._window()
+        index = self._index(length)
+        return SecondAggregates(
+            self._origin(start),
+            pd.DataFrame(self._aligned('sums', start, length).T, index=index, columns=self.metrics),
+            pd.DataFrame(self._aligned('counts', start, length).T, index=index, columns=self.metrics),
+            self.width,
+        )
+
+
+def aggregate_range(path, header, start, end, aggregators, chunksize=CHUNK_ROWS):
+    # Runs in a worker process; the partial aggregators are sent back.
+    tags = sorted({tag for aggregator in aggregators for tag in aggregator.tags})
+    for chunk in iter_csv_range(path, header, start, end, tags, chunksize):
+        for aggregator in aggregators:
+            aggregator.update(chunk)
+    return aggregators
+
+
+def _parallel_ranges(path, tags, jobs, use_cache):
+    # Ranges to parse in parallel, or None when the serial path is as good.
+    if jobs <= 1 or columns.is_column_store(path) or trace.is_trace(path):
+        return None
+    if use_cache and set(tags) <= set(cache.CACHED_TAGS) and cache.lookup(path) is not None:
+        return None
+    parts = min(jobs, os.path.getsize(path) // MIN_RANGE_BYTES)
+    if parts <= 1:
+        return None
+    header, ranges = byte_ranges(path, parts)
+    return (header, ranges) if len(ranges) > 1 else None
+
+
+def aggregate(path, aggregators, chunksize=CHUNK_ROWS, use_cache=True, jobs=1):
+    """Feed every chunk of ``path`` to the aggregators and return their results.
+
+    ``jobs`` above one (0 for one per CPU) parses an uncached CSV in that
+    many processes.  The parallel path does not write the columnar cache.
+    """
+    tags = sorted({tag for aggregator in aggregators for tag in aggregator.tags})
+    split = _parallel_ranges(path, tags, jobs or os.cpu_count() or 1, use_cache)
+    if split is None:
+        for chunk in iter_k6_chunks(path, tags=tags, chunksize=chunksize, use_cache=use_cache):
+            for aggregator in aggregators:
+                aggregator.update(chunk)
+        return [aggregator.result() for aggregator in aggregators]
+
+    header, ranges = split
+    with ProcessPoolExecutor(max_workers=len(ranges)) as pool:
+        futures = [pool.submit(aggregate_range, path, header, start, end, aggregators, chunksize)
+                   for start, end in ranges]
+        # Merged in file order, the order in which the serial pass reads the rows.
+        for future in futures:
+            for aggregator, partial in zip(aggregators, future.result()):
+                aggregator.merge(partial)
+    return [aggregator.result() for aggregator in aggregators]
+
+
+def read_k6_aggregates(path, metrics=THROUGHPUT_METRICS, chunksize=CHUNK_ROWS, use_cache=True, width=1.0, jobs=1):
+    return aggregate(path, [SecondAggregator(metrics, width)], chunksize, use_cache, jobs)[0]
@@ -0,0 +1,141 @@
+"""Failover recovery metrics computed from a throughput series.
+
+For every crash the steady-state baseline is taken from the buckets just
+before it, and the dip depth, time back inside a tolerance band around that
+baseline and the request deficit accumulated until then are derived from
+the buckets after it.  The moment the system actually degraded is found with
+a vectorized two-window mean-shift detector, independently of the scheduled
+crash time.  The partial first and last buckets are left out throughout.
+"""
+import numpy as np
+
+from . import core
+
+BASELINE_WINDOW = 10.0
+TOLERANCE = 0.1
+# Both in seconds, converted to whole buckets for the series' bucket width.
+HOLD_TIME = 3.0
+DETECTION_WINDOW = 3.0
+SEARCH_WINDOW = 10.0
+
+
+def window_means(values, width):
+    # Mean of values[k - width:k] and values[k:k + width] for every k.
+    cumulative = np.concatenate(([0.0], np.cumsum(values)))
+    k = np.arange(len(values) + 1)
+    lo = np.maximum(k - width, 0)
+    hi = np.minimum(k + width, len(values))
+    with np.errstate(invalid='ignore', divide='ignore'):
+        left = (cumulative[k] - cumulative[lo]) / (k - lo)
+        right = (cumulative[hi] - cumulative[k]) / (hi - k)
+    return left, right
+
+
+def detect_degradation(seconds, throughputs, start, stop, width=3, min_drop=0.0):
+    seconds = np.asarray(seconds, dtype=np.float64)
+    values = np.asarray(throughputs, dtype=np.float64)
+    left, right = window_means(values, width)
+    drop = left - right
+    candidates = np.arange(len(values) + 1)
+    valid = (candidates >= width) & (candidates <= len(values) - width)
+    lo, hi = np.searchsorted(seconds, [start, stop], side='left')
+    valid &= (candidates >= lo) & (candidates <= hi)
+    if not valid.any():
+        return np.nan
+    best = np.where(valid, drop, -np.inf).argmax()
+    if not drop[best] > min_drop or best >= len(seconds):
+        return np.nan
+    return seconds[best]
+
+
+def sustained_start(mask, hold):
+    # First index from which mask stays true for `hold` consecutive buckets.
+    if len(mask) < hold:
+        return None
+    runs = np.convolve(mask.astype(np.int64), np.ones(hold, dtype=np.int64), mode='valid')
+    hits = np.flatnonzero(runs == hold)
+    return int(hits[0]) if len(hits) else None
+
+
+def recovery_metrics(seconds, throughputs, crash_times, width=1.0,
+                     baseline_window=BASELINE_WINDOW, tolerance=TOLERANCE, hold=HOLD_TIME):
+    seconds, values = core.whole_buckets(np.asarray(seconds, dtype=np.float64),
+                                         np.asarray(throughputs, dtype=np.float64))
+    hold = max(int(round(hold / width)), 1)
+    detection_window = max(int(round(DETECTION_WINDOW / width)), 1)
+    crash_times = sorted(crash_times)
+    results = []
+
+    for i, crash in enumerate(crash_times):
+        previous = crash_times[i - 1] if i > 0 else -np.inf
+        following = crash_times[i + 1] if i + 1 < len(crash_times) else np.inf
+
+        base_lo = np.searchsorted(seconds, max(crash - baseline_window, previous), side='left')
+        base_hi = np.searchsorted(seconds, crash - width, side='right')
+        post_lo = max(np.searchsorted(seconds, crash, side='right') - 1, 0)
+        post_hi = np.searchsorted(seconds, following, side='left')
+
+        metrics = {
+            'crash_time': crash,
+            'baseline': np.nan,
+            'min_throughput': np.nan,
+            'dip_depth': np.nan,
+            'dip_depth_pct': np.nan,
+            'time_to_recover': np.nan,
+            'deficit': np.nan,
+            'detected_time': np.nan,
+            'detection_lag': np.nan,
+        }
+        results.append(metrics)
+        if base_hi <= base_lo or post_hi <= post_lo:
+            continue
+
+        baseline = float(np.median(values[base_lo:base_hi]))
+        after = values[post_lo:post_hi]
+        metrics['baseline'] = baseline
+        metrics['min_throughput'] = float(after.min())
+        metrics['dip_depth'] = max(baseline - float(after.min()), 0.0)
+        if baseline > 0:
+            metrics['dip_depth_pct'] = metrics['dip_depth'] / baseline * 100
+
+        within = np.abs(after - baseline) <= tolerance * baseline
+        outside = np.flatnonzero(~within)
+        if len(outside) == 0:
+            recovered = 0
+        else:
+            recovered = sustained_start(within[outside[0]:], hold)
+            if recovered is not None:
+                recovered += outside[0]
+        end = recovered if recovered is not None else len(after)
+        if recovered is not None:
+            metrics['time_to_recover'] = max(seconds[post_lo + recovered] - crash, 0.0)
+        metrics['deficit'] = float(np.clip(baseline - after[:end], 0, None).sum() * width)
+
+        search_lo = max(crash - SEARCH_WINDOW, (previous + crash) / 2)
+        search_hi = min(crash + SEARCH_WINDOW, (crash + following) / 2)
+        detected = detect_degradation(seconds, values, search_lo, search_hi,
+                                      width=detection_window, min_drop=tolerance * baseline)
+        metrics['detected_time'] = detected
+        metrics['detection_lag'] = detected - crash
+
+    return results
+
+
+def print_recovery_report(results):
+    for metrics in results:
+        print(f"\nRecovery after crash at {metrics['crash_time']:.2f}s:")
+        if np.isnan(metrics['baseline']):
+            print("  Not enough data around this crash")
+            continue
+        print(f"  Baseline: {metrics['baseline']:.2f} req/s")
+        print(f"  Dip depth: {metrics['dip_depth']:.2f} req/s ({metrics['dip_depth_pct']:.1f}%)")
+        if np.isnan(metrics['time_to_recover']):
+            print("  Time to recover: not recovered")
+        else:
+            print(f"  Time to recover: {metrics['time_to_recover']:.2f} s")
+        print(f"  Request deficit: {metrics['deficit']:.0f} requests")
+        if np.isnan(metrics['detected_time']):
+            print("  Degradation detected: none")
+        else:
+            print(f"  Degradation detected at {metrics['detected_time']:.2f}s "
+                  f"({metrics['detection_lag']:+.2f}s vs scheduled)")
@@ -0,0 +1,163 @@
+"""Per-replica throughput, error rate and latency over time.
+
+k6 tags every request row with its ``url``, which carries the replica port.
+The tag is read as a categorical, its few categories are mapped to replica
+labels once per chunk, and all per-bucket, per-replica sums are built with a
+single ``np.bincount`` over combined ``(bucket, replica)`` indices.  Latency
+is kept in one sparse histogram set per replica.
+"""
+import re
+
+import numpy as np
+import pandas as pd
+
+from . import core
+from .latency import percentile_label
+from .reader import BucketAggregator
+from .sketch import LogBuckets, SparseHistograms
+
+REPLICA_METRICS = ['http_reqs', 'http_req_failed', 'http_req_duration']
+PORT_PATTERN = re.compile(r'://[^/:]+:(\d+)')
+
+
+def replica_label(url):
+    match = PORT_PATTERN.search(str(url))
+    return match.group(1) if match else str(url)
+
+
+class ReplicaAggregates:
+    def __init__(self, origin, replicas, sums, histograms, buckets, start, width=1.0):
+        self.origin = origin
+        self.replicas = replicas
+        self.buckets = buckets
+        self.start = start
+        self.width = width
+        index = pd.Index(np.arange(sums.shape[1]) * width, name='second')
+        # Requests and failures per second, whatever the bucket width.
+        self.requests = pd.DataFrame(sums[0] / width, index=index, columns=replicas)
+        self.failures = pd.DataFrame(sums[1] / width, index=index, columns=replicas)
+        self.histograms = histograms
+
+    @property
+    def seconds(self):
+        return self.requests.index.values
+
+    @property
+    def error_rate(self):
+        return (self.failures / self.requests.where(self.requests > 0)).fillna(0.0)
+
+    def latency(self, percentile=99):
+        table = {}
+        length = len(self.requests)
+        for replica, histograms in zip(self.replicas, self.histograms):
+            rows, bins, counts = histograms.cells(self.start)
+            table[replica] = self.buckets.sparse_quantiles(rows, bins, counts, length,
+                                                           [percentile / 100.0])[:, 0]
+        return pd.DataFrame(table, index=self.requests.index)
+
+    def phase_summary(self, boundaries, percentile=99):
+        edges = core.phase_bounds(self.seconds, boundaries)
+        phases = np.repeat(np.arange(len(edges) - 1), np.diff(edges))
+        merged = [h.merged(phases, len(edges) - 1, self.start) for h in self.histograms]
+        rows = []
+        for phase, (a, b) in enumerate(zip(edges[:-1], edges[1:])):
+            if b <= a:
+                continue
+            requests = self.requests.iloc[a:b]
+            total = requests.values.sum()
+            for i, replica in enumerate(self.replicas):
+                sent = requests[replica].sum()
+                tail = self.buckets.quantiles(merged[i][phase], [percentile / 100.0])[0, 0]
+                rows.append({
+                    'phase': phase,
+                    'replica': replica,
+                    'throughput': sent / (b - a),
+                    'share_pct': sent / total * 100 if total else 0.0,
+                    'error_pct': self.failures[replica].iloc[a:b].sum() / sent * 100 if sent else 0.0,
+                    percentile_label(percentile): tail,
+                })
+        return pd.DataFrame(rows)
+
+
+class ReplicaAggregator(BucketAggregator):
+    tags = ('url',)
+
+    def __init__(self, buckets=None, width=1.0):
+        super().__init__(REPLICA_METRICS, width)
+        self.buckets = buckets or LogBuckets(relative_accuracy=0.02)
+        self.replicas = []
+        self._allocate('sums', np.float64, (0,))
+        # Only http_req_duration needs histograms, one sparse set per replica.
+        self.histograms = []
+
+    def _replica_codes(self, urls):
+        if not isinstance(urls.dtype, pd.CategoricalDtype):
+            urls = urls.astype('category')
+        lookup = []
+        for url in urls.cat.categories:
+            label = replica_label(url)
+            if label not in self.replicas:
+                self.replicas.append(label)
+            lookup.append(self.replicas.index(label))
+        lookup = np.array(lookup + [-1], dtype=np.int64)
+        return lookup[urls.cat.codes.values]
+
+    def _grow_replicas(self):
+        missing = len(self.replicas) - self._arrays['sums'].shape[2]
+        if missing > 0:
+            for name, array in self._arrays.items():
+                widths = [(0, 0)] * array.ndim
+                widths[2] = (0, missing)
+                self._arrays[name] = np.pad(array, widths)
+        while len(self.histograms) < len(self.replicas):
+            self.histograms.append(SparseHistograms(self.buckets.size))
+
+    def update(self, chunk):
+        if 'url' not in chunk:
+            return
+        codes = self._replica_codes(chunk['url'])
+        self._grow_replicas()
+        selected = self._select(chunk, codes)
+        if selected is None:
+            return
+        rows, offsets, values, replicas = selected
+        tagged = replicas >= 0
+        rows, offsets, values, replicas = rows[tagged], offsets[tagged], values[tagged], replicas[tagged]
+        if len(rows) == 0:
+            return
+
+        width = len(self.replicas)
+        cells = self._length * width
+        sums = self._arrays['sums']
+        for i in np.unique(rows):
+            mask = rows == i
+            flat = offsets[mask] * width + replicas[mask]
+            sums[i] += core.bucket_sums(flat, values[mask], cells).reshape(self._length, width)
+
+        mask = rows == 2
+        if mask.any():
+            bins = self.buckets.index(values[mask])
+            for replica in np.unique(replicas[mask]):
+                picked = replicas[mask] == replica
+                self.histograms[replica].add(offsets[mask][picked] + self._base, bins[picked])
+
+    def merge(self, other):
+        for label in other.replicas:
+            if label not in self.replicas:
+                self.replicas.append(label)
+        self._grow_replicas()
+        # Move the other's replica columns to this aggregator's numbering.
+        columns = np.array([self.replicas.index(label) for label in other.replicas], dtype=np.int64)
+        sums = other._arrays['sums']
+        remapped = np.zeros(sums.shape[:2] + (len(self.replicas),), dtype=sums.dtype)
+        remapped[:, :, columns] = sums
+        other._arrays['sums'] = remapped
+        super().merge(other)
+        for column, histograms in zip(columns, other.histograms):
+            self.histograms[column].merge(histograms)
+
+    def result(self):
+        start, length = self._window()
+        sums = self._aligned('sums', start, length)
+        return ReplicaAggregates(self._origin(start), list(self.replicas), sums, self.histograms,
+                                 self.buckets, start, self.width)
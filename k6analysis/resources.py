@@ -0,0 +1,61 @@
+"""Replica resource samples written by ``harness/sampler.py``.
+
+The sampler writes one row per port per sample with epoch timestamps; here
+they are moved onto the run's time axis (seconds since the origin of the k6
+aggregates) and pivoted into one column per replica, so they can be drawn
+under the throughput and latency plots and summarised per phase.
+"""
+import numpy as np
+import pandas as pd
+
+from . import core
+
+RESOURCE_METRICS = {
+    'cpu_pct': 'CPU (% of one core)',
+    'rss_mb': 'RSS (MB)',
+    'threads': 'Threads',
+    'voluntary_ctxt': 'Voluntary context switches/s',
+    'involuntary_ctxt': 'Involuntary context switches/s',
+    'sockets': 'Open sockets',
+}
+
+
+class ResourceSeries:
+    def __init__(self, samples):
+        self.samples = samples
+        self.replicas = [str(port) for port in sorted(samples['port'].unique())]
+
+    def table(self, metric):
+        """Seconds x replicas table of one metric; NaN where a replica was down."""
+        table = self.samples.pivot(index='second', columns='port', values=metric)
+        table.columns = [str(port) for port in table.columns]
+        return table.reindex(columns=self.replicas)
+
+    def phase_means(self, boundaries, names, metrics=('cpu_pct', 'rss_mb', 'voluntary_ctxt', 'sockets')):
+        tables = {metric: self.table(metric) for metric in metrics}
+        edges = core.phase_bounds(tables[metrics[0]].index.values, boundaries)
+        rows = []
+        for name, a, b in zip(names, edges[:-1], edges[1:]):
+            for replica in self.replicas:
+                row = {'phase': name, 'replica': replica}
+                for metric, table in tables.items():
+                    values = table[replica].values[a:b]
+                    row[metric] = float(np.nanmean(values)) if np.isfinite(values).any() else None
+                rows.append(row)
+        return rows
+
+
+def load_resources(path, origin):
+    samples = pd.read_csv(path)
+    if samples.empty:
+        raise ValueError(f"no resource samples in {path}")
+    samples['second'] = samples['timestamp'] - origin
+    return ResourceSeries(samples)
+
+
+def print_resource_report(rows):
+    print("\nReplica resources (phase means):")
+    for row in rows:
+        values = [f"{metric}={row[metric]:.1f}" if row[metric] is not None else f"{metric}=n/a"
+                  for metric in row if metric not in ('phase', 'replica')]
+        print(f"{row['phase']}, replica {row['replica']}: {', '.join(values)}")
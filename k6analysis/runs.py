@@ -0,0 +1,154 @@
+"""Combining repeated runs of the same scenario.
+
+Every run directory is loaded in its own worker process and reduced there to
+its per-bucket throughput series and recovery metrics, so only a few
+kilobytes per run travel back to the parent.  The runs are then shifted onto
+a common axis on which the chosen crash happens at t = 0 and averaged with a
+Student-t confidence band.
+"""
+import os
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+
+from . import core, recovery
+from .reader import SecondAggregator, aggregate
+
+OUTPUT_NAMES = ['k6_metrics.cols', 'k6_metrics.csv']
+CRASH_TIMES_FILE = 'crash_times.txt'
+RECOVERY_FIELDS = ['baseline', 'dip_depth', 'dip_depth_pct', 'time_to_recover', 'deficit', 'detection_lag']
+# Two-sided 95% Student-t critical values, keyed by degrees of freedom.
+# Degrees of freedom between two keys use the smaller key (a wider band).
+T_CRITICAL_95 = {
+    1: 12.706, 2: 4.303, 3: 3.182, 4: 2.776, 5: 2.571, 6: 2.447, 7: 2.365,
+    8: 2.306, 9: 2.262, 10: 2.228, 12: 2.179, 15: 2.131, 20: 2.086,
+    30: 2.042, 60: 2.000, 120: 1.980,
+}
+
+
+def t_critical(dof):
+    dof = np.asarray(dof)
+    keys = np.array(sorted(T_CRITICAL_95))
+    values = np.array([T_CRITICAL_95[k] for k in keys] + [np.nan])
+    index = np.searchsorted(keys, dof, side='right') - 1
+    return np.where(dof >= 1, values[index], np.nan)
+
+
+def mean_interval(values, axis=0):
+    """Mean, 95% half-width and sample count, ignoring NaNs."""
+    values = np.asarray(values, dtype=np.float64)
+    counts = np.sum(~np.isnan(values), axis=axis)
+    with np.errstate(invalid='ignore', divide='ignore'):
+        totals = np.nansum(values, axis=axis)
+        mean = np.where(counts > 0, totals / np.maximum(counts, 1), np.nan)
+        squares = np.nansum((values - np.expand_dims(mean, axis)) ** 2, axis=axis)
+        std = np.sqrt(squares / (counts - 1))
+        half = t_critical(counts - 1) * std / np.sqrt(counts)
+    return mean, half, counts
+
+
+def find_k6_output(run_dir):
+    for name in OUTPUT_NAMES:
+        path = os.path.join(run_dir, name)
+        if os.path.exists(path):
+            return path
+    raise FileNotFoundError(f"no {' or '.join(OUTPUT_NAMES)} in {run_dir}")
+
+
+class RunSeries:
+    def __init__(self, name, seconds, throughputs, crash_times, recovery, width):
+        self.name = name
+        self.seconds = seconds
+        self.throughputs = throughputs
+        self.crash_times = crash_times
+        self.recovery = recovery
+        self.width = width
+
+
+def load_run(run_dir, width=1.0, successful=False, use_cache=True):
+    if successful:
+        aggregator = SecondAggregator(width=width)
+    else:
+        aggregator = SecondAggregator(['http_reqs'], width=width)
+    aggregates = aggregate(find_k6_output(run_dir), [aggregator], use_cache=use_cache)[0]
+    if successful:
+        throughputs = core.successful_series(aggregates)
+    else:
+        throughputs = aggregates.rates['http_reqs'].values
+    crash_times = sorted(core.load_crash_times(os.path.join(run_dir, CRASH_TIMES_FILE), default=[],
+                                               origin=aggregates.origin))
+    metrics = recovery.recovery_metrics(aggregates.seconds, throughputs, crash_times, width=width)
+    return RunSeries(os.path.basename(os.path.normpath(run_dir)), aggregates.seconds, throughputs,
+                     crash_times, metrics, width)
+
+
+def load_runs(run_dirs, jobs=None, **kwargs):
+    runs = []
+    with ProcessPoolExecutor(max_workers=jobs) as pool:
+        futures = [pool.submit(load_run, run_dir, **kwargs) for run_dir in run_dirs]
+        for run_dir, future in zip(run_dirs, futures):
+            try:
+                runs.append(future.result())
+            except Exception as e:
+                print(f"Skipping {run_dir}: {e}")
+    return runs
+
+
+def align_runs(runs, crash=0):
+    """Put every run on one axis with crash number ``crash`` at t = 0.
+
+    Returns the shared bucket start times and a ``runs x buckets`` matrix
+    that is NaN where a run has no data.
+    """
+    width = runs[0].width
+    shifts = [int(np.floor(run.crash_times[crash] / width)) for run in runs]
+    lo = min(-shift for shift in shifts)
+    hi = max(len(run.throughputs) - shift for run, shift in zip(runs, shifts))
+    matrix = np.full((len(runs), hi - lo), np.nan)
+    for row, (run, shift) in enumerate(zip(runs, shifts)):
+        start = -shift - lo
+        matrix[row, start:start + len(run.throughputs)] = run.throughputs
+    return np.arange(lo, hi) * width, matrix
+
+
+def recovery_summary(runs, crash=0):
+    """Across-run mean and 95% half-width of each recovery metric.
+
+    Crashes are matched by their position relative to the aligned crash.
+    """
+    count = max(len(run.crash_times) - crash for run in runs)
+    summary = []
+    for k in range(count):
+        having = [run for run in runs if crash + k < len(run.recovery)]
+        matched = [run.recovery[crash + k] for run in having]
+        row = {
+            'crash': k,
+            'offset': float(np.mean([run.crash_times[crash + k] - run.crash_times[crash]
+                                     for run in having])),
+            'runs': len(matched),
+            'recovered': sum(not np.isnan(m['time_to_recover']) for m in matched),
+        }
+        for field in RECOVERY_FIELDS:
+            mean, half, n = mean_interval([m[field] for m in matched])
+            row[field] = (float(mean), float(half), int(n))
+        summary.append(row)
+    return summary
+
+
+def print_recovery_summary(summary):
+    units = {'baseline': 'req/s', 'dip_depth': 'req/s', 'dip_depth_pct': '%',
+             'time_to_recover': 's', 'deficit': 'requests', 'detection_lag': 's'}
+    labels = {'baseline': 'Baseline', 'dip_depth': 'Dip depth', 'dip_depth_pct': 'Dip depth',
+              'time_to_recover': 'Time to recover', 'deficit': 'Request deficit',
+              'detection_lag': 'Detection lag'}
+    for row in summary:
+        print(f"\nCrash at {row['offset']:+.2f}s ({row['runs']} runs, "
+              f"{row['recovered']} recovered), mean +/- 95% CI:")
+        for field in RECOVERY_FIELDS:
+            mean, half, n = row[field]
+            if n == 0:
+                print(f"  {labels[field]}: n/a")
+            elif n == 1 or np.isnan(half):
+                print(f"  {labels[field]}: {mean:.2f} {units[field]} (n=1)")
+            else:
+                print(f"  {labels[field]}: {mean:.2f} +/- {half:.2f} {units[field]} (n={n})")
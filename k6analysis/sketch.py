@@ -0,0 +1,146 @@
+"""Log-bucketed latency histograms.
+
+Bucket boundaries grow geometrically (HDR/DDSketch style), so every quantile
+read back is within ``relative_accuracy`` of the exact value while a
+histogram stays a fixed-size count array.  Merging histograms is plain
+addition, which is how per-bucket histograms are combined into per-phase or
+whole-run distributions without revisiting the samples.
+
+With fine time buckets most (bucket, bin) cells are empty, so
+``SparseHistograms`` keeps only the non-empty ones as sorted integer keys
+and their counts; memory is bounded by the number of requests and the
+number of buckets times bins, whichever is smaller.
+"""
+import numpy as np
+
+MIN_VALUE = 0.01
+MAX_VALUE = 600_000.0
+RELATIVE_ACCURACY = 0.01
+MERGE_CELLS = 1 << 20
+
+
+class LogBuckets:
+    def __init__(self, min_value=MIN_VALUE, max_value=MAX_VALUE, relative_accuracy=RELATIVE_ACCURACY):
+        self.min_value = min_value
+        self.max_value = max_value
+        self.gamma = (1 + relative_accuracy) / (1 - relative_accuracy)
+        self._log_gamma = np.log(self.gamma)
+        self.size = int(np.ceil(np.log(max_value / min_value) / self._log_gamma)) + 2
+
+    def index(self, values):
+        values = np.asarray(values, dtype=np.float64)
+        above = values > self.min_value
+        safe = np.where(above, values, self.min_value)
+        bins = np.floor(np.log(safe / self.min_value) / self._log_gamma).astype(np.int64) + 1
+        bins[~above] = 0
+        return np.minimum(bins, self.size - 1)
+
+    def values(self):
+        # Bin i >= 1 covers [min * gamma^(i-1), min * gamma^i); report the
+        # point with the smallest worst-case relative error inside it.
+        lower = self.min_value * self.gamma ** (np.arange(self.size) - 1.0)
+        values = lower * 2 * self.gamma / (self.gamma + 1)
+        values[0] = self.min_value
+        return values
+
+    def quantiles(self, counts, qs):
+        counts = np.atleast_2d(counts)
+        cumulative = np.cumsum(counts, axis=-1, dtype=np.float64)
+        total = cumulative[:, -1]
+        values = self.values()
+        out = np.full((counts.shape[0], len(qs)), np.nan)
+        for j, q in enumerate(qs):
+            rank = q * (total - 1)
+            bins = (cumulative > rank[:, None]).argmax(axis=1)
+            out[:, j] = np.where(total > 0, values[bins], np.nan)
+        return out
+
+    def sparse_quantiles(self, rows, bins, counts, length, qs):
+        # rows, bins and counts describe non-empty cells sorted by (row, bin).
+        totals = np.bincount(rows, weights=counts, minlength=length)
+        cumulative = np.cumsum(counts, dtype=np.float64)
+        starts = np.cumsum(totals) - totals
+        values = self.values()
+        present = totals > 0
+        out = np.full((length, len(qs)), np.nan)
+        for j, q in enumerate(qs):
+            rank = starts[present] + q * (totals[present] - 1)
+            cells = np.searchsorted(cumulative, rank, side='right')
+            out[present, j] = values[bins[cells]]
+        return out
+
+
+class SparseHistograms:
+    """One log-bucketed histogram per time bucket, storing non-empty cells only.
+
+    Cells are keyed by ``bucket * size + bin`` on absolute bucket numbers.
+    Each update is reduced to unique keys right away; the partial results
+    are merged into the sorted store once they outgrow it, so the amortized
+    cost stays linear in the number of chunks.
+    """
+
+    def __init__(self, size):
+        self.size = size
+        self.keys = np.zeros(0, dtype=np.int64)
+        self.counts = np.zeros(0, dtype=np.int64)
+        self._pending = []
+        self._pending_cells = 0
+
+    def add(self, buckets, bins, counts=None):
+        """Count one sample per ``(bucket, bin)`` pair, or ``counts`` of them when given."""
+        if len(buckets) == 0:
+            return
+        lo, hi = int(buckets.min()), int(buckets.max())
+        span = (hi - lo + 1) * self.size
+        if span <= 4 * len(buckets):
+            # Dense window: a bincount is cheaper than sorting the keys.
+            dense = np.bincount((buckets - lo) * self.size + bins, weights=counts, minlength=span)
+            local = np.flatnonzero(dense)
+            keys, counts = local + lo * self.size, dense[local]
+        elif counts is None:
+            keys, counts = np.unique(buckets * self.size + bins, return_counts=True)
+        else:
+            keys, inverse = np.unique(buckets * self.size + bins, return_inverse=True)
+            counts = np.bincount(inverse, weights=counts, minlength=len(keys))
+        self._pending.append((keys, counts.astype(np.int64)))
+        self._pending_cells += len(keys)
+        if self._pending_cells >= max(MERGE_CELLS, len(self.keys)):
+            self._merge()
+
+    def merge(self, other):
+        """Add the counts of ``other`` (with the same bin count) to these histograms."""
+        other._merge()
+        if len(other.keys):
+            self._pending.append((other.keys, other.counts))
+            self._pending_cells += len(other.keys)
+            if self._pending_cells >= max(MERGE_CELLS, len(self.keys)):
+                self._merge()
+
+    def __getstate__(self):
+        # Pickled compacted, so worker processes hand back sorted cells only.
+        self._merge()
+        return self.__dict__
+
+    def _merge(self):
+        if not self._pending:
+            return
+        keys = np.concatenate([self.keys] + [k for k, _ in self._pending])
+        counts = np.concatenate([self.counts] + [c for _, c in self._pending])
+        self.keys, inverse = np.unique(keys, return_inverse=True)
+        self.counts = np.bincount(inverse, weights=counts, minlength=len(self.keys)).astype(np.int64)
+        self._pending = []
+        self._pending_cells = 0
+
+    def cells(self, start=0):
+        """Return ``(buckets, bins, counts)`` with buckets relative to ``start``."""
+        self._merge()
+        return self.keys // self.size - start, self.keys % self.size, self.counts
+
+    def merged(self, groups, length, start=0):
+        """Sum the histograms into ``length`` groups; ``groups[b]`` maps bucket b."""
+        buckets, bins, counts = self.cells(start)
+        group = np.asarray(groups)[buckets]
+        keep = group >= 0
+        flat = group[keep] * self.size + bins[keep]
+        merged = np.bincount(flat, weights=counts[keep], minlength=length * self.size)
+        return merged.reshape(length, self.size)
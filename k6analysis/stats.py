@@ -0,0 +1,61 @@
+"""Run statistics as plain, JSON-ready data.
+
+The result scripts collect what they print into one dictionary so it can
+also be written as JSON (``--json``) for CI.  Nothing here imports
+matplotlib; ``--stats-only`` runs never load it.
+"""
+import json
+import sys
+
+import numpy as np
+
+from . import core
+from .latency import PERCENTILES, percentile_label
+
+
+def percentile_dict(values, percentiles=PERCENTILES):
+    return {percentile_label(p): v for p, v in zip(percentiles, values)}
+
+
+def throughput_summary(throughputs):
+    if len(throughputs) == 0:
+        return {'mean': None, 'max': None, 'min': None}
+    return {'mean': np.mean(throughputs), 'max': np.max(throughputs), 'min': np.min(throughputs)}
+
+
+def phase_summary(seconds, throughputs, boundaries, names):
+    means, counts = core.phase_means(seconds, throughputs, boundaries)
+    return [{'phase': name, 'throughput': mean if count else None, 'buckets': count}
+            for name, mean, count in zip(names, means, counts)]
+
+
+def latency_summary(latency, metric, boundaries, names):
+    phases = latency.phase_percentiles(boundaries, metric)
+    return {
+        'metric': metric,
+        'overall': percentile_dict(latency.overall(metric)),
+        'phases': [dict(phase=name, **percentile_dict(values)) for name, values in zip(names, phases)],
+    }
+
+
+def to_json(value):
+    # NumPy scalars and arrays become Python values; NaN and inf become null.
+    if isinstance(value, dict):
+        return {str(k): to_json(v) for k, v in value.items()}
+    if isinstance(value, (list, tuple, np.ndarray)):
+        return [to_json(v) for v in value]
+    if isinstance(value, np.generic):
+        value = value.item()
+    if isinstance(value, float) and not np.isfinite(value):
+        return None
+    return value
+
+
+def write_json(stats, path):
+    if path == '-':
+        json.dump(to_json(stats), sys.stdout, indent=2)
+        sys.stdout.write('\n')
+        return
+    with open(path, 'w') as f:
+        json.dump(to_json(stats), f, indent=2)
+    print(f"Statistics saved to {path}")
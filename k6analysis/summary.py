@@ -0,0 +1,188 @@
+"""Structured per-run summaries and the regression check built on them.
+
+A summary holds the run's throughput, error rate, latency percentiles,
+per-phase figures and per-crash recovery metrics.  Besides the nested
+detail it carries one flat ``metrics`` row of scalars, which is what the
+Parquet file stores and what ``compare_metrics`` gates on.
+
+A candidate regresses on a metric when it is worse than the baseline mean
+by more than ``max(tolerance * |mean|, z * std)`` (``std`` across baseline
+runs, zero with a single baseline run) plus the metric's absolute slack.
+"""
+import datetime
+import json
+import os
+
+import numpy as np
+import pandas as pd
+
+from . import core, recovery
+from .latency import PERCENTILES, LatencyAggregator, percentile_label
+from .omission import OmissionAggregator
+from .reader import SecondAggregator, aggregate
+from .stats import to_json
+
+GATE_TOLERANCE = 0.05
+GATE_Z = 3.0
+# Gated metrics by name pattern: direction in which the metric gets worse.
+HIGHER_IS_BETTER = ('throughput_mean', 'successful_mean', '_successful')
+LOWER_IS_BETTER = ('error_pct', 'dropped_pct', 'latency_p95', 'latency_p99', '_time_to_recover',
+                   '_deficit', '_dip_depth_pct')
+
+
+def direction(metric):
+    if metric.endswith(HIGHER_IS_BETTER):
+        return 'higher'
+    if metric.endswith(LOWER_IS_BETTER):
+        return 'lower'
+    return None
+
+
+def summary_aggregators(width=1.0):
+    """Aggregators whose results ``build_summary`` takes, in order.
+
+    Scripts add them to their own pass over the k6 output so the file is
+    read only once.
+    """
+    return [SecondAggregator(width=width), LatencyAggregator(['http_req_duration'], width=width),
+            OmissionAggregator(width=width)]
+
+
+def run_summary(path, crash_times_path, width=1.0, use_cache=True, jobs=1,
+                baseline_window=recovery.BASELINE_WINDOW, tolerance=recovery.TOLERANCE):
+    aggregates, latency, omission = aggregate(path, summary_aggregators(width), use_cache=use_cache, jobs=jobs)
+    crash_times = core.load_crash_times(crash_times_path, default=[], origin=aggregates.origin)
+    return build_summary(path, aggregates, latency, omission, crash_times, baseline_window, tolerance)
+
+
+def build_summary(path, aggregates, latency, omission, crash_times,
+                  baseline_window=recovery.BASELINE_WINDOW, tolerance=recovery.TOLERANCE):
+    width = aggregates.width
+    crash_times = sorted(crash_times)
+    seconds = aggregates.seconds
+    requests = aggregates.rates['http_reqs'].values
+    failed = aggregates.rates['http_req_failed'].values
+    successful = core.successful_series(aggregates)
+    total = requests.sum()
+
+    metrics = {
+        'duration': len(seconds) * width,
+        'requests': aggregates.sums['http_reqs'].values.sum(),
+        'throughput_mean': requests.mean(),
+        'throughput_std': requests.std(),
+        'successful_mean': successful.mean(),
+        'error_pct': failed.sum() / total * 100 if total else 0.0,
+    }
+    overall = latency.overall('http_req_duration')
+    for p, value in zip(PERCENTILES, overall):
+        metrics[f'latency_{percentile_label(p)}'] = value
+    # Dropped iterations and latency corrected for coordinated omission.
+    metrics['dropped_pct'] = omission.totals()['dropped_pct']
+    if omission.correctable:
+        corrected = omission.latency.overall('corrected')
+    else:
+        # Written as null rather than the uncorrected values.
+        print("Warning: no vus rows in the k6 output; co_latency_* percentiles are left empty")
+        corrected = [np.nan] * len(PERCENTILES)
+    for p, value in zip(PERCENTILES, corrected):
+        metrics[f'co_latency_{percentile_label(p)}'] = value
+
+    phases = []
+    means, counts = core.phase_means(seconds, successful, crash_times)
+    tails = latency.phase_percentiles(crash_times, 'http_req_duration')
+    for i, (mean, count, tail) in enumerate(zip(means, counts, tails)):
+        phase = {'phase': i, 'successful': mean, 'buckets': count}
+        phase.update({percentile_label(p): v for p, v in zip(PERCENTILES, tail)})
+        phases.append(phase)
+        metrics[f'phase_{i}_successful'] = mean
+        metrics[f'phase_{i}_latency_p99'] = phase['p99']
+
+    crashes = recovery.recovery_metrics(seconds, successful, crash_times, width=width,
+                                        baseline_window=baseline_window, tolerance=tolerance)
+    for i, crash in enumerate(crashes):
+        for field in ('dip_depth_pct', 'time_to_recover', 'deficit', 'detection_lag'):
+            metrics[f'recovery_{i + 1}_{field}'] = crash[field]
+
+    return {
+        'source': os.path.abspath(path),
+        'run': os.path.basename(os.path.dirname(os.path.abspath(path))),
+        'created': datetime.datetime.now(datetime.timezone.utc).isoformat(timespec='seconds'),
+        'bucket': width,
+        'crash_times': crash_times,
+        'metrics': metrics,
+        'phases': phases,
+        'recovery': crashes,
+    }
+
+
+def write_summary(summary, path):
+    """Write ``path`` as JSON and a one-row Parquet file next to it."""
+    with open(path, 'w') as f:
+        json.dump(to_json(summary), f, indent=2)
+    print(f"Run summary saved to {path}")
+
+    parquet = os.path.splitext(path)[0] + '.parquet'
+    row = dict(run=summary['run'], source=summary['source'], created=summary['created'],
+               bucket=summary['bucket'], **to_json(summary['metrics']))
+    try:
+        pd.DataFrame([row]).to_parquet(parquet, index=False)
+    except ImportError:
+        print(f"Not writing {parquet}: pyarrow or fastparquet is required for Parquet output")
+        return
+    print(f"Run summary row saved to {parquet}")
+
+
+def load_metric_rows(paths):
+    """Flat metric rows from summary JSON files or Parquet tables of them."""
+    rows = []
+    for path in paths:
+        if path.endswith('.parquet'):
+            rows += pd.read_parquet(path).to_dict(orient='records')
+        else:
+            with open(path) as f:
+                summary = json.load(f)
+            rows.append(dict(summary['metrics'], bucket=summary.get('bucket', 1.0)))
+    return rows
+
+
+def compare_metrics(baseline, candidate, tolerance=GATE_TOLERANCE, z=GATE_Z, metrics=None):
+    """One result per gated metric present in both the baseline rows and the candidate row.
+
+    Every row must come from the same bucket width: throughput, dips and
+    recovery times all depend on it, so rows of different widths raise.
+    """
+    widths = sorted({float(row.get('bucket', 1.0)) for row in baseline + [candidate]})
+    if len(widths) > 1:
+        raise ValueError(f"summaries use different bucket widths ({', '.join(f'{w:g} s' for w in widths)}); "
+                         f"regenerate them with the same --bucket")
+    width = widths[0]
+    names = [name for name in (metrics or candidate) if direction(name)]
+    results = []
+    for name in names:
+        values = np.array([row.get(name) for row in baseline], dtype=np.float64)
+        values = values[~np.isnan(values)]
+        value = candidate.get(name)
+        value = np.nan if value is None else float(value)
+        if np.isnan(value) and name.endswith('_time_to_recover'):
+            # Never recovered.
+            value = np.inf
+        if len(values) == 0 or np.isnan(value):
+            continue
+        mean = values.mean()
+        std = values.std(ddof=1) if len(values) > 1 else 0.0
+        allowed = max(tolerance * abs(mean), z * std)
+        if name.endswith('_time_to_recover'):
+            # Recovery is only resolved to whole buckets.
+            allowed += width
+        worse = mean - value if direction(name) == 'higher' else value - mean
+        results.append({
+            'metric': name,
+            'direction': direction(name),
+            'baseline': mean,
+            'std': std,
+            'runs': len(values),
+            'candidate': value,
+            'allowed': allowed,
+            'regression': bool(worse > allowed),
+        })
+    return results
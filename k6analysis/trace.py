@@ -0,0 +1,164 @@
+"""Fixed-width binary per-request traces.
+
+A trace holds one 16-byte record per request: completion time in epoch
+nanoseconds (k6 also timestamps a request's rows when it completes), the
+replica index, the HTTP status (0 when no response arrived) and the
+duration in microseconds.  A fixed 4 KB header carries a magic number and a
+JSON block naming the replicas, rewritten in place when replicas are added.
+The records are memory-mapped as a NumPy structured array, so reading a
+trace neither parses text nor copies the file, and a trace that is still
+being written (or was cut short) is read up to its last complete record.
+
+``iter_chunks`` turns records into k6-style metric rows, so every
+aggregator and visualizer accepts a trace as ``--k6-output``.
+
+    python3 k6_to_trace.py Crash2_test_4/k6_metrics.csv Crash2_test_4/requests.k6trace
+"""
+import json
+import os
+import struct
+
+import numpy as np
+import pandas as pd
+
+MAGIC = b'K6TRACE\x01'
+RECORD_DTYPE = np.dtype([
+    ('timestamp_ns', '<i8'),
+    ('replica', '<u2'),
+    ('status', '<u2'),
+    ('duration_us', '<u4'),
+])
+HEADER_BYTES = 4096
+TRACE_METRICS = ['http_reqs', 'http_req_duration', 'http_req_failed', 'checks']
+
+
+def is_trace(path):
+    if not os.path.isfile(path):
+        return False
+    with open(path, 'rb') as f:
+        return f.read(len(MAGIC)) == MAGIC
+
+
+def failed(statuses):
+    # Only 200 succeeds, as in the scripts' "status is 200" check and the
+    # native load generator's Response.ok.
+    return statuses != 200
+
+
+class Trace:
+    def __init__(self, path):
+        self.path = path
+        with open(path, 'rb') as f:
+            if f.read(len(MAGIC)) != MAGIC:
+                raise ValueError(f"{path} is not a request trace")
+            (length,) = struct.unpack('<I', f.read(4))
+            self.meta = json.loads(f.read(length))
+        self.replicas = self.meta['replicas']
+        self.rows = max(0, os.path.getsize(path) - HEADER_BYTES) // RECORD_DTYPE.itemsize
+        if self.rows == 0:
+            self.records = np.zeros(0, dtype=RECORD_DTYPE)
+        else:
+            self.records = np.memmap(path, dtype=RECORD_DTYPE, mode='r', offset=HEADER_BYTES,
+                                     shape=(self.rows,))
+
+    def iter_chunks(self, tags=(), chunksize=500_000):
+        """Yield k6-style metric rows, ``len(TRACE_METRICS)`` per request."""
+        per_request = len(TRACE_METRICS)
+        step = max(1, chunksize // per_request)
+        names = pd.Categorical.from_codes(np.tile(np.arange(per_request), step), categories=TRACE_METRICS)
+        for start in range(0, self.rows, step):
+            records = self.records[start:start + step]
+            n = len(records)
+            statuses = records['status']
+            bad = failed(statuses)
+            values = np.empty((n, per_request), dtype=np.float32)
+            values[:, 0] = 1.0
+            values[:, 1] = records['duration_us'] / 1000.0
+            values[:, 2] = bad
+            values[:, 3] = ~bad
+            chunk = {
+                'metric_name': names[:n * per_request],
+                'timestamp': np.repeat(records['timestamp_ns'] / 1e9, per_request),
+                'metric_value': values.ravel(),
+            }
+            if 'url' in tags:
+                chunk['url'] = pd.Categorical.from_codes(np.repeat(records['replica'].astype(np.int64), per_request),
+                                                         categories=self.replicas)
+            if 'status' in tags:
+                codes, inverse = np.unique(statuses, return_inverse=True)
+                chunk['status'] = pd.Categorical.from_codes(np.repeat(inverse, per_request),
+                                                            categories=[str(c) for c in codes])
+            yield pd.DataFrame(chunk)
+
+
+class TraceWriter:
+    """Appends records to a new trace.
+
+    Replica indices refer to ``replicas``; ``replica()`` adds labels as they
+    turn up and the header is rewritten on the next flush.
+    """
+
+    def __init__(self, path, replicas=(), **meta):
+        self.path = path
+        self.meta = meta
+        self.replicas = list(replicas)
+        self.rows = 0
+        self.file = open(path, 'wb')
+        self._write_header()
+
+    def _write_header(self):
+        block = json.dumps(dict(self.meta, replicas=self.replicas)).encode()
+        header = MAGIC + struct.pack('<I', len(block)) + block
+        if len(header) > HEADER_BYTES:
+            raise ValueError(f"trace header over {HEADER_BYTES} bytes ({len(self.replicas)} replicas)")
+        self.file.seek(0)
+        self.file.write(header.ljust(HEADER_BYTES, b' '))
+        self.file.seek(0, os.SEEK_END)
+        self._written = len(self.replicas)
+
+    def replica(self, label):
+        if label not in self.replicas:
+            self.replicas.append(label)
+        return self.replicas.index(label)
+
+    def append(self, timestamps_ns, replicas, statuses, durations_us):
+        records = np.empty(len(timestamps_ns), dtype=RECORD_DTYPE)
+        records['timestamp_ns'] = timestamps_ns
+        records['replica'] = replicas
+        records['status'] = statuses
+        records['duration_us'] = np.clip(np.rint(durations_us), 0, np.iinfo(np.uint32).max)
+        self.file.write(records.tobytes())
+        self.rows += len(records)
+
+    def flush(self):
+        if len(self.replicas) != self._written:
+            self._write_header()
+        self.file.flush()
+
+    def close(self):
+        self.flush()
+        self.file.close()
+
+
+def convert_k6(csv_path, trace_path, chunksize=500_000):
+    """Write the ``http_req_duration`` rows of a k6 CSV as a trace; returns the request count."""
+    # Imported here: the reader imports this module to recognise traces.
+    from .reader import iter_k6_chunks
+
+    writer = TraceWriter(trace_path, source=os.path.abspath(csv_path))
+    try:
+        for chunk in iter_k6_chunks(csv_path, tags=['url', 'status'], chunksize=chunksize, use_cache=False):
+            chunk = chunk[chunk['metric_name'] == 'http_req_duration']
+            urls = chunk['url'].astype('category')
+            codes = [writer.replica(str(url)) for url in urls.cat.categories]
+            codes = np.array(codes + [writer.replica('') if (urls.cat.codes.values < 0).any() else 0],
+                             dtype=np.uint16)
+            statuses = pd.to_numeric(chunk['status'].astype(str), errors='coerce')
+            writer.append(np.rint(chunk['timestamp'].values * 1e9).astype(np.int64),
+                          codes[urls.cat.codes.values],
+                          np.nan_to_num(statuses.values, nan=0).astype(np.uint16),
+                          chunk['metric_value'].values.astype(np.float64) * 1000)
+    finally:
+        writer.close()
+    return writer.rows
+
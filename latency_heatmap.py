@@ -0,0 +1,79 @@
+import argparse
+import sys
+from contextlib import redirect_stdout
+
+from k6analysis import LATENCY_METRICS, LatencyAggregator, aggregate, format_percentiles, load_crash_times
+from k6analysis.capacity import phase_names
+from k6analysis.stats import percentile_dict, write_json
+
+def parse_args():
+    parser = argparse.ArgumentParser(description='Time x latency heatmap of every request, with the crash times marked')
+    parser.add_argument('--k6-output', required=True, help='Path to K6 output CSV file')
+    parser.add_argument('--crash-times', required=True, help='Path to crash times file')
+    parser.add_argument('--output', help='Output image file path')
+    parser.add_argument('--metric', choices=LATENCY_METRICS, default='http_req_duration', help='Latency metric to plot')
+    parser.add_argument('--bucket', type=float, default=1.0, help='Time bucket width in seconds (0.01 to 10)')
+    parser.add_argument('--time-bins', type=int, default=1000, help='Maximum number of heatmap columns; buckets are summed to fit')
+    parser.add_argument('--latency-bins', type=int, default=200, help='Number of log-spaced latency rows')
+    parser.add_argument('--no-cache', action='store_true', help='Always parse the CSV instead of using the columnar cache')
+    parser.add_argument('--jobs', type=int, default=1, help='Processes parsing an uncached CSV in parallel (0 for one per CPU)')
+    parser.add_argument('--stats-only', action='store_true', help='Skip the plot (matplotlib is never imported) and print the statistics as JSON')
+    parser.add_argument('--json', help="Write the statistics as JSON to this path ('-' for stdout)")
+    parser.add_argument('--dpi', type=int, default=300, help='Resolution of the saved image')
+    args = parser.parse_args()
+    if not args.stats_only and not args.output:
+        parser.error('--output is required unless --stats-only is given')
+    if args.stats_only and not args.json:
+        args.json = '-'
+    return args
+
+def plot(args, latency, crash_times):
+    from k6analysis.plots import plot_latency_heatmap, plt, save_figure
+
+    plt.figure(figsize=(14, 7))
+    plot_latency_heatmap(latency, crash_times, args.metric, args.time_bins, args.latency_bins)
+    save_figure(args.output, args.dpi)
+    print(f"Graph saved to {args.output}")
+
+def analyze(args):
+    print(f"Reading K6 metrics from {args.k6_output}")
+    aggregator = LatencyAggregator(metrics=[args.metric], width=args.bucket)
+    latency = aggregate(args.k6_output, [aggregator], use_cache=not args.no_cache, jobs=args.jobs)[0]
+    crash_times = sorted(load_crash_times(args.crash_times, default=[], origin=latency.origin))
+    names = phase_names(len(crash_times) + 1)
+
+    if not args.stats_only:
+        plot(args, latency, crash_times)
+
+    _, _, counts = latency.histogram(args.metric).cells(latency.start)
+    overall = latency.overall(args.metric)
+    phases = latency.phase_percentiles(crash_times, args.metric)
+    stats = {
+        'source': args.k6_output,
+        'metric': args.metric,
+        'bucket': args.bucket,
+        'crash_times': crash_times,
+        'requests': int(counts.sum()),
+        'latency': percentile_dict(overall),
+        'phases': [dict(phase=name, latency=percentile_dict(values)) for name, values in zip(names, phases)],
+    }
+
+    print(f"\n{args.metric} over {stats['requests']} requests:")
+    print(f"Overall: {format_percentiles(overall)}")
+    for name, values in zip(names, phases):
+        print(f"{name}: {format_percentiles(values)}")
+
+    return stats
+
+def main():
+    args = parse_args()
+
+    # With JSON on stdout the human-readable report goes to stderr.
+    with redirect_stdout(sys.stderr if args.json == '-' else sys.stdout):
+        stats = analyze(args)
+
+    if args.json:
+        write_json(stats, args.json)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,139 @@
+import argparse
+import os
+import signal
+import sys
+import time
+
+from k6analysis import ReplicaAggregator, load_crash_times
+from k6analysis.latency import percentile_label
+from k6analysis.live import CsvTail, recent_summary
+
+def parse_args():
+    parser = argparse.ArgumentParser(description='Follow a k6 CSV while the test runs and show per-replica throughput, errors and tail latency')
+    parser.add_argument('--k6-output', required=True, help='Path to the K6 output CSV file being written')
+    parser.add_argument('--crash-times', help='Crash times file written by harness/orchestrator.py, re-read on every refresh')
+    parser.add_argument('--bucket', type=float, default=1.0, help='Time bucket width in seconds (0.01 to 10)')
+    parser.add_argument('--window', type=float, default=5.0, help='Seconds of whole buckets the current figures are taken over')
+    parser.add_argument('--interval', type=float, default=2.0, help='Seconds between refreshes')
+    parser.add_argument('--percentile', type=float, default=99, help='Tail latency percentile')
+    parser.add_argument('--plot', help='Image file rewritten on every refresh')
+    parser.add_argument('--dpi', type=int, default=100, help='Resolution of the refreshed image')
+    parser.add_argument('--max-points', type=int, default=2000, help='Downsample plotted series to about this many points (0 keeps all)')
+    parser.add_argument('--pid', type=int, help='Stop when this process exits; it gets SIGTERM when the run is aborted (e.g. the orchestrator)')
+    parser.add_argument('--idle-timeout', type=float, default=30.0, help='Stop once the CSV has not grown for this many seconds')
+    parser.add_argument('--abort-error-pct', type=float, help='Abort when the total error rate stays above this')
+    parser.add_argument('--abort-latency', type=float, help='Abort when the total tail latency (ms) stays above this')
+    parser.add_argument('--abort-min-throughput', type=float, help='Abort when the total throughput (req/s) stays below this')
+    parser.add_argument('--abort-after', type=float, default=30.0, help='Seconds a limit must stay exceeded before aborting')
+    parser.add_argument('--once', action='store_true', help='Read what is there, show it once and exit')
+    return parser.parse_args()
+
+def alive(pid):
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        pass
+    return True
+
+def breaches(args, total):
+    label = percentile_label(args.percentile)
+    reasons = []
+    if args.abort_error_pct is not None and total['error_pct'] > args.abort_error_pct:
+        reasons.append(f"error rate {total['error_pct']:.2f}% > {args.abort_error_pct:g}%")
+    if args.abort_latency is not None and total[label] > args.abort_latency:
+        reasons.append(f"{label} {total[label]:.2f} ms > {args.abort_latency:g} ms")
+    if args.abort_min_throughput is not None and total['throughput'] < args.abort_min_throughput:
+        reasons.append(f"throughput {total['throughput']:.2f} req/s < {args.abort_min_throughput:g} req/s")
+    return reasons
+
+def show(args, tail, replicas, crash_times, table):
+    label = percentile_label(args.percentile)
+    if sys.stdout.isatty():
+        sys.stdout.write('\033[H\033[J')
+    crashes = ', '.join(f"{t:.1f}s" for t in crash_times) or 'none yet'
+    print(f"{args.k6_output}: {tail.rows} rows, t={replicas.seconds[-1] + replicas.width:.1f}s, crashes: {crashes}")
+    print(f"Last {args.window:g}s of whole buckets:")
+    print(f"{'Replica':<10} {'Throughput':>14} {'Errors':>8} {label:>12}")
+    for row in table.to_dict(orient='records'):
+        print(f"{row['replica']:<10} {row['throughput']:>10.2f} req/s {row['error_pct']:>7.2f}% {row[label]:>9.2f} ms")
+    sys.stdout.flush()
+
+def plot(args, replicas, crash_times):
+    from k6analysis.plots import downsample, plot_crash_markers, plt, save_figure
+
+    seconds = replicas.seconds
+    latency = replicas.latency(args.percentile)
+
+    plt.figure(figsize=(12, 8))
+    plt.subplot(2, 1, 1)
+    for replica in replicas.replicas:
+        plt.plot(*downsample(seconds, replicas.requests[replica].values, args.max_points), linewidth=1.5, label=replica)
+    plt.ylabel('Throughput (req/s)')
+    plt.title('Live Throughput per Replica')
+    plt.grid(True, linestyle='--', alpha=0.7)
+    plt.legend(loc='lower left')
+    plot_crash_markers(crash_times)
+
+    plt.subplot(2, 1, 2, sharex=plt.gca())
+    for replica in replicas.replicas:
+        plt.plot(*downsample(seconds, latency[replica].values, args.max_points), linewidth=1.5, label=replica)
+    plt.yscale('log')
+    plt.ylabel(f'{percentile_label(args.percentile)} latency (ms)')
+    plt.xlabel('Time since test start (s)')
+    plt.grid(True, which='both', linestyle='--', alpha=0.5)
+    plot_crash_markers(crash_times)
+
+    # Written aside and renamed, so a viewer never sees a half-written image.
+    root, ext = os.path.splitext(args.plot)
+    partial = f"{root}.partial{ext}"
+    save_figure(partial, args.dpi)
+    os.replace(partial, args.plot)
+
+def main():
+    args = parse_args()
+    tail = CsvTail(args.k6_output)
+    aggregator = ReplicaAggregator(width=args.bucket)
+    last_growth = time.monotonic()
+    breached_since = None
+
+    while True:
+        # Checked before reading, so the rows written just before the exit are shown.
+        finished = args.pid and not alive(args.pid)
+        if tail.drain([aggregator]):
+            last_growth = time.monotonic()
+
+        if aggregator.first is not None and aggregator.replicas:
+            replicas = aggregator.result()
+            crash_times = []
+            if args.crash_times and os.path.exists(args.crash_times):
+                crash_times = load_crash_times(args.crash_times, default=[], origin=replicas.origin)
+            table = recent_summary(replicas, args.window, args.percentile)
+            show(args, tail, replicas, crash_times, table)
+            if args.plot:
+                plot(args, replicas, crash_times)
+
+            reasons = breaches(args, table.iloc[-1]) if len(table) else []
+            if not reasons:
+                breached_since = None
+            elif breached_since is None:
+                breached_since = time.monotonic()
+            elif time.monotonic() - breached_since >= args.abort_after:
+                print(f"\nAborting the run: {'; '.join(reasons)} for {args.abort_after:g}s")
+                if args.pid:
+                    os.kill(args.pid, signal.SIGTERM)
+                sys.exit(1)
+
+        if args.once:
+            break
+        if finished:
+            print("\nLoad process finished")
+            break
+        if time.monotonic() - last_growth > args.idle_timeout:
+            print(f"\nNo new rows for {args.idle_timeout:g}s, stopping")
+            break
+        time.sleep(args.interval)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,58 @@
+import argparse
+import json
+import sys
+
+from k6analysis.stats import to_json
+from k6analysis.summary import GATE_TOLERANCE, GATE_Z, compare_metrics, load_metric_rows
+
+def parse_args():
+    parser = argparse.ArgumentParser(description='Compare a run summary against baseline runs and fail on regression')
+    parser.add_argument('--baseline', nargs='+', required=True, help='Baseline run summaries (summary.json files or .parquet tables of them)')
+    parser.add_argument('--candidate', required=True, help='Summary of the run under test (the last row is used for a .parquet table)')
+    parser.add_argument('--tolerance', type=float, default=GATE_TOLERANCE, help='Allowed change relative to the baseline mean, as a fraction')
+    parser.add_argument('--z', type=float, default=GATE_Z, help='Allowed change in baseline standard deviations, when larger than --tolerance')
+    parser.add_argument('--metric', action='append', help='Gate only on this metric (repeatable; default: every gated metric)')
+    parser.add_argument('--report', help='Write the comparison as JSON to this path')
+    return parser.parse_args()
+
+def main():
+    args = parse_args()
+
+    baseline = load_metric_rows(args.baseline)
+    candidates = load_metric_rows([args.candidate])
+    if not baseline or not candidates:
+        print("Error : no summary rows to compare")
+        sys.exit(2)
+
+    try:
+        results = compare_metrics(baseline, candidates[-1], args.tolerance, args.z, args.metric)
+    except ValueError as e:
+        print(f"Error : {e}")
+        sys.exit(2)
+    if not results:
+        print("Error : no metric is present in both the baseline and the candidate")
+        sys.exit(2)
+
+    print(f"Comparing {args.candidate} against {len(baseline)} baseline runs\n")
+    print(f"{'Metric':<34} {'Baseline':>22} {'Candidate':>12} {'Allowed':>10}  Status")
+    for result in results:
+        baseline_text = f"{result['baseline']:.2f} ± {result['std']:.2f} (n={result['runs']})"
+        status = "REGRESSION" if result['regression'] else "ok"
+        print(f"{result['metric']:<34} {baseline_text:>22} {result['candidate']:>12.2f} "
+              f"{result['allowed']:>10.2f}  {status}")
+
+    regressions = [result['metric'] for result in results if result['regression']]
+    if args.report:
+        with open(args.report, 'w') as f:
+            json.dump(to_json({'candidate': args.candidate, 'baseline': args.baseline,
+                               'tolerance': args.tolerance, 'z': args.z,
+                               'regressions': regressions, 'results': results}), f, indent=2)
+        print(f"\nReport saved to {args.report}")
+
+    if regressions:
+        print(f"\n{len(regressions)} regressed metrics: {', '.join(regressions)}")
+        sys.exit(1)
+    print("\nNo regressions")
+
+if __name__ == "__main__":
+    main()
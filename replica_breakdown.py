@@ -0,0 +1,143 @@
+import argparse
+import sys
+from contextlib import redirect_stdout
+
+import numpy as np
+
+from k6analysis import aggregate, load_crash_times
+from k6analysis.replicas import ReplicaAggregator
+from k6analysis.resources import RESOURCE_METRICS, load_resources, print_resource_report
+from k6analysis.stats import write_json
+
+def parse_args():
+    parser = argparse.ArgumentParser(description='Per-replica throughput, error rate and latency')
+    parser.add_argument('--k6-output', required=True, help='Path to K6 output CSV file')
+    parser.add_argument('--crash-times', required=True, help='Path to crash times file')
+    parser.add_argument('--output', help='Output image file path')
+    parser.add_argument('--percentile', type=float, default=99, help='Latency percentile to plot per replica')
+    parser.add_argument('--resources', help='Replica resource samples from harness/sampler.py, drawn under the per-replica plots')
+    parser.add_argument('--resource-metrics', nargs='+', choices=list(RESOURCE_METRICS), default=['cpu_pct', 'rss_mb'], help='Resource samples to draw, one panel each')
+    parser.add_argument('--bucket', type=float, default=1.0, help='Time bucket width in seconds (0.01 to 10)')
+    parser.add_argument('--no-cache', action='store_true', help='Always parse the CSV instead of using the columnar cache')
+    parser.add_argument('--jobs', type=int, default=1, help='Processes parsing an uncached CSV in parallel (0 for one per CPU)')
+    parser.add_argument('--stats-only', action='store_true', help='Skip the plot (matplotlib is never imported) and print the statistics as JSON')
+    parser.add_argument('--json', help="Write the statistics as JSON to this path ('-' for stdout)")
+    parser.add_argument('--dpi', type=int, default=300, help='Resolution of the saved image')
+    parser.add_argument('--max-points', type=int, default=2000, help='Downsample plotted series to about this many points (0 keeps all)')
+    args = parser.parse_args()
+    if not args.stats_only and not args.output:
+        parser.error('--output is required unless --stats-only is given')
+    if args.stats_only and not args.json:
+        args.json = '-'
+    return args
+
+def plot(args, replicas, crash_times, resources=None):
+    from k6analysis.plots import downsample, plot_crash_markers, plot_resource, plt, save_figure
+    
+    seconds = replicas.seconds
+    latency = replicas.latency(args.percentile)
+    total = replicas.requests.sum(axis=1).values
+    panels = args.resource_metrics if resources is not None else []
+    rows = 3 + len(panels)
+    
+    plt.figure(figsize=(12, 14 + 4 * len(panels)))
+    
+    plt.subplot(rows, 1, 1)
+    for replica in replicas.replicas:
+        plt.plot(*downsample(seconds, replicas.requests[replica].values, args.max_points), linewidth=2, label=f'Replica {replica}')
+    plt.plot(*downsample(seconds, total, args.max_points), 'k--', linewidth=1, label='Total')
+    plt.ylabel('Throughput (req/s)')
+    plt.title('Per-Replica Throughput with Server Failures')
+    plt.grid(True, linestyle='--', alpha=0.7)
+    plt.legend(loc='upper right')
+    plot_crash_markers(crash_times, np.max(total) * 0.9)
+    plt.xlim(0, max(60, np.max(seconds) + 5))
+    
+    throughput_axes = plt.gca()
+    
+    plt.subplot(rows, 1, 2, sharex=throughput_axes)
+    error_rate = replicas.error_rate
+    for replica in replicas.replicas:
+        plt.plot(*downsample(seconds, error_rate[replica].values * 100, args.max_points), linewidth=2, label=f'Replica {replica}')
+    plt.ylabel('Error rate (%)')
+    plt.title('Per-Replica Error Rate')
+    plt.grid(True, linestyle='--', alpha=0.7)
+    plt.legend(loc='upper right')
+    plot_crash_markers(crash_times)
+    
+    plt.subplot(rows, 1, 3, sharex=throughput_axes)
+    for replica in replicas.replicas:
+        plt.plot(*downsample(seconds, latency[replica].values, args.max_points), linewidth=2, label=f'Replica {replica}')
+    plt.yscale('log')
+    plt.ylabel(f'p{args.percentile:g} http_req_duration (ms)')
+    plt.xlabel('Time since test start (s)')
+    plt.title('Per-Replica Tail Latency')
+    plt.grid(True, which='both', linestyle='--', alpha=0.5)
+    plt.legend(loc='upper right')
+    plot_crash_markers(crash_times)
+    
+    for row, metric in enumerate(panels, start=4):
+        plt.subplot(rows, 1, row, sharex=throughput_axes)
+        plot_resource(resources, metric, RESOURCE_METRICS[metric], crash_times, args.max_points, replicas.replicas)
+    
+    save_figure(args.output, args.dpi)
+    print(f"Graph saved to {args.output}")
+
+def analyze(args):
+    print(f"Reading K6 metrics from {args.k6_output}")
+    
+    try:
+        replicas = aggregate(args.k6_output, [ReplicaAggregator(width=args.bucket)], use_cache=not args.no_cache, jobs=args.jobs)[0]
+    except Exception as e:
+        # Nothing is plotted or written for a run that could not be read.
+        sys.exit(f"Error reading K6 metrics: {e}")
+    
+    if not replicas.replicas:
+        sys.exit("No url-tagged http_reqs rows found; was the test run with systemTags including 'url'?")
+    
+    crash_times = load_crash_times(args.crash_times, default=[], origin=replicas.origin)
+    
+    resources = None
+    if args.resources:
+        try:
+            resources = load_resources(args.resources, replicas.origin)
+        except (OSError, ValueError, KeyError) as e:
+            print(f"Error reading resource samples: {e}")
+    
+    if not args.stats_only:
+        plot(args, replicas, crash_times, resources)
+    
+    summary = replicas.phase_summary(sorted(crash_times), args.percentile)
+    phase_names = ['Before first crash'] + [f'After crash {i + 1}' for i in range(len(crash_times))]
+    summary['phase'] = [phase_names[phase] for phase in summary['phase']]
+    print("\nPer-replica statistics:")
+    for phase, rows in summary.groupby('phase', sort=False):
+        print(f"\n{phase}:")
+        for _, row in rows.iterrows():
+            print(f"  Replica {row['replica']}: Throughput={row['throughput']:.2f} req/s "
+                  f"({row['share_pct']:.1f}% of load), errors={row['error_pct']:.2f}%, "
+                  f"p{args.percentile:g}={row.iloc[-1]:.2f} ms")
+    
+    stats = {
+        'source': args.k6_output,
+        'bucket': args.bucket,
+        'crash_times': crash_times,
+        'replicas': summary.to_dict(orient='records'),
+    }
+    if resources is not None:
+        stats['resources'] = resources.phase_means(sorted(crash_times), phase_names)
+        print_resource_report(stats['resources'])
+    
+    return stats
+
+def main():
+    args = parse_args()
+    
+    with redirect_stdout(sys.stderr if args.json == '-' else sys.stdout):
+        stats = analyze(args)
+    
+    if args.json and stats is not None:
+        write_json(stats, args.json)
+
+if __name__ == "__main__":
+    main()
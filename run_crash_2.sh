@@ -9,18 +9,13 @@ REPLICA_PORTS=(2302 2308 2309)
 FIRST_CRASH_PORT=2302
 SECOND_CRASH_PORT=2308
 WARMUP_REQUESTS=200
+SAMPLE_INTERVAL=0.5
 
 if [ ! -f "load_crash_2.js" ]; then
     echo "ERROR: load_crash_2.js not found."
     exit 1
 fi
 
-sed -i "s/const FIRST_CRASH_TIME_SECONDS = [0-9]*;/const FIRST_CRASH_TIME_SECONDS = $FIRST_CRASH_TIME;/" load_crash_2.js
-sed -i "s/const SECOND_CRASH_TIME_SECONDS = [0-9]*;/const SECOND_CRASH_TIME_SECONDS = $SECOND_CRASH_TIME;/" load_crash_2.js
-sed -i "s/const FIRST_CRASHED_PORT = [0-9]*;/const FIRST_CRASHED_PORT = $FIRST_CRASH_PORT;/" load_crash_2.js
-sed -i "s/const SECOND_CRASHED_PORT = [0-9]*;/const SECOND_CRASHED_PORT = $SECOND_CRASH_PORT;/" load_crash_2.js
-echo "K6 script crashes: $FIRST_CRASH_TIME and $SECOND_CRASH_TIME seconds"
-
 mkdir -p $OUTPUT_DIR
 
 ACTIVE_REPLICAS=()
@@ -47,98 +42,32 @@ for CRASH_PORT in $FIRST_CRASH_PORT $SECOND_CRASH_PORT; do
     fi
 done
 
+ACTIVE_PORTS=("${ACTIVE_REPLICAS[@]}")
 export ACTIVE_REPLICAS="[${ACTIVE_REPLICAS[*]}]"
 echo "Active replicas: $ACTIVE_REPLICAS"
 
 echo -e "\n=== Starting Warm-up Phase ==="
-for port in "${ACTIVE_REPLICAS[@]}"; do
-    echo "Warming up replica on port $port..."
-    
-    start_time=$(date +%s.%N)
-    
-    for ((i=1; i<=$WARMUP_REQUESTS; i++)); do
-        HTTP_CODE=$(curl -s -o /dev/null -w "%{http_code}" "http://localhost:$port/api/books" -H "XDN: bookcatalog")
-        
-        if [ $((i % 100)) -eq 0 ]; then
-            echo "  Progress: $i/$WARMUP_REQUESTS requests completed"
-        fi
-    done
-    
-    end_time=$(date +%s.%N)
-    duration=$(echo "$end_time - $start_time" | bc)
-    rps=$(echo "$WARMUP_REQUESTS / $duration" | bc)
-    
-    echo " Replica $port: warm-up completed ($WARMUP_REQUESTS requests in $(printf "%.2f" $duration) seconds, $(printf "%.2f" $rps) req/sec)"
-done
+python3 harness/warmup.py --ports "${ACTIVE_PORTS[@]}" --min-requests $WARMUP_REQUESTS --report $OUTPUT_DIR/warmup.json
 
 sleep 2
 echo -e "=== Warm-up Phase Completed ===\n"
 
-crash_replica() {
-    local port=$1
-    
-    echo "$(date +%H:%M:%S) Crashing replica on port: $port"
-    
-    fuser -k $port/tcp
-    
-    if [ $? -eq 0 ]; then
-        echo "$(date +%H:%M:%S) Successfully crashed replica on port $port"
-    else
-        echo "$(date +%H:%M:%S) Failed to crash replica on port $port"
-    fi
-}
-
-echo "$FIRST_CRASH_TIME $SECOND_CRASH_TIME" > $OUTPUT_DIR/crash_times.txt
-
 echo -e "=== Starting Load Test (Duration: ${TEST_DURATION}s) ===\n"
 
-k6 run --out csv=$OUTPUT_DIR/$K6_OUTPUT_FILE load_crash_2.js &
-K6_PID=$!
-TEST_START_TIME=$(date +%s)
-
-# First crash
-(
-    CURRENT_TIME=$(date +%s)
-    ELAPSED=$((CURRENT_TIME - TEST_START_TIME))
-    SLEEP_TIME=$((FIRST_CRASH_TIME - ELAPSED))
-    
-    if [ $SLEEP_TIME -lt 0 ]; then
-        SLEEP_TIME=0
-    fi
-    
-    sleep $SLEEP_TIME
-    
-    CRASH_EXACT_TIME=$(date +%s)
-    CRASH_ELAPSED=$((CRASH_EXACT_TIME - TEST_START_TIME))
-    echo "Actual first crash time is $CRASH_ELAPSED seconds into the test"
-    
-    crash_replica $FIRST_CRASH_PORT
-) &
-
-# Second crash
-(
-    CURRENT_TIME=$(date +%s)
-    ELAPSED=$((CURRENT_TIME - TEST_START_TIME))
-    SLEEP_TIME=$((SECOND_CRASH_TIME - ELAPSED))
-    
-    if [ $SLEEP_TIME -lt 0 ]; then
-        SLEEP_TIME=0
-    fi
-    
-    sleep $SLEEP_TIME
-    
-    CRASH_EXACT_TIME=$(date +%s)
-    CRASH_ELAPSED=$((CRASH_EXACT_TIME - TEST_START_TIME))
-    echo "Actual second crash time is $CRASH_ELAPSED seconds into the test"
-    
-    crash_replica $SECOND_CRASH_PORT
-) &
-
 echo "Test is running..."
-wait $K6_PID
+python3 harness/sampler.py --ports "${REPLICA_PORTS[@]}" --interval $SAMPLE_INTERVAL --output $OUTPUT_DIR/resources.csv &
+SAMPLER_PID=$!
+python3 harness/orchestrator.py \
+    --event $FIRST_CRASH_TIME:kill:$FIRST_CRASH_PORT \
+    --event $SECOND_CRASH_TIME:kill:$SECOND_CRASH_PORT \
+    --crash-times $OUTPUT_DIR/crash_times.txt \
+    --events-log $OUTPUT_DIR/crash_events.csv \
+    -- k6 run --out csv=$OUTPUT_DIR/$K6_OUTPUT_FILE load_crash_2.js
+kill $SAMPLER_PID
+wait $SAMPLER_PID
 echo -e "\n=== Load Test Completed ===\n"
 
 echo "Generating throughput visualization"
-python3 crash2.py --k6-output $OUTPUT_DIR/$K6_OUTPUT_FILE --crash-times $OUTPUT_DIR/crash_times.txt --output $OUTPUT_DIR/throughput.png
+python3 crash2.py --k6-output $OUTPUT_DIR/$K6_OUTPUT_FILE --crash-times $OUTPUT_DIR/crash_times.txt --output $OUTPUT_DIR/throughput.png --summary $OUTPUT_DIR/summary.json --resources $OUTPUT_DIR/resources.csv
 
 echo -e "\n=== Test completed successfully! ==="
\ No newline at end of file
@@ -1,163 +1,163 @@
 import argparse
-import pandas as pd
-import matplotlib.pyplot as plt
+import os
+import sys
+from contextlib import redirect_stdout
+
 import numpy as np
 
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+from k6analysis.comparison import RANK_METRICS, TAIL_PERCENTILE, load_platforms, parse_crash_schedule, print_comparison, rank_platforms
+from k6analysis.stats import throughput_summary, write_json
+
 def parse_args():
-    parser = argparse.ArgumentParser(description='Compare XDN and Worker performance')
-    parser.add_argument('--xdn-output', required=True, help='Path to XDN K6 output CSV file')
-    parser.add_argument('--worker-output', required=True, help='Path to Worker K6 output CSV file')
-    parser.add_argument('--crash-time', type=float, default=20, help='Crash time in seconds')
-    parser.add_argument('--output', required=True, help='Output image file path')
-    return parser.parse_args()
-
-def process_k6_data(file_path, platform_name):
-    try:
-        k6_data = pd.read_csv(file_path, low_memory=False)
-        
-        min_timestamp = k6_data['timestamp'].min()
-        k6_data['elapsed_time'] = k6_data['timestamp'].apply(
-            lambda x: float(x) - float(min_timestamp)
-        )
-        k6_data['second'] = k6_data['elapsed_time'].apply(lambda x: int(x))
-        
-        successful_reqs = k6_data[k6_data['metric_name'] == 'checks'].copy()
-        
-        if len(successful_reqs) == 0:
-            all_reqs = k6_data[k6_data['metric_name'] == 'http_reqs'].copy()
-            
-            failed_reqs = k6_data[k6_data['metric_name'] == 'http_req_failed'].copy()
-            failed_by_second = failed_reqs.groupby('second')['metric_value'].sum().reset_index()
-            failed_by_second_dict = dict(zip(failed_by_second['second'], failed_by_second['metric_value']))
-            
-            total_by_second = all_reqs.groupby('second')['metric_value'].sum().reset_index()
-            
-            successful_by_second = []
-            for _, row in total_by_second.iterrows():
-                second = row['second']
-                total = row['metric_value']
-                failed = failed_by_second_dict.get(second, 0)
-                successful = max(0, total - failed)
-                successful_by_second.append({'second': second, 'metric_value': successful})
-            
-            throughput_by_second = pd.DataFrame(successful_by_second)
-        else:
-            throughput_by_second = successful_reqs.groupby('second')['metric_value'].sum().reset_index()
-        
-        max_second = max(throughput_by_second['second'])
-        all_seconds = pd.DataFrame({'second': range(0, max_second + 1)})
-        throughput_by_second = pd.merge(all_seconds, throughput_by_second, on='second', how='left').fillna(0)
-        
-        throughput_by_second = throughput_by_second.sort_values('second')
-        
-        return throughput_by_second['second'].values, throughput_by_second['metric_value'].values, max_second
-        
-    except Exception as e:
-        print(f"Error processing {platform_name} metrics: {e}")
-        return np.array([]), np.array([]), 0
-
-def calculate_statistics(throughputs, platform_name, crash_time):
-    if len(throughputs) == 0:
-        print(f"No valid data for {platform_name}")
-        return 0, 0
-    
-    print(f"\n{platform_name} Statistics (Successful Requests Only):")
-    print(f"Average throughput: {np.mean(throughputs):.2f} req/s")
-    print(f"Max throughput: {np.max(throughputs):.2f} req/s")
-    print(f"Min throughput: {np.min(throughputs):.2f} req/s")
-    
-    before_crash = []
-    after_crash = []
-    
-    for i, t in enumerate(throughputs):
-        if i < crash_time:
-            before_crash.append(t)
-        else:
-            after_crash.append(t)
-    
-    before_avg = 0
-    if before_crash:
-        before_avg = np.mean(before_crash)
-        print(f"Before crash: Avg Throughput={before_avg:.2f} req/s")
-    
-    after_avg = 0
-    if after_crash:
-        after_avg = np.mean(after_crash)
-        print(f"After crash: Avg Throughput={after_avg:.2f} req/s")
-        
-    return before_avg, after_avg
+    parser = argparse.ArgumentParser(description='Compare the performance of any number of platforms or configurations')
+    parser.add_argument('--run', nargs='+', action='append', default=[], metavar=('LABEL', 'K6_OUTPUT'),
+                        help='A labeled run: LABEL K6_OUTPUT [CRASHES], where CRASHES is a crash_times.txt path '
+                             'or comma-separated seconds (default: --crash-time). Repeat for every run')
+    parser.add_argument('--xdn-output', help="Path to XDN K6 output CSV file (same as --run XDN PATH)")
+    parser.add_argument('--worker-output', help="Path to Worker K6 output CSV file (same as --run 'Cloudflare Worker' PATH)")
+    parser.add_argument('--crash-time', default='20', help='Crash schedule of runs without their own: a crash_times.txt path or comma-separated seconds')
+    parser.add_argument('--output', help='Output image file path')
+    parser.add_argument('--rank-by', choices=['overall'] + list(RANK_METRICS), default='overall', help='Metric the table is ordered by (overall: mean rank)')
+    parser.add_argument('--percentile', type=float, default=TAIL_PERCENTILE, help='Latency percentile used as tail latency')
+    parser.add_argument('--align-crash', type=int, default=0, help='Align the plots on this crash (1-based) of every run; 0 keeps the test start')
+    parser.add_argument('--bucket', type=float, default=1.0, help='Time bucket width in seconds (0.01 to 10)')
+    parser.add_argument('--no-cache', action='store_true', help='Always parse the CSV instead of using the columnar cache')
+    parser.add_argument('--jobs', type=int, default=0, help='Runs loaded concurrently (0 for one per CPU)')
+    parser.add_argument('--stats-only', action='store_true', help='Skip the plot (matplotlib is never imported) and print the statistics as JSON')
+    parser.add_argument('--json', help="Write the statistics as JSON to this path ('-' for stdout)")
+    parser.add_argument('--dpi', type=int, default=300, help='Resolution of the saved image')
+    parser.add_argument('--max-points', type=int, default=2000, help='Downsample plotted series to about this many points (0 keeps all)')
+    args = parser.parse_args()
+
+    runs = []
+    if args.xdn_output:
+        runs.append(['XDN', args.xdn_output])
+    if args.worker_output:
+        runs.append(['Cloudflare Worker', args.worker_output])
+    runs += args.run
+    for run in runs:
+        if len(run) not in (2, 3):
+            parser.error(f"--run takes LABEL K6_OUTPUT [CRASHES], got {' '.join(run)}")
+        crashes = run[2] if len(run) == 3 else args.crash_time
+        if not os.path.exists(crashes):
+            try:
+                parse_crash_schedule(crashes)
+            except ValueError:
+                parser.error(f"{crashes!r} is neither a crash times file nor comma-separated seconds")
+        run[2:] = [crashes]
+    if not runs:
+        parser.error('give at least one --run (or --xdn-output / --worker-output)')
+    labels = [label for label, _, _ in runs]
+    if len(set(labels)) != len(labels):
+        parser.error('run labels must be unique')
+    args.runs = [tuple(run) for run in runs]
+
+    if not args.stats_only and not args.output:
+        parser.error('--output is required unless --stats-only is given')
+    if args.stats_only and not args.json:
+        args.json = '-'
+    return args
+
+def alignment(platform, align_crash):
+    # Offset subtracted from the run's time axis, or None when it lacks the crash.
+    if align_crash == 0:
+        return 0.0
+    if len(platform.crash_times) < align_crash:
+        return None
+    return platform.crash_times[align_crash - 1]
+
+def plot(args, platforms):
+    from k6analysis.plots import downsample, plt, save_figure
+
+    colors = plt.rcParams['axes.prop_cycle'].by_key()['color']
+    xlabel = f'Time since crash {args.align_crash} (s)' if args.align_crash else 'Time since test start (s)'
+
+    plt.figure(figsize=(14, 12))
+    throughput_axis = plt.subplot(2, 1, 1)
+    latency_axis = plt.subplot(2, 1, 2, sharex=throughput_axis)
+    y_max = 0
+    for i, platform in enumerate(platforms):
+        offset = alignment(platform, args.align_crash)
+        if offset is None:
+            print(f"Not plotting {platform.label}: it has no crash {args.align_crash}")
+            continue
+        color = colors[i % len(colors)]
+        seconds = platform.seconds - offset
+        throughput_axis.plot(*downsample(seconds, platform.throughputs, args.max_points), '-', color=color,
+                             linewidth=2, label=platform.label)
+        latency_axis.plot(*downsample(seconds, platform.tail, args.max_points), '-', color=color,
+                          linewidth=1.5, label=platform.label)
+        for crash_time in platform.crash_times:
+            for axis in (throughput_axis, latency_axis):
+                axis.axvline(x=crash_time - offset, color=color, linestyle='--', linewidth=1.5, alpha=0.8)
+        if len(platform.throughputs):
+            y_max = max(y_max, np.max(platform.throughputs))
+
+    throughput_axis.set_ylabel('Successful Requests per Second', fontsize=12)
+    throughput_axis.set_xlabel(xlabel, fontsize=12)
+    throughput_axis.set_title('Platform Performance Comparison (dashed lines: crashes)', fontsize=14)
+    throughput_axis.grid(True, linestyle='--', alpha=0.7)
+    throughput_axis.legend(fontsize=12)
+    throughput_axis.set_ylim(0, max(y_max * 1.1, 250))
+
+    latency_axis.set_yscale('log')
+    latency_axis.set_ylabel(f'p{args.percentile:g} http_req_duration (ms)', fontsize=12)
+    latency_axis.set_xlabel(xlabel, fontsize=12)
+    latency_axis.grid(True, which='both', linestyle='--', alpha=0.5)
+    latency_axis.legend(fontsize=12)
+
+    save_figure(args.output, args.dpi)
+    print(f"Comparison graph saved to {args.output}")
+
+def analyze(args):
+    for label, path, crashes in args.runs:
+        print(f"Reading {label} metrics from {path} (crashes: {crashes})")
+    platforms = load_platforms(args.runs, jobs=args.jobs or None, width=args.bucket,
+                               use_cache=not args.no_cache, percentile=args.percentile)
+    if not platforms:
+        sys.exit("No runs to compare: none of them could be read")
+
+    if not args.stats_only:
+        plot(args, platforms)
+
+    ranked, ranks = rank_platforms(platforms, args.rank_by)
+    for platform in ranked:
+        print(f"\n{platform.label} Statistics (Successful Requests Only):")
+        print(f"Average throughput: {platform.metrics['mean']:.2f} req/s")
+        print(f"Crashes at: {', '.join(f'{t:.2f}s' for t in platform.crash_times) or 'none'}")
+    print_comparison(ranked, ranks, args.percentile)
+
+    return {
+        'bucket': args.bucket,
+        'percentile': args.percentile,
+        'rank_by': args.rank_by,
+        'ranking': [platform.label for platform in ranked],
+        'platforms': {
+            platform.label: dict(
+                source=platform.source,
+                crash_times=platform.crash_times,
+                before_crash=platform.metrics['steady'],
+                after_crash=platform.metrics['post_crash'],
+                time_to_recover=platform.metrics['recovery'],
+                tail_latency=platform.metrics['tail_latency'],
+                post_crash_tail_latency=platform.metrics['post_crash_tail_latency'],
+                recovery=platform.recovery,
+                ranks=ranks.loc[platform.label].to_dict(),
+                **throughput_summary(platform.throughputs),
+            )
+            for platform in ranked
+        },
+    }
 
 def main():
     args = parse_args()
-    
-    print(f"Reading XDN metrics from {args.xdn_output}")
-    xdn_timestamps, xdn_throughputs, xdn_max_second = process_k6_data(args.xdn_output, "XDN")
-    
-    print(f"Reading Worker metrics from {args.worker_output}")
-    worker_timestamps, worker_throughputs, worker_max_second = process_k6_data(args.worker_output, "Worker")
-    
-    plt.figure(figsize=(14, 10))
-    
-    if len(xdn_timestamps) > 0:
-        plt.plot(xdn_timestamps, xdn_throughputs, 'b-', linewidth=2, label='XDN')
-    
-    if len(worker_timestamps) > 0:
-        plt.plot(worker_timestamps, worker_throughputs, 'g-', linewidth=2, label='Cloudflare Worker')
-    
-    plt.ylabel('Successful Requests per Second', fontsize=12)
-    plt.xlabel('Time since test start (s)', fontsize=12)
-    plt.title('XDN vs Cloudflare Worker Performance Comparison', fontsize=14)
-    plt.grid(True, linestyle='--', alpha=0.7)
-    plt.legend(fontsize=12)
-    
-    crash_time = args.crash_time
-    plt.axvline(x=crash_time, color='r', linestyle='--', linewidth=2)
-    
-    all_throughputs = np.concatenate([xdn_throughputs, worker_throughputs]) if len(xdn_timestamps) > 0 and len(worker_timestamps) > 0 else (xdn_throughputs if len(xdn_timestamps) > 0 else worker_throughputs)
-    
-    if len(all_throughputs) > 0:
-        max_throughput = np.max(all_throughputs) * 0.8
-    else:
-        max_throughput = 200
-    
-    plt.text(crash_time + 1, max_throughput, 
-            "Server\ncrashed", 
-            verticalalignment='top',
-            fontsize=12)
-    
-    max_second = max(xdn_max_second, worker_max_second, 60)
-    
-    if len(all_throughputs) > 0:
-        y_max = max(np.max(all_throughputs) * 1.1, 250)
-    else:
-        y_max = 250
-        
-    plt.ylim(0, y_max)
-    plt.xlim(0, max_second + 5)
-    
-    plt.grid(True, alpha=0.3)
-    plt.tight_layout()
-    
-    plt.savefig(args.output, dpi=300, bbox_inches='tight')
-    print(f"Comparison graph saved to {args.output}")
-    
-    xdn_before, xdn_after = calculate_statistics(xdn_throughputs, "XDN", crash_time)
-    worker_before, worker_after = calculate_statistics(worker_throughputs, "Cloudflare Worker", crash_time)
-    
-    if len(xdn_throughputs) > 0 and len(worker_throughputs) > 0:
-        print("\nPerformance Comparison (Before Crash):")
-        if xdn_before > worker_before:
-            pct_diff = ((xdn_before - worker_before) / worker_before) * 100
-            print(f"XDN outperforms Cloudflare Worker by {pct_diff:.2f}% ({xdn_before:.2f} vs {worker_before:.2f} req/s)")
-        else:
-            pct_diff = ((worker_before - xdn_before) / xdn_before) * 100
-            print(f"Cloudflare Worker outperforms XDN by {pct_diff:.2f}% ({worker_before:.2f} vs {xdn_before:.2f} req/s)")
-        
-        print("\nRecovery Behavior:")
-        if xdn_after > worker_after:
-            print(f"XDN has better post-crash throughput: {xdn_after:.2f} req/s vs Worker's {worker_after:.2f} req/s")
-        else:
-            print(f"Worker has better post-crash throughput: {worker_after:.2f} req/s vs XDN's {xdn_after:.2f} req/s")
+
+    with redirect_stdout(sys.stderr if args.json == '-' else sys.stdout):
+        stats = analyze(args)
+
+    if args.json and stats is not None:
+        write_json(stats, args.json)
 
 if __name__ == "__main__":
     main()
@@ -1,77 +1,69 @@
 import argparse
-import pandas as pd
-import matplotlib.pyplot as plt
+import os
+import sys
+from contextlib import redirect_stdout
+
 import numpy as np
 
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+from k6analysis import (
+    BASELINE_WINDOW,
+    LATENCY_METRICS,
+    LatencyAggregator,
+    SecondAggregator,
+    TOLERANCE,
+    aggregate,
+    format_percentiles,
+    load_crash_times,
+    print_recovery_report,
+    recovery_metrics,
+    successful_series,
+    whole_buckets,
+)
+from k6analysis.resources import RESOURCE_METRICS, load_resources, print_resource_report
+from k6analysis.stats import latency_summary, phase_summary, throughput_summary, write_json
+from k6analysis.summary import build_summary, summary_aggregators, write_summary
+
+PHASE_NAMES = ['Before crash', 'After crash']
+
 def parse_args():
     parser = argparse.ArgumentParser(description='Visualize Worker throughput')
     parser.add_argument('--k6-output', required=True, help='Path to K6 output CSV file')
     parser.add_argument('--crash-times', required=True, help='Path to crash times file')
-    parser.add_argument('--output', required=True, help='Output image file path')
-    return parser.parse_args()
+    parser.add_argument('--output', help='Output image file path')
+    parser.add_argument('--no-cache', action='store_true', help='Always parse the CSV instead of using the columnar cache')
+    parser.add_argument('--jobs', type=int, default=1, help='Processes parsing an uncached CSV in parallel (0 for one per CPU)')
+    parser.add_argument('--latency', action='store_true', help='Also plot per-second latency percentiles under the throughput curve')
+    parser.add_argument('--latency-metric', default='http_req_duration', choices=LATENCY_METRICS, help='k6 timing metric used for the latency plot')
+    parser.add_argument('--tolerance', type=float, default=TOLERANCE, help='Recovery band around the pre-crash baseline, as a fraction')
+    parser.add_argument('--baseline-window', type=float, default=BASELINE_WINDOW, help='Seconds before each crash used for the steady-state baseline')
+    parser.add_argument('--resources', help='Replica resource samples from harness/sampler.py, drawn under the throughput plot')
+    parser.add_argument('--resource-metrics', nargs='+', choices=list(RESOURCE_METRICS), default=['cpu_pct', 'rss_mb'], help='Resource samples to draw, one panel each')
+    parser.add_argument('--bucket', type=float, default=1.0, help='Time bucket width in seconds (0.01 to 10)')
+    parser.add_argument('--stats-only', action='store_true', help='Skip the plot (matplotlib is never imported) and print the statistics as JSON')
+    parser.add_argument('--json', help="Write the statistics as JSON to this path ('-' for stdout)")
+    parser.add_argument('--summary', help='Write the structured run summary as JSON to this path, plus a one-row .parquet next to it')
+    parser.add_argument('--dpi', type=int, default=300, help='Resolution of the saved image')
+    parser.add_argument('--max-points', type=int, default=2000, help='Downsample plotted series to about this many points (0 keeps all)')
+    args = parser.parse_args()
+    if not args.stats_only and not args.output:
+        parser.error('--output is required unless --stats-only is given')
+    if args.stats_only and not args.json:
+        args.json = '-'
+    return args
 
-def main():
-    args = parse_args()
+def plot(args, timestamps, throughputs, crash_times, latency, resources=None):
+    from k6analysis.plots import downsample, plot_latency_percentiles, plot_resource, plt, save_figure
     
-    print(f"Reading K6 metrics from {args.k6_output}")
+    panels = args.resource_metrics if resources is not None else []
+    rows = 1 + (latency is not None) + len(panels)
+    if rows > 1:
+        plt.figure(figsize=(12, 8 + 4 * (rows - 1)))
+        plt.subplot(rows, 1, 1)
+    else:
+        plt.figure(figsize=(12, 8))
     
-    try:
-        k6_data = pd.read_csv(args.k6_output)
-        
-        min_timestamp = k6_data['timestamp'].min()
-        k6_data['elapsed_time'] = k6_data['timestamp'].apply(
-            lambda x: float(x) - float(min_timestamp)
-        )
-        k6_data['second'] = k6_data['elapsed_time'].apply(lambda x: int(x))
-        
-        successful_reqs = k6_data[k6_data['metric_name'] == 'checks'].copy()
-        
-        if len(successful_reqs) == 0:
-            all_reqs = k6_data[k6_data['metric_name'] == 'http_reqs'].copy()
-            
-            failed_reqs = k6_data[k6_data['metric_name'] == 'http_req_failed'].copy()
-            failed_by_second = failed_reqs.groupby('second')['metric_value'].sum().reset_index()
-            failed_by_second_dict = dict(zip(failed_by_second['second'], failed_by_second['metric_value']))
-            
-            total_by_second = all_reqs.groupby('second')['metric_value'].sum().reset_index()
-            
-            successful_by_second = []
-            for _, row in total_by_second.iterrows():
-                second = row['second']
-                total = row['metric_value']
-                failed = failed_by_second_dict.get(second, 0)
-                successful = max(0, total - failed)
-                successful_by_second.append({'second': second, 'metric_value': successful})
-            
-            throughput_by_second = pd.DataFrame(successful_by_second)
-        else:
-            throughput_by_second = successful_reqs.groupby('second')['metric_value'].sum().reset_index()
-        
-        timestamps = throughput_by_second['second']
-        throughputs = throughput_by_second['metric_value']
-    except Exception as e:
-        print(f"Error processing metrics: {e}")
-        timestamps = np.arange(0, 60)
-        throughputs = np.random.normal(200, 20, size=60)
-    
-    crash_times = []
-    try:
-        with open(args.crash_times, 'r') as f:
-            for line in f:
-                parts = line.strip().split()
-                for part in parts:
-                    try:
-                        crash_time = float(part)
-                        crash_times.append(crash_time)
-                    except ValueError:
-                        print(f"Invalid crash time value: {part}")
-    except Exception as e:
-        print(f"Error reading crash times: {e}")
-        crash_times = [20]
-    
-    plt.figure(figsize=(12, 8))
-    
-    plt.plot(timestamps, throughputs, 'g-', linewidth=2)
+    plt.plot(*downsample(timestamps, throughputs, args.max_points), 'g-', linewidth=2)
     plt.ylabel('Successful Requests per Second')
     plt.xlabel('Time since test start (s)')
     plt.title('Worker Throughput with Server Failures (Successful Requests Only)')
@@ -80,41 +72,124 @@ def main():
     max_throughput = max(np.max(throughputs) * 0.9 if len(throughputs) > 0 else 200, 200)
     for crash_time in crash_times:
         plt.axvline(x=crash_time, color='r', linestyle='--', linewidth=2)
-        plt.text(crash_time + 1, max_throughput, 
-                "Server\ncrashed", 
+        plt.text(crash_time + 1, max_throughput,
+                "Server\ncrashed",
                 verticalalignment='top')
     
     plt.ylim(0, max(np.max(throughputs) * 1.1 if len(throughputs) > 0 else 250, 250))
     plt.xlim(0, max(60, np.max(timestamps) + 5 if len(timestamps) > 0 else 60))
     
-    plt.tight_layout()
+    throughput_axes = plt.gca()
+    if latency is not None:
+        plt.subplot(rows, 1, 2, sharex=throughput_axes)
+        plot_latency_percentiles(latency, crash_times, args.latency_metric, args.max_points)
     
-    plt.savefig(args.output, dpi=300, bbox_inches='tight')
+    for row, metric in enumerate(panels, start=rows - len(panels) + 1):
+        plt.subplot(rows, 1, row, sharex=throughput_axes)
+        plot_resource(resources, metric, RESOURCE_METRICS[metric], crash_times, args.max_points)
+    
+    save_figure(args.output, args.dpi)
     print(f"Graph saved to {args.output}")
+
+def analyze(args):
+    print(f"Reading K6 metrics from {args.k6_output}")
     
-    if len(throughputs) > 0:
+    aggregators = [SecondAggregator(width=args.bucket)]
+    if args.latency:
+        aggregators.append(LatencyAggregator([args.latency_metric], width=args.bucket))
+    if args.summary:
+        # Read in the same pass as the report's own aggregates.
+        aggregators += summary_aggregators(args.bucket)
+    try:
+        results = aggregate(args.k6_output, aggregators, use_cache=not args.no_cache, jobs=args.jobs)
+    except Exception as e:
+        # Nothing is plotted or written for a run that could not be read.
+        sys.exit(f"Error reading K6 metrics: {e}")
+    aggregates = results[0]
+    origin = aggregates.origin
+    latency = results[1] if args.latency else None
+    
+    timestamps = aggregates.seconds
+    throughputs = successful_series(aggregates)
+    
+    crash_times = load_crash_times(args.crash_times, default=[20], origin=origin)
+    
+    resources = None
+    if args.resources:
+        try:
+            resources = load_resources(args.resources, origin)
+        except (OSError, ValueError, KeyError) as e:
+            print(f"Error reading resource samples: {e}")
+    
+    if not args.stats_only:
+        plot(args, timestamps, throughputs, crash_times, latency, resources)
+    
+    # Statistics over whole buckets; the partial edge buckets read as dips.
+    whole_times, whole = whole_buckets(timestamps, throughputs)
+    stats = {
+        'source': args.k6_output,
+        'bucket': args.bucket,
+        'crash_times': crash_times,
+        'throughput': throughput_summary(whole),
+    }
+    
+    if len(whole) > 0:
         print("\nWorker Statistics (Successful Requests Only):")
-        print(f"Average throughput: {np.mean(throughputs):.2f} req/s")
-        print(f"Max throughput: {np.max(throughputs):.2f} req/s")
-        print(f"Min throughput: {np.min(throughputs):.2f} req/s")
+        print(f"Average throughput: {np.mean(whole):.2f} req/s")
+        print(f"Max throughput: {np.max(whole):.2f} req/s")
+        print(f"Min throughput: {np.min(whole):.2f} req/s")
         
         if len(crash_times) > 0:
-            before_crash = []
-            after_crash = []
-            
-            for i, (t, second) in enumerate(zip(throughputs, timestamps)):
-                if second < crash_times[0]:
-                    before_crash.append(t)
-                else:
-                    after_crash.append(t)
+            phases = phase_summary(whole_times, whole, crash_times[:1], PHASE_NAMES)
+            stats['phases'] = phases
             
-            if before_crash:
-                avg_tp_before = np.mean(before_crash)
-                print(f"\nBefore crash: Throughput={avg_tp_before:.2f} req/s")
+            if phases[0]['buckets']:
+                print(f"\nBefore crash: Throughput={phases[0]['throughput']:.2f} req/s")
             
-            if after_crash:
-                avg_tp_after = np.mean(after_crash)
-                print(f"After crash: Throughput={avg_tp_after:.2f} req/s")
+            if phases[1]['buckets']:
+                print(f"After crash: Throughput={phases[1]['throughput']:.2f} req/s")
+    
+    recovery = recovery_metrics(timestamps, throughputs, crash_times, width=args.bucket,
+                                baseline_window=args.baseline_window, tolerance=args.tolerance)
+    stats['recovery'] = recovery
+    print_recovery_report(recovery)
+    
+    if latency is not None:
+        if len(crash_times) > 0:
+            stats['latency'] = latency_summary(latency, args.latency_metric, crash_times[:1], PHASE_NAMES)
+        else:
+            stats['latency'] = latency_summary(latency, args.latency_metric, [], [])
+        print(f"\nLatency ({args.latency_metric}):")
+        print(f"Overall: {format_percentiles(latency.overall(args.latency_metric))}")
+        
+        if len(crash_times) > 0:
+            phases = latency.phase_percentiles(crash_times[:1], args.latency_metric)
+            print(f"Before crash: {format_percentiles(phases[0])}")
+            print(f"After crash: {format_percentiles(phases[1])}")
+    
+    if resources is not None:
+        if len(crash_times) > 0:
+            stats['resources'] = resources.phase_means(crash_times[:1], PHASE_NAMES)
+        else:
+            stats['resources'] = resources.phase_means([], ['Whole run'])
+        print_resource_report(stats['resources'])
+    
+    if args.summary:
+        summary = build_summary(args.k6_output, *results[-3:], crash_times,
+                                baseline_window=args.baseline_window, tolerance=args.tolerance)
+        write_summary(summary, args.summary)
+    
+    return stats
+
+def main():
+    args = parse_args()
+    
+    # With JSON on stdout the human-readable report goes to stderr.
+    with redirect_stdout(sys.stderr if args.json == '-' else sys.stdout):
+        stats = analyze(args)
+    
+    if args.json:
+        write_json(stats, args.json)
 
 if __name__ == "__main__":
     main()
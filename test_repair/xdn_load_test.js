@@ -15,11 +15,13 @@ export const options = {
     scenarios: {
         constant_load: {
             executor: 'constant-arrival-rate',
-            rate: 200,
+            // RATE, DURATION, PRE_ALLOCATED_VUS and MAX_VUS let harness/sweep.py
+            // vary the load without editing this file.
+            rate: parseInt(__ENV.RATE || '200'),
             timeUnit: '1s',
-            duration: '60s',
-            preAllocatedVUs: 50,
-            maxVUs: 100,
+            duration: __ENV.DURATION || '60s',
+            preAllocatedVUs: parseInt(__ENV.PRE_ALLOCATED_VUS || '50'),
+            maxVUs: parseInt(__ENV.MAX_VUS || '100'),
         },
     },
     systemTags: ['scenario', 'status', 'method', 'url'],
@@ -29,23 +31,55 @@ export const options = {
 const CRASH_TIME_SECONDS = 20;
 const CRASHED_PORT = 2302;
 
+const DEFAULT_CRASH_SCHEDULE = `${CRASH_TIME_SECONDS}:kill:${CRASHED_PORT}`;
+
+// Per-request log lines are off unless LOG_REQUESTS is set: the CSV output
+// already has every request, and one line per iteration slows k6 down.
+const LOG_REQUESTS = Boolean(__ENV.LOG_REQUESTS);
+
 const ALL_REPLICAS = [2302, 2308, 2309];
-const ACTIVE_REPLICAS = [2308, 2309];
 
-let testStartTime = null;
+// Kill/restart schedule as "seconds:action:port" entries, e.g.
+// "20:kill:2302,40:kill:2308". harness/orchestrator.py exports it as
+// CRASH_SCHEDULE (empty when nothing is killed) and CRASH_SCHEDULE_START, the
+// epoch the offsets count from; the constants above are only the fallback
+// when the script runs on its own.
+const CRASH_SCHEDULE = (__ENV.CRASH_SCHEDULE !== undefined ? __ENV.CRASH_SCHEDULE : DEFAULT_CRASH_SCHEDULE)
+    .split(',')
+    .filter((entry) => entry.length > 0)
+    .map((entry) => {
+        const [seconds, action, port] = entry.split(':');
+        return { seconds: parseFloat(seconds), action: action, port: parseInt(port) };
+    })
+    .sort((a, b) => a.seconds - b.seconds);
 
-export default function () {
-    if (testStartTime === null) {
-        testStartTime = new Date().getTime();
+const SCHEDULE_START_MS = __ENV.CRASH_SCHEDULE_START ? parseFloat(__ENV.CRASH_SCHEDULE_START) * 1000 : null;
+
+function availablePortsAt(elapsedSeconds) {
+    const down = new Set();
+    for (const event of CRASH_SCHEDULE) {
+        if (event.seconds > elapsedSeconds) {
+            break;
+        }
+        if (event.action === 'kill') {
+            down.add(event.port);
+        } else {
+            down.delete(event.port);
+        }
     }
+    return ALL_REPLICAS.filter((port) => !down.has(port));
+}
+
+export default function () {
+    const scheduleStart = SCHEDULE_START_MS !== null ? SCHEDULE_START_MS : exec.scenario.startTime;
+    const elapsedSeconds = (Date.now() - scheduleStart) / 1000;
+    const currentTime = Math.floor(elapsedSeconds);
     
-    const currentTime = Math.floor((new Date().getTime() - testStartTime) / 1000);
-    
-    let availablePorts;
-    if (currentTime < CRASH_TIME_SECONDS) {
+    let availablePorts = availablePortsAt(elapsedSeconds);
+    if (availablePorts.length === 0) {
+        // Every replica is down: send the request anyway so it is recorded
+        // as a failure, as harness/balancer.py's available_ports does.
         availablePorts = ALL_REPLICAS;
-    } else {
-        availablePorts = ACTIVE_REPLICAS;
     }
     
     const selectedPort = availablePorts[Math.floor(Math.random() * availablePorts.length)];
@@ -64,5 +98,7 @@ export default function () {
         'status is 200': (r) => r.status === 200,
     });
     
-    console.log(`time=${currentTime},status=${response.status},duration=${response.timings.duration},platform=XDN`);
+    if (LOG_REQUESTS) {
+        console.log(`time=${currentTime},status=${response.status},duration=${response.timings.duration},platform=XDN`);
+    }
 }